@@ -0,0 +1,78 @@
+"""
+Measures what compressing GovTrack responses costs and saves, both on the
+wire (gzip, decompressed as the body streams in) and in the cache (zlib at
+the level recorded responses are stored with).
+
+For each payload and zlib level it reports the compression ratio and the
+CPU time to compress and to decompress one response.
+
+Run from this directory:
+
+    python bench_compression.py
+"""
+from __future__ import print_function
+import gzip
+import io
+import os
+import sys
+import timeit
+import zlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "src"))
+
+import govtrack
+from payloads import bill_body, role_body
+
+
+class _Response(object):
+    """
+    Just enough of an HTTP response for :func:`govtrack._read_body`.
+    """
+
+    def __init__(self, body):
+        self._stream = io.BytesIO(body)
+
+    def getheader(self, name):
+        return "gzip" if name == "Content-Encoding" else None
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def gzipped(body):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
+        f.write(body)
+    return buffer.getvalue()
+
+
+def best(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    print("{:<12} {:>9} {:>6} {:>7} {:>12} {:>14}".format(
+        "payload", "body KiB", "level", "ratio", "compress ms",
+        "decompress ms"))
+    for name, body in (("roles 500", role_body(500)),
+                       ("bills 1000", bill_body(1000)),
+                       ("bills 10000", bill_body(10000))):
+        body = body.encode("utf-8")
+        repeat = 20 if len(body) < 4 * 1024 * 1024 else 5
+        for level in (1, govtrack._COMPRESSION_LEVEL, 9):
+            compressed = zlib.compress(body, level)
+            print("{:<12} {:>9.0f} {:>6} {:>6.1f}x {:>12.2f} {:>14.2f}".format(
+                name, len(body) / 1024.0, level,
+                len(body) / float(len(compressed)),
+                best(lambda: zlib.compress(body, level), repeat),
+                best(lambda: zlib.decompress(compressed), repeat)))
+        stream = gzipped(body)
+        print("{:<12} {:>9.0f} {:>6} {:>6.1f}x {:>12} {:>14.2f}".format(
+            name, len(body) / 1024.0, "gzip", len(body) / float(len(stream)),
+            "-", best(lambda: govtrack._read_body(_Response(stream)),
+                      repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the old and new ways of decoding a GovTrack response body.
+
+The old path decoded the bytes, stripped "// " markers, collapsed all
+whitespace with split/join and only then called json.loads. The new path
+parses the bytes directly, or decodes the "objects" array one element at a
+time.
+
+Run from this directory:
+
+    python bench_decode.py
+"""
+from __future__ import print_function
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "src"))
+
+import govtrack
+from payloads import bill_body
+
+
+def legacy_decode(body):
+    result = body.decode("utf-8")
+    result = result.replace("// ", "")
+    result = " ".join(result.split())
+    return json.loads(result)
+
+
+def decode(body):
+    return govtrack._decode_response(body)
+
+
+def incremental_decode(body):
+    for _ in govtrack._iter_objects(body, {}):
+        pass
+
+
+def measure(function, body, repeat):
+    seconds = min(timeit.repeat(lambda: function(body), number=1,
+                                repeat=repeat))
+    tracemalloc.start()
+    function(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    print("{:>8} {:>9} {:<12} {:>10} {:>12}".format(
+        "objects", "body KiB", "path", "ms", "peak KiB"))
+    for count in (100, 1000, 10000):
+        body = bill_body(count).encode("utf-8")
+        repeat = 20 if count < 10000 else 5
+        for name, function in (("legacy", legacy_decode),
+                               ("bytes", decode),
+                               ("incremental", incremental_decode)):
+            seconds, peak = measure(function, body, repeat)
+            print("{:>8} {:>9} {:<12} {:>10.2f} {:>12}".format(
+                count, len(body) // 1024, name, seconds * 1000,
+                peak // 1024))
+
+
+if __name__ == "__main__":
+    main()
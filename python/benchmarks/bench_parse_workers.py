@@ -0,0 +1,71 @@
+"""
+Measures how parsing a large paginated crawl scales with parse workers
+(see govtrack.set_parse_workers), from an offline cache of bill pages.
+
+For each crawl size it reports the time to iterate over every bill with
+parsing in this process, and with 1, 2, 4 and 8 worker processes, along
+with the speedup over parsing in this process. Worker start-up is not
+timed: the pool is started before the first measured run.
+
+Run from this directory:
+
+    python bench_parse_workers.py
+"""
+from __future__ import print_function
+import json
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "src"))
+
+import govtrack
+from payloads import make_bill
+
+PAGE_SIZE = 100
+WORKERS = (0, 1, 2, 4, 8)
+
+
+def replay_pages(count):
+    """
+    Serve *count* bills, split over pages of PAGE_SIZE, from an in-memory
+    cache store, and disconnect so iter_bills reads them offline.
+    """
+    data = {}
+    for offset in range(0, count, PAGE_SIZE):
+        objects = [make_bill(i)
+                   for i in range(offset, min(count, offset + PAGE_SIZE))]
+        body = json.dumps({"meta": {"limit": PAGE_SIZE, "offset": offset,
+                                    "total_count": count},
+                           "objects": objects})
+        url = govtrack._page_query({'q': "healthcare"}, "bill", offset,
+                                   PAGE_SIZE)
+        data[govtrack._cache_key(url)] = ["repeat", body]
+    govtrack.set_cache_store(govtrack._MemoryCacheStore(data))
+    govtrack._DEFAULT_CLIENT.connected = False
+
+
+def crawl():
+    return sum(1 for _ in govtrack.iter_bills("healthcare",
+                                              page_size=PAGE_SIZE))
+
+
+def main():
+    print("{:<8} {:>8} {:>10} {:>8}".format("bills", "workers", "ms",
+                                           "speedup"))
+    for count in (10000, 50000):
+        replay_pages(count)
+        baseline = None
+        for workers in WORKERS:
+            govtrack.set_parse_workers(workers)
+            assert crawl() == count
+            elapsed = min(timeit.repeat(crawl, number=1, repeat=3)) * 1000
+            baseline = baseline or elapsed
+            print("{:<8} {:>8} {:>10.1f} {:>7.2f}x".format(
+                count, workers or "-", elapsed, baseline / elapsed))
+    govtrack.set_parse_workers(0)
+
+
+if __name__ == "__main__":
+    main()
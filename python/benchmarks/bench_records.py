@@ -0,0 +1,84 @@
+"""
+Measures building a 10,000 record result set three ways: dicts (the
+default), slot-based objects (after govtrack.use_objects()), and the
+__dict__-backed objects the domain classes used to be.
+
+Run from this directory:
+
+    python bench_records.py
+"""
+from __future__ import print_function
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "src"))
+
+import govtrack
+from payloads import make_bill
+
+RECORDS = 10000
+
+
+class DictBackedBill(object):
+    """
+    The Bill class as it was before it gained __slots__.
+    """
+
+    def __init__(self, is_alive=None, is_current=None, title=None,
+                 number=None, description=None, congress_session=None,
+                 introduced_date=None):
+        self.is_alive = is_alive
+        self.is_current = is_current
+        self.title = title
+        self.number = number
+        self.description = description
+        self.congress_session = congress_session
+        self.introduced_date = introduced_date
+
+
+def build_dicts(objects):
+    return [govtrack.Bill._from_json(o)._to_dict() for o in objects]
+
+
+def build_objects(objects):
+    return [govtrack.Bill._from_json(o) for o in objects]
+
+
+def build_dict_backed(objects):
+    return [DictBackedBill(is_alive=o['is_alive'],
+                           is_current=o['is_current'],
+                           title=o['title'],
+                           number=o['number'],
+                           description=o['current_status_description'],
+                           congress_session=o['congress'],
+                           introduced_date=o['introduced_date'])
+            for o in objects]
+
+
+def measure(function, objects):
+    seconds = min(timeit.repeat(lambda: function(objects), number=1,
+                                repeat=30))
+    tracemalloc.start()
+    result = function(objects)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return seconds, size
+
+
+def main():
+    objects = [make_bill(i) for i in range(RECORDS)]
+    print("{:<20} {:>10} {:>14}".format("result", "ms", "retained KiB"))
+    for name, function in (("dicts", build_dicts),
+                           ("slot objects", build_objects),
+                           ("__dict__ objects", build_dict_backed)):
+        seconds, size = measure(function, objects)
+        print("{:<20} {:>10.2f} {:>14}".format(name, seconds * 1000,
+                                               size // 1024))
+
+
+if __name__ == "__main__":
+    main()
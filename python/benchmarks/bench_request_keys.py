@@ -0,0 +1,97 @@
+"""
+Measures the cache hit rate of a workload of queries typed the way people
+type them: the same party or keywords in different cases and spacing, with
+parameters given in different orders.
+
+Each query is answered from a cache that starts empty and records every
+miss. The workload is replayed twice: keying the cache by the full url, as
+the library did before request keys (parameters sorted by value and sent as
+typed), and keying it by the request key (see govtrack._cache_key). It also
+reports what computing a request key costs per query.
+
+Run from this directory:
+
+    python bench_request_keys.py
+"""
+from __future__ import print_function
+import os
+import random
+import sys
+import timeit
+from collections import OrderedDict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "src"))
+
+import govtrack
+from payloads import PARTIES
+
+QUERIES = (100, 1000, 10000)
+KEYWORDS = ["healthcare", "dental care", "farm bill", "tax reform",
+            "student loans"]
+SPELLINGS = (str.lower, str.upper, str.title, lambda value: value,
+             lambda value: " " + value, lambda value: value.replace(" ", "  "))
+
+
+def legacy_url(params, element):
+    """The url the library built before request keys."""
+    ordered = OrderedDict(sorted(params.items(), key=lambda x: x[1],
+                                 reverse=True))
+    return govtrack._urlencode(govtrack._BASE_URL + element, ordered)
+
+
+def workload(count):
+    """*count* (params, element) queries, each spelled at random."""
+    rng = random.Random(0)
+    queries = []
+    for _ in range(count):
+        spell = rng.choice(SPELLINGS)
+        if rng.random() < 0.5:
+            items = [('q', spell(rng.choice(KEYWORDS)))]
+            element = "bill"
+        else:
+            items = [('current', rng.choice(("True", "true"))),
+                     ('party', spell(rng.choice(PARTIES))),
+                     ('role_type', rng.choice(("senator",
+                                               "representative")))]
+            element = "role"
+        rng.shuffle(items)
+        queries.append((OrderedDict(items), element))
+    return queries
+
+
+def hit_rate(keys):
+    """The share of *keys* already seen, in order, by a recording cache."""
+    seen = set()
+    hits = 0
+    for key in keys:
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+    return hits / float(len(keys)), len(seen)
+
+
+def main():
+    print("{:<8} {:<12} {:>9} {:>9}".format("queries", "keyed by",
+                                            "hit rate", "entries"))
+    for count in QUERIES:
+        queries = workload(count)
+        for name, keys in (
+                ("url", [legacy_url(params, element)
+                         for params, element in queries]),
+                ("request key", [govtrack._cache_key(
+                    govtrack._build_query(params, element))
+                    for params, element in queries])):
+            rate, entries = hit_rate(keys)
+            print("{:<8} {:<12} {:>8.1f}% {:>9}".format(count, name,
+                                                        rate * 100, entries))
+
+    url = govtrack._build_query(*workload(1)[0])
+    elapsed = min(timeit.repeat(lambda: govtrack._cache_key(url),
+                                number=10000, repeat=3))
+    print("request key: {:.1f} us per query".format(elapsed / 10000 * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Synthetic GovTrack-shaped payloads for the benchmarks.
+
+The records mirror the shape (and roughly the size) of real /role and /bill
+objects, including the nested person and sponsor records that the library
+ignores, so that decoding and conversion costs are realistic.
+"""
+import json
+
+STATES = ["AL", "AK", "AZ", "CA", "CO", "FL", "IL", "MA", "NM", "NY", "OH",
+          "TX", "VA", "WA"]
+PARTIES = ["Democrat", "Republican", "Independent"]
+
+
+def make_person(index):
+    return {"bioguideid": "U{:06d}".format(index), "birthday": "1950-07-18",
+            "cspanid": index, "firstname": "First{}".format(index),
+            "gender": "female" if index % 2 else "male",
+            "gender_label": "Female" if index % 2 else "Male",
+            "id": 400000 + index, "lastname": "Last{}".format(index),
+            "link": "https://www.govtrack.us/congress/members/"
+                    "member/{}".format(400000 + index),
+            "middlename": "", "name": "Rep. First{0} Last{0} [D-CO]".format(
+                index), "namemod": "", "nickname": "",
+            "osid": "N{:08d}".format(index), "pvsid": str(index),
+            "sortname": "Last{0}, First{0} (Rep.) [D-CO]".format(index),
+            "twitterid": "member{}".format(index),
+            "youtubeid": None}
+
+
+def make_role(index):
+    senator = index % 5 == 0
+    return {"congress_numbers": [111, 112, 113], "current": True,
+            "description": "Representative for district {}".format(index),
+            "district": None if senator else index % 53, "enddate": "2015-01-03",
+            "id": index,
+            "leadership_title": "Majority Whip" if index % 97 == 0 else None,
+            "party": PARTIES[index % len(PARTIES)],
+            "person": make_person(index), "phone": "202-224-5941",
+            "role_type": "senator" if senator else "representative",
+            "role_type_label": "Senator" if senator else "Representative",
+            "senator_class": "class2" if senator else None,
+            "senator_rank": "senior" if senator else None,
+            "startdate": "2009-01-06", "state": STATES[index % len(STATES)],
+            "title": "Sen." if senator else "Rep.",
+            "title_long": "Senator" if senator else "Representative",
+            "website": "http://member{}.house.gov".format(index)}
+
+
+def make_bill(index):
+    return {"bill_resolution_type": "bill", "bill_type": "house_bill",
+            "bill_type_label": "H.R.", "congress": 93 + index % 21,
+            "current_status": "referred",
+            "current_status_date": "1973-04-10",
+            "current_status_description": "This bill was introduced on "
+                                          "April 10, 1973, in a previous "
+                                          "session of Congress, but was not "
+                                          "enacted.",
+            "current_status_label": "Referred to Committee",
+            "display_number": "H.R. {}".format(index),
+            "id": 200000 + index, "introduced_date": "1973-04-10",
+            "is_alive": index % 7 == 0, "is_current": index % 3 == 0,
+            "link": "https://www.govtrack.us/congress/bills/93/hr{}".format(
+                index),
+            "major_actions": [["datetime.datetime(1973, 4, 10, 0, 0)", 2,
+                               "Referred to House Committee on Ways and "
+                               "Means.", "<action datetime=\"1973-04-10\">\n"
+                                         "    <text>Referred.</text>\n"
+                                         "  </action>\n"]],
+            "noun": "bill", "number": index,
+            "sponsor": make_person(index % 500),
+            "title": "H.R. {} (93rd): National Healthcare Act {}".format(
+                index, index),
+            "title_without_number": "National Healthcare Act",
+            "titles": [["short", "introduced", "National Healthcare Act"],
+                       ["official", "introduced",
+                        "A bill to provide a comprehensive program of "
+                        "healthcare nationwide."]]}
+
+
+def make_body(objects, indent=2):
+    """
+    :returns: the *str* response body for a page holding *objects*
+    """
+    return json.dumps({"meta": {"limit": len(objects), "offset": 0,
+                                "total_count": len(objects)},
+                       "objects": objects}, indent=indent)
+
+
+def role_body(count):
+    return make_body([make_role(i) for i in range(count)])
+
+
+def bill_body(count):
+    return make_body([make_bill(i) for i in range(count)])
@@ -0,0 +1,280 @@
+"""
+Offline benchmark suite for the library's hot paths.
+
+Every benchmark runs against synthetic GovTrack-shaped payloads (see
+payloads.py), so no network access is needed. Results are written as JSON so
+that runs can be compared:
+
+    python run_benchmarks.py --output before.json
+    ... change something ...
+    python run_benchmarks.py --output after.json --compare before.json
+
+With --compare, the exit status is 1 when any benchmark got slower than the
+baseline by more than --threshold.
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "src"))
+
+import govtrack
+import payloads
+
+SIZES = (100, 10000, 100000)
+PAGE_SIZE = 100
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """
+    Register a benchmark. The decorated function receives the payload size
+    and a scratch directory, and returns the callable to time.
+    """
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def _replay(body):
+    """
+    Serve *body* from an in-memory cache store for every url, so
+    _fetch_govtrack_info runs offline.
+    """
+    class ReplayStore(govtrack._MemoryCacheStore):
+        def get(self, key):
+            return ["repeat", body]
+    govtrack.set_cache_store(ReplayStore())
+    govtrack._DEFAULT_CLIENT.connected = False
+
+
+def _write_cache(directory, size):
+    """
+    Write a JSON cache file holding *size* bill objects, split over pages of
+    PAGE_SIZE objects with one url each.
+    """
+    data = {}
+    for page in range(max(1, size // PAGE_SIZE)):
+        objects = [payloads.make_bill(page * PAGE_SIZE + i)
+                   for i in range(min(size, PAGE_SIZE))]
+        url = govtrack._BASE_URL + "bill?q=page{}".format(page)
+        data[url] = ["repeat", payloads.make_body(objects, indent=None)]
+    filename = os.path.join(directory, "cache.json")
+    with open(filename, "w") as f:
+        json.dump({"data": data, "metadata": ""}, f)
+    return filename, sorted(data)
+
+
+@benchmark("fetch_decode_roles")
+def fetch_decode_roles(size, directory):
+    _replay(payloads.role_body(size))
+    return lambda: govtrack._fetch_govtrack_info({'party': "Democrat"},
+                                                 "role")
+
+
+@benchmark("fetch_decode_bills")
+def fetch_decode_bills(size, directory):
+    _replay(payloads.bill_body(size))
+    return lambda: govtrack._fetch_govtrack_info({'q': "healthcare"}, "bill")
+
+
+@benchmark("convert_unicode_to_str")
+def convert_unicode_to_str(size, directory):
+    parsed = json.loads(payloads.bill_body(size))
+    return lambda: govtrack._recursively_convert_unicode_to_str(parsed)
+
+
+@benchmark("official_from_json")
+def official_from_json(size, directory):
+    objects = [payloads.make_role(i) for i in range(size)]
+    from_json = govtrack.PublicOfficial._from_json
+    return lambda: [from_json(o) for o in objects]
+
+
+@benchmark("bill_from_json")
+def bill_from_json(size, directory):
+    objects = [payloads.make_bill(i) for i in range(size)]
+    from_json = govtrack.Bill._from_json
+    return lambda: [from_json(o) for o in objects]
+
+
+@benchmark("lookup")
+def lookup(size, directory):
+    keys = [govtrack._cache_key(
+        govtrack._BASE_URL + "bill?q=keyword{}".format(i))
+        for i in range(size)]
+    govtrack.set_cache_store(govtrack._MemoryCacheStore(
+        dict((key, ["repeat", "{}"]) for key in keys)))
+
+    def run():
+        for key in keys:
+            govtrack._lookup(key)
+    return run
+
+
+@benchmark("disconnect_load")
+def disconnect_load(size, directory):
+    filename, urls = _write_cache(directory, size)
+    return lambda: govtrack.disconnect(filename)
+
+
+def _first_query(filename, url):
+    """
+    Time-to-first-query: open the cache and answer one lookup from it.
+    """
+    def run():
+        govtrack.disconnect(filename)
+        govtrack._fetch_query(url)
+    return run
+
+
+@benchmark("first_query_json")
+def first_query_json(size, directory):
+    filename, urls = _write_cache(directory, size)
+    return _first_query(filename, urls[0])
+
+
+@benchmark("first_query_snapshot")
+def first_query_snapshot(size, directory):
+    filename, urls = _write_cache(directory, size)
+    snapshot = os.path.join(directory, "cache.snapshot")
+    govtrack.compile_cache_snapshot(filename, snapshot)
+    return _first_query(snapshot, urls[0])
+
+
+@benchmark("first_query_sqlite")
+def first_query_sqlite(size, directory):
+    filename, urls = _write_cache(directory, size)
+    store = os.path.join(directory, "cache.sqlite")
+    govtrack.import_cache_json(filename, store)
+    return _first_query(store, urls[0])
+
+
+@benchmark("index_bills")
+def index_bills(size, directory):
+    body = payloads.bill_body(size)
+
+    def run():
+        govtrack._BillIndex().add_response("bill?q=healthcare", body)
+    return run
+
+
+@benchmark("search_bills")
+def search_bills(size, directory):
+    index = govtrack._BillIndex()
+    index.add_response("bill?q=healthcare", payloads.bill_body(size))
+    return lambda: index.search("healthcare act")
+
+
+@benchmark("find_officials")
+def find_officials(size, directory):
+    roster = govtrack.Roster(payloads.make_role(i) for i in range(size))
+    return lambda: roster.find(state=payloads.STATES[7], district=7)
+
+
+def measure(run, budget, max_repeat):
+    """
+    Time *run* repeatedly within roughly *budget* seconds.
+
+    :returns: the list of timings, in seconds
+    """
+    timings = []
+    while True:
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        if len(timings) >= max_repeat or sum(timings) >= budget:
+            return timings
+
+
+def run_suite(sizes, selected, budget, max_repeat):
+    results = []
+    for name, setup in BENCHMARKS:
+        if selected and name not in selected:
+            continue
+        for size in sizes:
+            directory = tempfile.mkdtemp()
+            try:
+                timings = measure(setup(size, directory), budget, max_repeat)
+            finally:
+                govtrack.set_cache_store(govtrack._MemoryCacheStore())
+                govtrack.connect()
+                shutil.rmtree(directory)
+            timings.sort()
+            result = {"benchmark": name, "size": size,
+                      "best": timings[0],
+                      "median": timings[len(timings) // 2],
+                      "repeat": len(timings)}
+            results.append(result)
+            print("{:<26} {:>8} {:>12.3f} ms {:>12.3f} ms {:>4}x".format(
+                name, size, result["best"] * 1000, result["median"] * 1000,
+                result["repeat"]))
+            sys.stdout.flush()
+    return results
+
+
+def compare(results, baseline_filename, threshold):
+    """
+    Print how each result compares with the same benchmark in a baseline
+    file.
+
+    :returns: whether any benchmark regressed by more than *threshold*
+    """
+    with open(baseline_filename) as f:
+        baseline = dict(((r["benchmark"], r["size"]), r)
+                        for r in json.load(f)["results"])
+    regressed = False
+    print("\n{:<26} {:>8} {:>10}".format("benchmark", "size", "vs base"))
+    for result in results:
+        old = baseline.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        ratio = result["best"] / old["best"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print("{:<26} {:>8} {:>9.2f}x{}".format(
+            result["benchmark"], result["size"], ratio, flag))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma-separated payload sizes, in objects")
+    parser.add_argument("--benchmark", action="append", default=[],
+                        help="only run this benchmark (repeatable)")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds to spend timing each benchmark")
+    parser.add_argument("--max-repeat", type=int, default=50)
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="where to write the JSON results")
+    parser.add_argument("--compare", help="a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print("{:<26} {:>8} {:>15} {:>15} {:>5}".format(
+        "benchmark", "size", "best", "median", "runs"))
+    results = run_suite(sizes, args.benchmark, args.budget, args.max_repeat)
+    with open(args.output, "w") as f:
+        json.dump({"python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "results": results}, f, indent=2)
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,50 @@
 from __future__ import print_function
 import sys
+import argparse
+import base64
+import copy
+import hashlib
 import json
+import math
+import mmap
+import multiprocessing
+import operator
+import os
+import random
+import re
+import socket
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from email.utils import mktime_tz, parsedate_tz
 
 HEADER = {'User-Agent': 'RealTimeWeb GovTrack library for educational purposes'}
+_BASE_URL = 'https://www.govtrack.us/api/v2/'
+_PAGE_SIZE = 100
 PYTHON_3 = sys.version_info >= (3, 0)
 
 if PYTHON_3:
+    import asyncio
+    import http.client as httplib
+    from concurrent.futures import Future, ThreadPoolExecutor
+    import queue
     import urllib.error
-    import urllib.request as request
-    from urllib.parse import quote_plus
+    from urllib.request import getproxies, proxy_bypass
+    from urllib.parse import parse_qsl, quote_plus, urljoin, urlsplit
+    _HTTPError = urllib.error.HTTPError
+    _URLError = urllib.error.URLError
 else:
+    import httplib
+    import Queue as queue
     import urllib2
-    from urllib import quote_plus
+    from urllib import getproxies, proxy_bypass, quote_plus
+    from urlparse import parse_qsl, urljoin, urlsplit
+    _HTTPError = urllib2.HTTPError
+    _URLError = urllib2.URLError
 
 # Auxilary
 
@@ -54,473 +87,4821 @@ def _urlencode(query, params):
         key + '=' + quote_plus(str(value)) for key, value in _iteritems(params))
 
 
-def _get(url):
+def _endpoint_path(url):
     """
-    Internal method to convert a URL into it's response (a *str*).
+    Internal method to find the path of a url below the API's base url.
 
-    :param str url: the url to request a response from
-    :returns: the *str* response
+    :param str url: the url
+    :returns: the *str* path, e.g. "bill/200011"
     """
-    if PYTHON_3:
-        req = request.Request(url, headers=HEADER)
-        response = request.urlopen(req)
-        return response.read().decode('utf-8')
-    else:
-        req = urllib2.Request(url, headers=HEADER)
-        response = urllib2.urlopen(req)
-        return response.read()
+    path = urlsplit(url).path
+    if path.startswith(urlsplit(_BASE_URL).path):
+        path = path[len(urlsplit(_BASE_URL).path):]
+    return path.strip('/')
 
 
-def _recursively_convert_unicode_to_str(input):
+def _endpoint(url):
     """
-    Force the given input to only use `str` instead of `bytes` or `unicode`.
-
-    This works even if the input is a dict, list, or a string.
+    Internal method to find the API endpoint a url is for.
 
-    :params input: The bytes/unicode input
-    :returns str: The input converted to a `str`
+    :param str url: the url
+    :returns: the *str* endpoint, e.g. "bill"
     """
-    if isinstance(input, dict):
-        return {_recursively_convert_unicode_to_str(
-            key): _recursively_convert_unicode_to_str(value) for key, value in
-                input.items()}
-    elif isinstance(input, list):
-        return [_recursively_convert_unicode_to_str(element) for element in
-                input]
-    elif not PYTHON_3:
-        return input.encode('utf-8')
-    elif PYTHON_3 and isinstance(input, str):
-        return str(input.encode('ascii', 'replace').decode('ascii'))
-    else:
-        return input
+    return _endpoint_path(url).split('/')[0]
 
 
-# Cache
+# Request Keys
 
-_CACHE = {}
-_CACHE_COUNTER = {}
-_EDITABLE = False
-_CONNECTED = True
-_PATTERN = "repeat"
 
+# Parameters whose values the server compares in a canonical case
+_CANONICAL_VALUES = {'party': lambda value: value.title(),
+                     'role_type': lambda value: value.lower()}
 
-def _start_editing(pattern="repeat"):
-    """
-    Start adding seen entries to the cache. So, every time that you make a request,
-    it will be saved to the cache. You must :ref:`_save_cache` to save the
-    newly edited cache to disk, though!
-    """
-    global _EDITABLE, _PATTERN
-    _EDITABLE = True
-    _PATTERN = pattern
+# Hex digits of the request hash kept in a cache key
+_KEY_DIGITS = 20
 
 
-def _stop_editing():
-    """
-    Stop adding seen entries to the cache.
+def _normalize_value(name, value):
     """
-    global _EDITABLE
-    _EDITABLE = False
+    Internal method to put a parameter value in the form it is sent in:
+    surrounding and repeated whitespace is dropped, booleans are spelled
+    "True" and "False", and the values of parameters in
+    `_CANONICAL_VALUES` are put in the server's case.
 
-
-def _add_to_cache(key, value):
-    """
-    Internal method to add a new key-value to the local cache.
-    :param str key: The new url to add to the cache
-    :param str value: The HTTP response for this key.
-    :returns: void
+    :param str name: the parameter
+    :param value: the value
+    :returns: the *str* value
     """
-    if key in _CACHE:
-        _CACHE[key].append(value)
-    else:
-        _CACHE[key] = [_PATTERN, value]
-        _CACHE_COUNTER[key] = 0
+    value = ' '.join(str(value).split())
+    if value.lower() in ('true', 'false'):
+        return value.capitalize()
+    canonical = _CANONICAL_VALUES.get(name)
+    return canonical(value) if canonical else value
 
 
-def _clear_key(key):
+def _cache_key(url):
     """
-    Internal method to remove a key from the local cache.
-    :param str key: The url to remove from the cache
+    Internal method to find the canonical request key that the responses to
+    a url are cached under. Urls asking the same server for the same thing
+    share a key, whatever the order, case or spacing of their parameters:
+    the key is the url's endpoint and a hash of its host, path and sorted,
+    lowercased parameters.
+
+    :param str url: the url, or a key already
+    :returns: the *str* key, e.g. "bill:5e0c2a61e3d3c0c4b1e2"
     """
-    if key in _CACHE:
-        del _CACHE[key]
+    if '://' not in url:
+        return url
+    parts = urlsplit(url)
+    path = _endpoint_path(url).lower()
+    params = sorted((name.strip().lower(), ' '.join(value.split()).lower())
+                    for name, value in parse_qsl(parts.query,
+                                                 keep_blank_values=True))
+    canonical = parts.netloc.lower() + '/' + path + '?' + '&'.join(name + '=' + value
+                                      for name, value in params)
+    if not isinstance(canonical, bytes):
+        canonical = canonical.encode('utf-8')
+    return '{}:{}'.format(path.split('/')[0],
+                          hashlib.sha1(canonical).hexdigest()[:_KEY_DIGITS])
 
 
-def _save_cache(filename="cache.json"):
+def _key_endpoint(key):
     """
-    Internal method to save the cache in memory to a file, so that it can be used later.
+    Internal method to find the API endpoint a cache key is for.
 
-    :param str filename: the location to store this at.
+    :param str key: a request key, or the url of a cache recorded before
+                    request keys
+    :returns: the *str* endpoint, e.g. "bill"
     """
-    with open(filename, 'w') as f:
-        json.dump({"data": _CACHE, "metadata": ""}, f)
+    if '://' in key:
+        return _endpoint(key)
+    return key.split(':', 1)[0]
 
 
-def _lookup(key):
+def _rekeyed(entries):
     """
-    Internal method that looks up a key in the local cache.
+    Internal method to move cache entries under their request keys. The
+    responses of urls that share a key are replayed one after another, in
+    the order the entries are given.
 
-    :param key: Get the value based on the key from the cache.
-    :type key: string
-    :returns: void
+    :param entries: the (key, entry) pairs of a cache
+    :returns: an *OrderedDict* of the request keys' entries
     """
-    if key not in _CACHE:
-        return ""
-    if _CACHE_COUNTER[key] >= len(_CACHE[key][1:]):
-        if _CACHE[key][0] == "empty":
-            return ""
-        elif _CACHE[key][0] == "repeat" and _CACHE[key][1:]:
-            return _CACHE[key][-1]
-        elif _CACHE[key][0] == "repeat":
-            return ""
+    merged = OrderedDict()
+    for key, entry in entries:
+        key = _cache_key(key)
+        if key in merged:
+            merged[key].extend(entry[1:])
         else:
-            _CACHE_COUNTER[key] = 1
-    else:
-        _CACHE_COUNTER[key] += 1
-    if _CACHE[key]:
-        return _CACHE[key][_CACHE_COUNTER[key]]
-    else:
-        return ""
+            merged[key] = list(entry)
+    return merged
 
 
-def connect():
-    """
-    Connect to the online data source in order to get up-to-date information.
+# Instrumentation
 
-    :returns: void
-    """
-    global _CONNECTED
-    _CONNECTED = True
+_COUNTERS = OrderedDict([
+    ('http_requests', "HTTP requests sent to the server."),
+    ('bytes_received', "Response body bytes received, before decompression."),
+    ('response_cache_hits', "Responses served fresh from the response cache."),
+    ('response_cache_revalidations',
+     "Cached responses revalidated with a 304 Not Modified."),
+    ('response_cache_misses', "Responses the response cache did not have."),
+    ('response_cache_evictions', "Responses evicted from the response cache."),
+    ('replay_hits', "Recorded responses replayed from the local cache."),
+    ('replay_misses', "Lookups the local cache had no response for."),
+    ('shared_cache_hits',
+     "Responses another process had already fetched into the shared cache."),
+])
+_METRICS = None
 
 
-def disconnect(filename="../src/cache.json"):
+class _Metrics(object):
     """
-    Connect to the local cache, so no internet connection is required.
+    Per-phase timings and counters collected while instrumentation is
+    enabled. The phases of a request are:
 
-    :returns: void
+    - connect: opening a new connection
+    - ttfb: from sending the request to the response headers
+    - download: reading (and decompressing) the body
+    - decode: decoding the body and removing comment markers
+    - parse: `json.loads`
+    - convert: decompressing a recorded response, and converting the text
+      of a response to `str` (always on Python 2; on Python 3 only for
+      text that is not ASCII)
+    - build: constructing the result dicts or objects
+
+    Each top-level call also gets a record of its own, which is passed to
+    the callbacks when the call finishes.
     """
-    global _CONNECTED, _CACHE
-    try:
-        with open(filename, 'r') as f:
-            _CACHE = _recursively_convert_unicode_to_str(json.load(f))['data']
-    except (OSError, IOError) as e:
-        raise GovTrackException(
-            "The cache file '{}' was not found.".format(filename))
-    for key in _CACHE.keys():
-        _CACHE_COUNTER[key] = 0
-    _CONNECTED = False
 
+    def __init__(self, callbacks=()):
+        self.callbacks = list(callbacks)
+        # Phase -> [count, total seconds, longest seconds]
+        self.phases = OrderedDict()
+        self.counters = OrderedDict((name, 0) for name in _COUNTERS)
+        self._lock = threading.Lock()
+        self._local = threading.local()
 
-# Exceptions
+    def observe(self, phase, seconds):
+        with self._lock:
+            stat = self.phases.get(phase)
+            if stat is None:
+                stat = self.phases[phase] = [0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+        record = getattr(self._local, 'record', None)
+        if record is not None:
+            record['phases'][phase] = record['phases'].get(phase, 0.0) + \
+                seconds
 
-class GovTrackException(Exception):
-    pass
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        record = getattr(self._local, 'record', None)
+        if record is not None:
+            record['counters'][name] = record['counters'].get(name, 0) + \
+                amount
 
+    def begin(self, url):
+        """
+        Start a record for this thread's call, unless one is open already.
 
-# Domain Objects
+        :returns: whether a record was started
+        """
+        record = getattr(self._local, 'record', None)
+        if record is not None:
+            if record['url'] is None:
+                record['url'] = url
+            return False
+        self._local.record = {'url': url, 'phases': {}, 'counters': {},
+                              'error': None, 'start': _clock()}
+        return True
 
-class Bill(object):
+    def end(self, error=None):
+        record = self._local.record
+        self._local.record = None
+        record['seconds'] = _clock() - record.pop('start')
+        if error is not None:
+            record['error'] = repr(error)
+        for callback in self.callbacks:
+            callback(record)
+
+    def snapshot(self):
+        with self._lock:
+            return {'phases': OrderedDict(
+                        (phase, {'count': count, 'seconds': total,
+                                 'max_seconds': longest})
+                        for phase, (count, total, longest)
+                        in _iteritems(self.phases)),
+                    'counters': dict(self.counters)}
 
+
+class _NullTimer(object):
     """
-    A Bill contains
+    Stands in for a timer or record while instrumentation is disabled.
     """
 
-    def __init__(self, is_alive=None, is_current=None, title=None, number=None,
-                 description=None, congress_session=None, introduced_date=None):
+    __slots__ = ()
 
-        """
-        Creates a new bill
+    def __enter__(self):
+        return self
 
-        :param is_alive: Denotes if the bill is alive
-        :type is_alive: str
-        :param is_current: Denotes if the bill is current
-        :type is_current: str
-        :param title: The title for the bill
-        :type title: str
-        :param number: The bill number
-        :type number: str
-        :param description: The description for the bill
-        :type description: str
-        :param congress_session: The congress session during which the bill was introduced
-        :type congress_session: str
-        :param introduced_date: The introduced date for the bill
-        :type introduced_date: str
+    def __exit__(self, *exc_info):
+        return False
 
-        :returns: Bill
-        """
 
-        self.is_alive = is_alive
-        self.is_current = is_current
-        self.title = title
-        self.number = number
-        self.description = description
-        self.congress_session = congress_session
-        self.introduced_date = introduced_date
+_NULL_TIMER = _NullTimer()
 
-    def __unicode__(self):
-        string = """ <Bill {0} Number: {1}> """
-        return string.format(self.title, self.number)
 
-    def __repr__(self):
-        string = self.__unicode__()
+class _Timer(object):
+    __slots__ = ('metrics', 'phase', 'start')
 
-        if not PYTHON_3:
-            return string.encode('utf-8')
+    def __init__(self, metrics, phase):
+        self.metrics = metrics
+        self.phase = phase
 
-        return string
+    def __enter__(self):
+        self.start = _clock()
+        return self
 
-    def __str__(self):
-        string = self.__unicode__()
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.phase, _clock() - self.start)
+        return False
 
-        if not PYTHON_3:
-            return string.encode('utf-8')
 
-        return string
+class _Measured(object):
+    __slots__ = ('metrics', 'started')
 
-    def _to_dict(self):
-        return dict(is_alive=self.is_alive,
-                    is_current=self.is_current,
-                    title=self.title,
-                    number=self.number,
-                    description=self.description,
-                    congress_session=self.congress_session,
-                    introduced_date=self.introduced_date)
+    def __init__(self, metrics, url):
+        self.metrics = metrics
+        self.started = metrics.begin(url)
 
-    @staticmethod
-    def _from_json(json_data):
-        """
-        Creates a Bill from json data.
+    def __enter__(self):
+        return self
 
-        :param json_data: The raw json data to parse
-        :type json_data: dict
-        :returns: PublicOfficial
-        """
+    def __exit__(self, exc_type, exc, traceback):
+        if self.started:
+            self.metrics.end(exc)
+        return False
 
-        try:
-            bill = Bill(is_alive=json_data['is_alive'],
-                            is_current=json_data['is_current'],
-                            title=json_data['title'],
-                            number=json_data['number'],
-                            description=json_data['current_status_description'],
-                            congress_session=json_data['congress'],
-                            introduced_date=json_data['introduced_date'])
 
+def _timed(phase):
+    """
+    Internal method to time a phase of the current call.
 
-            return bill
+    :param str phase: the phase, e.g. "parse"
+    :returns: a context manager
+    """
+    metrics = _METRICS
+    if metrics is None:
+        return _NULL_TIMER
+    return _Timer(metrics, phase)
 
-        except KeyError:
-            raise GovTrackException("The given information was incomplete.")
 
+def _measured(url):
+    """
+    Internal method to keep a record of one top-level call, for the
+    callbacks given to :ref:`enable_metrics`.
 
-class PublicOfficial(object):
+    :param str url: the url the call is for, or None if not known yet
+    :returns: a context manager
     """
-    A PublicOfficial contains
+    metrics = _METRICS
+    if metrics is None:
+        return _NULL_TIMER
+    return _Measured(metrics, url)
+
+
+def _count(name, amount=1):
     """
+    Internal method to add to an instrumentation counter.
+    """
+    metrics = _METRICS
+    if metrics is not None:
+        metrics.count(name, amount)
 
-    def __init__(self, website=None, start_date=None, end_date=None, state=None,
-                 title=None, name=None, leadership_title=None, district=None):
 
-        """
-        Creates a new PublicOfficial
+def enable_metrics(callback=None):
+    """
+    Start timing every phase of every request and counting bytes and cache
+    hits, misses and evictions. Any earlier measurements are discarded.
 
-        :param website: The Public Official's website
-        :type website: str
-        :param start_date: The Public Official's start date
-        :type start_date: str
-        :param end_date: The Public Official's end date
-        :type end_date: str
-        :param state: The Public Official's representing state
-        :type state: str
-        :param title: The Public Official's title
-        :type title: str
-        :param name: The Public Official's name
-        :type name: str
-        :param leadership_title: The Public Official's leadership title (Majority Whip, Minority Whip, etc.)
-        :type leadership_title: str
-        :param district: The Public Official's representing district
-        :type district: float
+    :param callback: called, if given, with a *dict* record of each finished
+                     call: its url, the seconds it took in total and in each
+                     phase, its counters, and the error it raised (if any)
+    :returns: void
+    """
+    global _METRICS
+    _METRICS = _Metrics([callback] if callback is not None else [])
 
-        :returns: PublicOfficial
-        """
-        self.website = website
-        self.start_date = start_date
-        self.end_date = end_date
-        self.state = state
-        self.title = title
-        self.name = name
-        self.leadership_title = leadership_title
-        self.district = district
 
-    def __unicode__(self):
-        string = """ <{0} Name: {1}> """
-        return string.format(self.title, self.name)
+def disable_metrics():
+    """
+    Stop collecting instrumentation (the default).
 
-    def __repr__(self):
-        string = self.__unicode__()
+    :returns: void
+    """
+    global _METRICS
+    _METRICS = None
 
-        if not PYTHON_3:
-            return string.encode('utf-8')
 
-        return string
+def get_metrics():
+    """
+    Report what has been measured since :ref:`enable_metrics`.
 
-    def __str__(self):
-        string = self.__unicode__()
+    :returns: a *dict* of "phases" (each with its count, total seconds and
+              longest seconds) and "counters"
+    """
+    metrics = _METRICS
+    if metrics is None:
+        return {'phases': OrderedDict(), 'counters': {}}
+    return metrics.snapshot()
 
-        if not PYTHON_3:
-            return string.encode('utf-8')
 
-        return string
+def export_metrics_prometheus():
+    """
+    Export what has been measured in the Prometheus text format.
 
-    def _to_dict(self):
-        return dict(website=self.website,
-                    start_date=self.start_date,
-                    end_date=self.end_date,
-                    state=self.state,
-                    title=self.title,
-                    name=self.name,
-                    leadership_title=self.leadership_title,
-                    district=self.district)
+    :returns: the *str* exposition
+    """
+    snapshot = get_metrics()
+    lines = ["# HELP govtrack_phase_seconds Time spent in each phase of a "
+             "request.",
+             "# TYPE govtrack_phase_seconds summary"]
+    for phase, stat in _iteritems(snapshot['phases']):
+        lines.append('govtrack_phase_seconds_sum{{phase="{}"}} {!r}'.format(
+            phase, stat['seconds']))
+        lines.append('govtrack_phase_seconds_count{{phase="{}"}} {}'.format(
+            phase, stat['count']))
+    for name, description in _iteritems(_COUNTERS):
+        metric = "govtrack_{}_total".format(name)
+        lines.append("# HELP {} {}".format(metric, description))
+        lines.append("# TYPE {} counter".format(metric))
+        lines.append("{} {}".format(metric,
+                                    snapshot['counters'].get(name, 0)))
+    return "\n".join(lines) + "\n"
 
-    @staticmethod
-    def _from_json(json_data):
-        """
-        Creates a PublicOfficial from json data.
 
-        :param json_data: The raw json data to parse
-        :type json_data: dict
-        :returns: PublicOfficial
-        """
+# Connection Pool
 
-        try:
-            leadership_title = "" if json_data['leadership_title'] is None else json_data['leadership_title']
-            district = "" if json_data['district'] is None else json_data['district']
-            official = PublicOfficial(website=json_data['website'],
-                                      start_date=json_data['startdate'],
-                                      end_date=json_data['enddate'],
-                                      state=json_data['state'],
-                                      title=json_data['title_long'],
-                                      name=json_data['person']['name'],
-                                      leadership_title=leadership_title,
-                                      district=district)
-
-            return official
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_ACCEPT_ENCODING = 'gzip, deflate'
+_READ_SIZE = 64 * 1024
 
-        except KeyError:
-            raise GovTrackException("The given information was incomplete.")
 
+def _read_body(response):
+    """
+    Internal method to read a response body, decompressing a gzip or
+    deflate Content-Encoding chunk by chunk as it streams in. Deflate bodies
+    are accepted with or without their zlib wrapper.
 
-# Service Methods
+    :param response: the HTTP response to read
+    :returns: the decompressed *bytes* body
+    """
+    encoding = (response.getheader('Content-Encoding') or '').strip().lower()
+    if encoding not in ('gzip', 'x-gzip', 'deflate'):
+        body = response.read()
+        _count('bytes_received', len(body))
+        return body
+    # 32 + MAX_WBITS accepts both gzip and zlib headers
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    chunks = []
+    # the chunks read before any output, kept to retry them as raw deflate
+    unread = []
+    while True:
+        chunk = response.read(_READ_SIZE)
+        if not chunk:
+            break
+        _count('bytes_received', len(chunk))
+        if unread is not None:
+            unread.append(chunk)
+        try:
+            output = decompressor.decompress(chunk)
+        except zlib.error:
+            if encoding != 'deflate' or unread is None:
+                raise
+            # some servers send deflate bodies without the zlib wrapper
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            output = decompressor.decompress(b''.join(unread))
+        if output:
+            unread = None
+        chunks.append(output)
+    chunks.append(decompressor.flush())
+    return b''.join(chunks)
 
 
-def _fetch_govtrack_info(params, element):
+class _ConnectionPool(object):
     """
-    Internal method to form and query the server
+    A bounded, thread-safe pool of persistent HTTP/1.1 connections.
 
-    :param dict params: the parameters to pass to the server
-    :returns: the JSON response object
+    Idle connections are kept per (scheme, host, port) and reused by later
+    requests, so only the first request to a host pays for the TCP and TLS
+    handshakes.
+
+    Like urllib, requests go through the proxies named by the environment
+    (`HTTP_PROXY`, `HTTPS_PROXY` and `NO_PROXY`): HTTPS requests are
+    tunnelled through the proxy, and HTTP requests are sent to it.
     """
-    from collections import OrderedDict
 
-    baseurl = 'https://www.govtrack.us/api/v2/'
+    def __init__(self, pool_size=4, idle_timeout=30.0, timeout=10.0):
+        """
+        Creates a new connection pool
+
+        :param pool_size: The most idle connections kept open for each host
+        :type pool_size: int
+        :param idle_timeout: Seconds an idle connection may sit in the pool
+                             before it is closed instead of reused
+        :type idle_timeout: float
+        :param timeout: The socket timeout, in seconds, for every connection
+        :type timeout: float
 
-    baseurl += element
-    ordered_dict = OrderedDict(sorted(_iteritems(params), key=lambda x:x[1], reverse=True))
-    query = _urlencode(baseurl, ordered_dict)
+        :returns: _ConnectionPool
+        """
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.proxies = getproxies()
+        self._idle = {}
+        self._lock = threading.Lock()
 
-    if PYTHON_3:
-        try:
-            result = _get(query) if _CONNECTED else _lookup(query)
-        except urllib.error.HTTPError:
-            raise GovTrackException("Make sure you entered a valid query")
-    else:
-        try:
-            result = _get(query) if _CONNECTED else _lookup(query)
-        except urllib2.HTTPError:
-            raise GovTrackException("Make sure you entered a valid query")
+    def _proxy_for(self, scheme, host):
+        """
+        Internal method to find the proxy that requests to *host* go
+        through.
 
-    if not result:
-        raise GovTrackException("There were no results")
+        :returns: a (split proxy url, Proxy-Authorization header or None)
+                  pair, or None to connect directly
+        """
+        proxy = self.proxies.get(scheme)
+        if not proxy or proxy_bypass(host):
+            return None
+        if '://' not in proxy:
+            proxy = 'http://' + proxy
+        proxy = urlsplit(proxy)
+        authorization = None
+        if proxy.username:
+            credentials = '{}:{}'.format(proxy.username, proxy.password or '')
+            authorization = 'Basic ' + base64.b64encode(
+                credentials.encode('utf-8')).decode('ascii')
+        return proxy, authorization
 
-    result = result.replace("// ", "")  # Remove Double Slashes
-    result = " ".join(result.split())  # Remove Misc 1+ Spaces, Tabs, and New Lines
+    def _new_connection(self, key, proxy=None):
+        scheme, host, port = key
+        if proxy is not None:
+            proxy, authorization = proxy
+            if scheme == 'https':
+                connection = httplib.HTTPSConnection(
+                    proxy.hostname, proxy.port or 80, timeout=self.timeout)
+                connection.set_tunnel(host, port, {} if authorization is None
+                                      else {'Proxy-Authorization':
+                                            authorization})
+                return connection
+            return httplib.HTTPConnection(proxy.hostname, proxy.port or 80,
+                                          timeout=self.timeout)
+        if scheme == 'https':
+            return httplib.HTTPSConnection(host, port, timeout=self.timeout)
+        return httplib.HTTPConnection(host, port, timeout=self.timeout)
 
-    try:
-        if _CONNECTED and _EDITABLE:
-            _add_to_cache(query, result)
-        json_res = json.loads(result)
-    except ValueError:
-        raise GovTrackException("Internal Error")
+    def _acquire(self, key, proxy=None):
+        """
+        Take the most recently used live connection for *key*, or open a new
+        one. Returns a (connection, reused) pair.
+        """
+        expired = []
+        connection = None
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    connection = candidate
+                    break
+                expired.append(candidate)
+        for stale in expired:
+            stale.close()
+        if connection is None:
+            return self._new_connection(key, proxy), False
+        return connection, True
+
+    def _release(self, key, connection):
+        """
+        Return *connection* to the pool, closing it if the pool is full.
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append((connection, time.time()))
+                return
+        connection.close()
 
-    return json_res
+    def evict_idle(self):
+        """
+        Close every pooled connection that has been idle for too long.
+        """
+        expired = []
+        now = time.time()
+        with self._lock:
+            for key, idle in _iteritems(self._idle):
+                fresh = [(c, t) for c, t in idle
+                         if now - t <= self.idle_timeout]
+                expired.extend(c for c, t in idle
+                               if now - t > self.idle_timeout)
+                self._idle[key] = fresh
+        for connection in expired:
+            connection.close()
 
+    def close(self):
+        """
+        Close every pooled connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                connection.close()
 
-def get_senators(query):
-    """
-    Forms and poses the query to get information from the database
-    :param query: the values to retrieve
-    :return: the JSON response
-    """
+    def request(self, url, headers=None, redirects=5):
+        """
+        Perform a GET request for *url*.
+
+        A request that fails on a reused connection (which the server may
+        have closed while it sat idle) is retried once on a fresh one.
+        Compressed responses are asked for, and decompressed as they are
+        read.
+
+        :param str url: the url to request
+        :param dict headers: the request headers
+        :param int redirects: how many redirects may still be followed
+        :returns: a (status, response headers, *bytes* body) tuple
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        headers = dict(headers or {})
+        headers.setdefault('Accept-Encoding', _ACCEPT_ENCODING)
+        proxy = self._proxy_for(parts.scheme, parts.hostname)
+        if proxy is not None and parts.scheme != 'https':
+            # A plain HTTP proxy is asked for the whole url
+            path = '{}://{}{}'.format(parts.scheme, parts.netloc, path)
+            if proxy[1] is not None:
+                headers['Proxy-Authorization'] = proxy[1]
+        while True:
+            connection, reused = self._acquire(key, proxy)
+            _count('http_requests')
+            try:
+                if not reused:
+                    with _timed('connect'):
+                        connection.connect()
+                with _timed('ttfb'):
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                with _timed('download'):
+                    body = _read_body(response)
+            except socket.timeout as e:
+                connection.close()
+                raise _URLError(e)
+            except (httplib.HTTPException, socket.error, zlib.error) as e:
+                connection.close()
+                if reused:
+                    continue
+                raise _URLError(e)
+            break
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        status = response.status
+        if status in _REDIRECT_CODES and redirects > 0:
+            location = response.getheader('Location')
+            if location:
+                return self.request(urljoin(url, location), headers,
+                                    redirects - 1)
+        if status >= 400:
+            raise _HTTPError(url, status, response.reason, response.msg, None)
+        return status, response.msg, body
 
-    if not isinstance(query, str):
-        raise GovTrackException("Please enter a valid query")
+    def urlopen(self, url, headers=None):
+        """
+        Perform a GET request for *url* and return the raw response body.
 
-    q = {'role_type': "senator",
-         'current': "True",
-         'party': query}
+        :param str url: the url to request
+        :param dict headers: the request headers
+        :returns: the *bytes* response body
+        """
+        return self.request(url, headers)[2]
 
-    json_res = _fetch_govtrack_info(q, "role")
-    json_list = json_res['objects']
 
-    senators = []
-    for json_dict in json_list:
-        senator = PublicOfficial._from_json(json_dict)
-        senators.append(senator._to_dict())
+# Rate Limiting
 
-    return senators
+_THROTTLE_CODES = (429, 503)
+_clock = getattr(time, 'monotonic', time.time)
 
 
-def get_representatives(query):
+def _retry_after(headers):
     """
-    Forms and poses the query to get information from the database
-    :param query: the values to retrieve
-    :return: the JSON response
+    Internal method to read a Retry-After header, given either in seconds
+    or as an HTTP date.
+
+    :param headers: the response headers
+    :returns: the *float* seconds to wait, or None if not given
     """
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0.0, mktime_tz(parsed) - time.time())
 
-    if not isinstance(query, str):
-        raise GovTrackException("Please enter a valid query")
 
-    q = {'role_type': "representative",
-         'current': "True",
-         'party': query}
+class _RateLimiter(object):
+    """
+    Paces, bounds and retries the requests sent to the server, shared by
+    every thread (and so every async task).
 
-    json_res = _fetch_govtrack_info(q, "role")
-    json_list = json_res['objects']
+    A token bucket refilled at *rate* requests a second, holding up to
+    *burst* tokens, spaces requests out (no pacing if *rate* is None). The
+    number of requests in flight adapts AIMD-style: the limit grows by one
+    for every limit-many successful requests and halves, at most once per
+    window of requests, whenever the server throttles with a 429 or 503.
+    A throttled request pauses every request for as long as its
+    Retry-After asks (but no longer than *max_backoff*), then is retried
+    after a jittered exponential backoff.
+    """
 
-    reps = []
-    for json_dict in json_list:
-        rep = PublicOfficial._from_json(json_dict)
-        reps.append(rep._to_dict())
+    def __init__(self, rate=None, burst=10, min_concurrency=1,
+                 max_concurrency=32, initial_concurrency=8, max_retries=5,
+                 backoff=0.5, max_backoff=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max(min_concurrency,
+                                     min(max_concurrency,
+                                         initial_concurrency)))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self._tokens = float(burst)
+        self._refilled = _clock()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        # Bumped on every decrease, so one burst of throttled requests
+        # only halves the limit once
+        self._window = 0
+        self._condition = threading.Condition()
 
-    return reps
+    def acquire(self):
+        """
+        Wait for a token and a free slot.
 
+        :returns: a ticket to hand back to :ref:`release`
+        """
+        with self._condition:
+            while True:
+                now = _clock()
+                if now < self._paused_until:
+                    self._condition.wait(self._paused_until - now)
+                    continue
+                if self._in_flight >= int(self.concurrency):
+                    self._condition.wait()
+                    continue
+                if self.rate:
+                    self._tokens = min(self.burst, self._tokens +
+                                       (now - self._refilled) * self.rate)
+                    self._refilled = now
+                    if self._tokens < 1:
+                        self._condition.wait((1 - self._tokens) / self.rate)
+                        continue
+                    self._tokens -= 1
+                break
+            self._in_flight += 1
+            self.requests += 1
+            return self._window
 
-def get_bills_by_keyword(query):
-    """
-   Forms and poses the query to get information from the database
-   :param query: the values to retrieve
-   :return: list of bills
-   """
+    def release(self, ticket, succeeded=True, throttled=False,
+                retry_after=None):
+        """
+        Free the slot taken by :ref:`acquire` and adapt the concurrency
+        limit to how the request went.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                if ticket == self._window:
+                    self._window += 1
+                    self.concurrency = max(self.min_concurrency,
+                                           self.concurrency / 2)
+                if retry_after:
+                    # A longer wait is given up on, not imposed on everyone
+                    self._paused_until = max(
+                        self._paused_until,
+                        _clock() + min(retry_after, self.max_backoff))
+            elif succeeded:
+                self.concurrency = min(self.max_concurrency,
+                                       self.concurrency + 1 / self.concurrency)
+            self._condition.notify_all()
+
+    def delay(self, attempt, retry_after=None):
+        """
+        :returns: the seconds to wait before retry number *attempt*
+        """
+        backoff = min(self.max_backoff, self.backoff * 2 ** attempt)
+        delay = random.uniform(backoff / 2, backoff)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def request(self, pool, url, headers=None):
+        """
+        Send a request through *pool*, retrying it while the server
+        throttles. It is given up on (raising the last HTTP error) after
+        *max_retries* retries, or straight away if the server asks for a
+        longer wait than *max_backoff*.
+
+        :returns: the (status, headers, body) of the response
+        """
+        attempt = 0
+        while True:
+            ticket = self.acquire()
+            try:
+                result = pool.request(url, headers)
+            except _HTTPError as e:
+                if e.code not in _THROTTLE_CODES:
+                    self.release(ticket, succeeded=False)
+                    raise
+                retry_after = _retry_after(e.hdrs)
+                self.release(ticket, throttled=True, retry_after=retry_after)
+                if attempt >= self.max_retries or \
+                        (retry_after or 0) > self.max_backoff:
+                    raise
+            except Exception:
+                self.release(ticket, succeeded=False)
+                raise
+            else:
+                self.release(ticket)
+                return result
+            with self._condition:
+                self.retries += 1
+            time.sleep(self.delay(attempt, retry_after))
+            attempt += 1
+
+    def stats(self):
+        """
+        :returns: a *dict* of the current limit and request counts
+        """
+        with self._condition:
+            return {'concurrency': int(self.concurrency),
+                    'in_flight': self._in_flight,
+                    'requests': self.requests,
+                    'throttled': self.throttled,
+                    'retries': self.retries}
 
-    if not isinstance(query, str):
-        raise GovTrackException("Please enter a valid query")
 
-    q = {'q': query}
-    json_res = _fetch_govtrack_info(q, "bill")
-    json_list = json_res['objects']
+_LIMITER = _RateLimiter()
+
+
+def configure_rate_limit(rate=None, burst=10, min_concurrency=1,
+                         max_concurrency=32, initial_concurrency=8,
+                         max_retries=5, backoff=0.5, max_backoff=60.0):
+    """
+    Replace the rate limiter shared by every request to the online data
+    source.
+
+    :param float rate: the most requests a second, or None for no pacing
+    :param int burst: how many requests may be sent at once after a lull
+    :param int min_concurrency: the lowest the concurrency limit may fall
+    :param int max_concurrency: the highest the concurrency limit may grow
+    :param int initial_concurrency: the concurrency limit to start from
+    :param int max_retries: how many times a throttled request is retried
+    :param float backoff: the first retry delay, in seconds; it doubles on
+                          every retry
+    :param float max_backoff: the longest delay, in seconds; a server
+                              asking for longer is not retried
+    :returns: void
+    """
+    global _LIMITER
+    _LIMITER = _RateLimiter(rate, burst, min_concurrency, max_concurrency,
+                            initial_concurrency, max_retries, backoff,
+                            max_backoff)
+
+
+def get_rate_limit_stats():
+    """
+    Report how the rate limiter is doing.
+
+    :returns: a *dict* with the current concurrency limit, the requests in
+              flight, and how many requests were sent, throttled and
+              retried
+    """
+    return _LIMITER.stats()
+
+
+# Response Cache
+
+class _CachedResponse(object):
+    """
+    A response body remembered by the response cache, together with the
+    validators needed to revalidate it once it expires.
+    """
+
+    __slots__ = ('body', 'etag', 'last_modified', 'expires', 'size')
+
+    def __init__(self, body, etag, last_modified, expires):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self.size = len(body)
+
+    def is_fresh(self):
+        return time.time() < self.expires
+
+    def validators(self):
+        """
+        :returns: the conditional request headers for this response
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class _ResponseCache(object):
+    """
+    A bounded, thread-safe, least-recently-used cache of live responses.
+
+    Each response lives for the time-to-live of its endpoint. Expired
+    responses that carry an ETag or Last-Modified validator are kept, so
+    that they can be revalidated with a cheap 304 instead of being fetched
+    again; expired responses without validators are dropped when they are
+    next looked up. The least recently used responses are evicted once
+    either the entry or the byte budget is exceeded, so every operation
+    takes constant time.
+    """
+
+    def __init__(self, ttls=None, default_ttl=60.0, max_entries=256,
+                 max_bytes=32 * 1024 * 1024, enabled=True):
+        """
+        Creates a new response cache
+
+        :param ttls: Seconds a response stays fresh, per endpoint (the first
+                     path segment after the API root, e.g. "role" or "bill")
+        :type ttls: dict
+        :param default_ttl: Seconds a response stays fresh for any other
+                            endpoint
+        :type default_ttl: float
+        :param max_entries: The most responses kept
+        :type max_entries: int
+        :param max_bytes: The most response bytes kept
+        :type max_bytes: int
+        :param enabled: Whether responses are cached at all
+        :type enabled: bool
+
+        :returns: _ResponseCache
+        """
+        self.ttls = dict(_RESPONSE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl(self, url):
+        """
+        :returns: the time-to-live, in seconds, of responses for *url*
+        """
+        return self.ttls.get(_key_endpoint(url), self.default_ttl)
+
+    def get(self, url):
+        """
+        :returns: the cached response for *url*, fresh or not, or None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            if entry.expires <= time.time() and not entry.etag and \
+                    not entry.last_modified:
+                # Nothing to revalidate it with
+                del self._entries[url]
+                self.size -= entry.size
+                _count('response_cache_evictions')
+                return None
+            if PYTHON_3:
+                self._entries.move_to_end(url)
+            else:
+                self._entries[url] = self._entries.pop(url)
+            return entry
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Remember *body* as the response for *url*, evicting the least
+        recently used responses to stay within budget.
+        """
+        if not self.enabled:
+            return
+        entry = _CachedResponse(body, etag, last_modified,
+                                time.time() + self.ttl(url))
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old is not None:
+                self.size -= old.size
+            self._entries[url] = entry
+            self.size += entry.size
+            self._evict()
+
+    def revalidated(self, url, entry):
+        """
+        Mark *entry* as fresh again after the server answered 304.
+        """
+        entry.expires = time.time() + self.ttl(url)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 self.size > self.max_bytes):
+            url, entry = self._entries.popitem(last=False)
+            self.size -= entry.size
+            _count('response_cache_evictions')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_RESPONSE_TTLS = {'role': 3600.0, 'bill': 300.0}
+
+
+# Request Coalescing
+
+class _Flight(object):
+    """
+    One in-flight call that other callers of the same key are waiting on.
+    """
+
+    __slots__ = ('done', 'result', 'error', 'waiting')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiting = 0
+
+
+class _SingleFlight(object):
+    """
+    Coalesces concurrent calls that share a key: the first caller (the
+    leader) runs the call, and everyone who asks for the same key while it
+    is running waits for it. The leader's exception is shared, while each
+    waiting caller gets its own copy of the result, as the asynchronous
+    calls do (see :ref:`_copied`).
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        """
+        Call *function* with *args*, unless a call for *key* is already in
+        flight, in which case wait for that call instead.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+                flight.waiting += 1
+        if leader:
+            try:
+                flight.result = function(*args)
+            except Exception as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            if flight.error is not None:
+                raise flight.error
+            # The waiting callers copy the result while the leader uses it
+            if flight.waiting:
+                return copy.deepcopy(flight.result)
+            return flight.result
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.result)
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.leaders + self.coalesced,
+                    'coalesced': self.coalesced,
+                    'in_flight': len(self._flights)}
+
+
+def _recursively_convert_unicode_to_str(input):
+    """
+    Force the given input to only use `str` instead of `bytes` or `unicode`.
+
+    This works even if the input is a dict, list, or a string. Text is
+    reduced to ASCII, with "?" for any other character, so both Python
+    versions give the same `str`. Compressed cache responses are left alone.
+    Anything else, such as numbers, booleans and None, is kept as is.
+
+    :params input: The bytes/unicode input
+    :returns str: The input converted to a `str`
+    """
+    if isinstance(input, _CompressedResponse):
+        return input
+    elif isinstance(input, dict):
+        return {_recursively_convert_unicode_to_str(
+            key): _recursively_convert_unicode_to_str(value) for key, value in
+                input.items()}
+    elif isinstance(input, list):
+        return [_recursively_convert_unicode_to_str(element) for element in
+                input]
+    elif not PYTHON_3 and isinstance(input, unicode):
+        return input.encode('ascii', 'replace')
+    elif PYTHON_3 and isinstance(input, str):
+        if input.isascii():
+            return input
+        return str(input.encode('ascii', 'replace').decode('ascii'))
+    else:
+        return input
+
+
+# Cache
+
+_COMPRESSION_LEVEL = 6
+_TEXT_TYPE = str if PYTHON_3 else unicode
+
+
+class _CompressedResponse(bytes):
+    """
+    A recorded response held zlib-compressed, in memory and on disk. It is
+    only decompressed when :ref:`_lookup` hands it out. Every response
+    recorded while editing is held this way, as are those read from SQLite
+    stores and snapshots; responses loaded from a JSON cache file stay the
+    plain text they were read as.
+    """
+
+    __slots__ = ()
+
+
+def _compress_response(value):
+    """
+    Internal method to compress a recorded response.
+
+    :param value: the *str* response (or its UTF-8 *bytes*)
+    :returns: the :ref:`_CompressedResponse`
+    """
+    if isinstance(value, _CompressedResponse):
+        return value
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return _CompressedResponse(zlib.compress(value, _COMPRESSION_LEVEL))
+
+
+def _decompress_response(value):
+    """
+    Internal method to get back the text of a recorded response.
+
+    :param value: the response, compressed or not
+    :returns: the *str* response
+    """
+    if isinstance(value, _CompressedResponse):
+        value = zlib.decompress(value)
+        if PYTHON_3:
+            value = value.decode('utf-8')
+    return value
+
+
+class _MemoryCacheStore(object):
+    """
+    A cache store that holds every entry in a dict, as loaded from (and
+    saved to) a JSON cache file. Responses loaded from the file are kept as
+    plain text, since compressing them all would slow loading down several
+    times over; responses recorded afterwards are kept compressed.
+
+    Every cache store maps a url to a list whose first item is the replay
+    pattern and whose remaining items are the recorded responses, and
+    offers the same small set of methods, so that other stores can be
+    plugged in with :ref:`set_cache_store`.
+    """
+
+    def __init__(self, data=None):
+        self._data = {} if data is None else data
+
+    def get(self, key):
+        """
+        :returns: the [pattern, response, ...] list for *key*, or None
+        """
+        return self._data.get(key)
+
+    def add(self, key, value, pattern):
+        """
+        Record *value* as the next response for *key*, creating the entry
+        with *pattern* if it is new.
+        """
+        if key in self._data:
+            self._data[key].append(value)
+        else:
+            self._data[key] = [pattern, value]
+
+    def remove(self, key):
+        self._data.pop(key, None)
+
+    def keys(self):
+        return list(self._data.keys())
+
+    def items(self):
+        return list(self._data.items())
+
+    def save(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteCacheStore(object):
+    """
+    A cache store kept in a SQLite database, with every response stored
+    compressed.
+
+    Opening the store reads nothing; each entry is loaded from disk the first
+    time it is looked up and kept in memory afterwards, so start-up cost and
+    memory use no longer grow with the size of the cache.
+    """
+
+    def __init__(self, filename):
+        """
+        Opens (creating if necessary) a SQLite cache store
+
+        :param filename: The location of the database file
+        :type filename: str
+
+        :returns: SqliteCacheStore
+        """
+        self.filename = filename
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache "
+                         "(key TEXT PRIMARY KEY, pattern TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                         "(key TEXT NOT NULL, position INTEGER NOT NULL, "
+                         "value TEXT NOT NULL, PRIMARY KEY (key, position))")
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._loaded:
+                return self._loaded[key]
+            row = self._db.execute("SELECT pattern FROM cache WHERE key = ?",
+                                   (key,)).fetchone()
+            if row is None:
+                return None
+            values = [value if isinstance(value, _TEXT_TYPE) else
+                      _CompressedResponse(bytes(value))
+                      for value, in self._db.execute(
+                          "SELECT value FROM responses WHERE key = ? "
+                          "ORDER BY position", (key,))]
+            entry = _recursively_convert_unicode_to_str([row[0]] + values)
+            self._loaded[key] = entry
+            return entry
+
+    def add(self, key, value, pattern):
+        value = _compress_response(value)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if not row[0]:
+                self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)",
+                                 (key, pattern))
+            self._db.execute("INSERT INTO responses VALUES (?, ?, ?)",
+                             (key, row[0], sqlite3.Binary(value)))
+            if key in self._loaded:
+                self._loaded[key].append(value)
+
+    def remove(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._loaded.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return [key for key, in self._db.execute("SELECT key FROM cache")]
+
+    def items(self):
+        return [(key, self.get(key)) for key in self.keys()]
+
+    def save(self):
+        with self._lock:
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class SharedCacheStore(object):
+    """
+    A cache store that every process on a host can use at once: a SQLite
+    database in write-ahead-log mode.
+
+    Each write is its own transaction, taken with SQLite's cross-process
+    write lock and committed at once, so the other processes see it as soon
+    as it returns. Reads take no lock at all: they read a consistent
+    snapshot of the database while writers carry on. Nothing is copied into
+    the process's memory beyond the entry being read, so any number of
+    workers share the operating system's cached pages of one file.
+
+    Each operation borrows a connection from a small pool and returns it
+    when done, so short-lived threads leave no connections behind.
+
+    Besides replaying recorded responses like the other stores, a shared
+    store can hold the live responses of every worker (see
+    :ref:`share_responses`).
+    """
+
+    def __init__(self, filename, timeout=30.0, pool_size=4):
+        """
+        Opens (creating if necessary) a shared cache store
+
+        :param filename: The location of the database file
+        :type filename: str
+        :param timeout: Seconds a write waits for another process's write
+        :type timeout: float
+        :param pool_size: The most idle connections kept open
+        :type pool_size: int
+
+        :returns: SharedCacheStore
+        """
+        self.filename = filename
+        self.timeout = timeout
+        self.pool_size = pool_size
+        # (pid, connection) pairs ready to be borrowed
+        self._idle = []
+        self._lock = threading.Lock()
+        self._read(lambda db: db.execute("PRAGMA journal_mode=WAL"))
+        self._write(lambda db: (
+            db.execute("CREATE TABLE IF NOT EXISTS cache "
+                       "(key TEXT PRIMARY KEY, pattern TEXT NOT NULL, "
+                       "stored_at REAL NOT NULL)"),
+            db.execute("CREATE TABLE IF NOT EXISTS responses "
+                       "(key TEXT NOT NULL, position INTEGER NOT NULL, "
+                       "value BLOB NOT NULL, PRIMARY KEY (key, position))")))
+
+    def _acquire(self):
+        """
+        Internal method to borrow an idle connection, or open a new one.
+        Connections are used by one thread at a time, and never by a forked
+        process.
+        """
+        pid = os.getpid()
+        with self._lock:
+            while self._idle:
+                owner, db = self._idle.pop()
+                # A forked process leaves its parent's connections alone
+                if owner == pid:
+                    return db
+        db = sqlite3.connect(self.filename, timeout=self.timeout,
+                             isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _release(self, db):
+        """
+        Internal method to return a borrowed connection, closing it if the
+        pool already holds enough idle ones.
+        """
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((os.getpid(), db))
+                return
+        db.close()
+
+    def _read(self, query):
+        """
+        Internal method to run *query* (a function of the connection) on a
+        borrowed connection.
+        """
+        db = self._acquire()
+        try:
+            return query(db)
+        finally:
+            self._release(db)
+
+    def _write(self, statements):
+        """
+        Internal method to run *statements* (a function of the connection)
+        as one transaction, holding the database's write lock.
+        """
+        def transaction(db):
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+        return self._read(transaction)
+
+    def get(self, key):
+        rows = self._read(lambda db: db.execute(
+            "SELECT cache.pattern, responses.value FROM cache "
+            "LEFT JOIN responses ON responses.key = cache.key "
+            "WHERE cache.key = ? ORDER BY responses.position",
+            (key,)).fetchall())
+        if not rows:
+            return None
+        return _recursively_convert_unicode_to_str([rows[0][0]]) + [
+            _CompressedResponse(bytes(value))
+            for pattern, value in rows if value is not None]
+
+    def get_fresh(self, key, max_age):
+        """
+        Get the newest response for *key* if it was stored at most *max_age*
+        seconds ago.
+
+        :returns: the *bytes* response, or None
+        """
+        row = self._read(lambda db: db.execute(
+            "SELECT responses.value FROM cache JOIN responses "
+            "ON responses.key = cache.key "
+            "WHERE cache.key = ? AND cache.stored_at >= ? "
+            "ORDER BY responses.position DESC LIMIT 1",
+            (key, time.time() - max_age)).fetchone())
+        if row is None:
+            return None
+        return zlib.decompress(bytes(row[0]))
+
+    def add(self, key, value, pattern):
+        value = sqlite3.Binary(_compress_response(value))
+
+        def add(db):
+            count = db.execute("SELECT COUNT(*) FROM responses WHERE key = ?",
+                               (key,)).fetchone()[0]
+            if not count:
+                db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                           (key, pattern, time.time()))
+            else:
+                db.execute("UPDATE cache SET stored_at = ? WHERE key = ?",
+                           (time.time(), key))
+            db.execute("INSERT INTO responses VALUES (?, ?, ?)",
+                       (key, count, value))
+        self._write(add)
+
+    def put(self, key, value):
+        """
+        Replace every response for *key* with *value*, which every process
+        then sees as fresh.
+
+        :returns: void
+        """
+        value = sqlite3.Binary(_compress_response(value))
+
+        def put(db):
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                       (key, "repeat", time.time()))
+            db.execute("INSERT INTO responses VALUES (?, 0, ?)", (key, value))
+        self._write(put)
+
+    def remove(self, key):
+        self._write(lambda db: (
+            db.execute("DELETE FROM cache WHERE key = ?", (key,)),
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))))
+
+    def keys(self):
+        return [key for key, in self._read(lambda db: db.execute(
+            "SELECT key FROM cache").fetchall())]
+
+    def items(self):
+        return [(key, self.get(key)) for key in self.keys()]
+
+    def save(self):
+        # Every write is already committed; fold the log into the database
+        self._read(lambda db: db.execute("PRAGMA wal_checkpoint(PASSIVE)"))
+
+    def close(self):
+        pid = os.getpid()
+        with self._lock:
+            connections, self._idle = self._idle, []
+        for owner, db in connections:
+            # A forked process leaves its parent's connections alone
+            if owner == pid:
+                db.close()
+
+    def __contains__(self, key):
+        return self._read(lambda db: db.execute(
+            "SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()) is not None
+
+    def __len__(self):
+        return self._read(lambda db: db.execute(
+            "SELECT COUNT(*) FROM cache").fetchone()[0])
+
+
+_SNAPSHOT_MAGIC = b"GTSNAP03"
+_SNAPSHOT_MAGIC_V1 = b"GTSNAP01"
+_SNAPSHOT_MAGICS = (_SNAPSHOT_MAGIC, b"GTSNAP02", _SNAPSHOT_MAGIC_V1)
+_SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+_replace_file = getattr(os, 'replace', os.rename)
+_SHARED_SUFFIX = '.shared'
+
+
+class SnapshotCacheStore(object):
+    """
+    A cache store kept in a compact binary snapshot file plus an append-only
+    journal of everything recorded since the snapshot was written.
+
+    The snapshot holds every recorded response zlib-compressed, followed by
+    an index of where each url's responses are. Opening the store memory-maps
+    the snapshot and reads only the index and the journal; a url's responses
+    are decoded (and converted to `str`) the first time it is looked up, so
+    time-to-first-query does not depend on the size of the cache.
+
+    Each new response is appended to the journal as it is recorded, so
+    :ref:`save` only has to flush what is new. :ref:`compact` folds the
+    journal into a fresh snapshot, either on demand or in the background
+    once the journal grows past *compact_threshold* bytes. Every journal
+    record carries a sequence number, and the snapshot remembers the last
+    one it includes, so a crash at any point loses nothing and replays
+    nothing twice.
+    """
+
+    def __init__(self, filename, compact_threshold=64 * 1024 * 1024):
+        """
+        Opens (creating if necessary) a cache snapshot and its journal
+
+        :param filename: The location of the snapshot file; the journal is
+                         kept next to it with a ".journal" suffix
+        :type filename: str
+        :param compact_threshold: Journal size, in bytes, that triggers a
+                                  background compaction (None to only
+                                  compact on demand)
+        :type compact_threshold: int
+
+        :returns: SnapshotCacheStore
+        """
+        self.filename = filename
+        self.journal_filename = filename + '.journal'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._loaded = {}
+        self._map = None
+        self._index = {}
+        self._pending = {}
+        self._removed = {}
+        self._sequence = 0
+        self._snapshot_sequence = 0
+        self._compaction = None
+        self._compaction_lock = threading.Lock()
+        if os.path.exists(filename):
+            self._open_snapshot()
+        self._replay_journal()
+        self._journal = open(self.journal_filename, 'ab')
+
+    def _open_snapshot(self):
+        """
+        Internal method to memory-map the snapshot and read its index.
+        """
+        try:
+            with open(self.filename, 'rb') as f:
+                snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, IOError, ValueError) as e:
+            raise GovTrackException(
+                "The cache file '{}' is not a cache snapshot.".format(
+                    self.filename))
+        try:
+            magic, index_offset, index_length = \
+                _SNAPSHOT_HEADER.unpack_from(snapshot, 0)
+        except struct.error:
+            magic = None
+        if magic not in _SNAPSHOT_MAGICS:
+            snapshot.close()
+            raise GovTrackException(
+                "The cache file '{}' is not a cache snapshot.".format(
+                    self.filename))
+        index = json.loads(
+            snapshot[index_offset:index_offset + index_length].decode('utf-8'))
+        if magic == _SNAPSHOT_MAGIC_V1:
+            index = {'sequence': 0, 'entries': index}
+        old_map, self._map = self._map, snapshot
+        self._index = index['entries']
+        self._sequence = max(self._sequence, index['sequence'])
+        self._snapshot_sequence = index['sequence']
+        if old_map is not None:
+            old_map.close()
+
+    def _replay_journal(self):
+        """
+        Internal method to apply the journal records the snapshot does not
+        include yet. A torn record at the end (from a crash mid-write) is
+        ignored.
+        """
+        self._journal_size = 0
+        if not os.path.exists(self.journal_filename):
+            return
+        with open(self.journal_filename, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                    sequence, key, pattern, value = record[:4]
+                    if record[4:] and record[4]:
+                        value = _CompressedResponse(base64.b64decode(value))
+                except (ValueError, TypeError):
+                    break
+                self._journal_size += len(line)
+                if sequence > self._snapshot_sequence:
+                    self._apply(sequence, key, pattern, value)
+
+    def _apply(self, sequence, key, pattern, value):
+        """
+        Internal method to apply one journal record: a response to add, or
+        (with a None *pattern*) a url to remove.
+        """
+        self._sequence = max(self._sequence, sequence)
+        self._loaded.pop(key, None)
+        if pattern is None:
+            self._index.pop(key, None)
+            self._pending.pop(key, None)
+            self._removed[key] = sequence
+        elif key in self._pending:
+            self._pending[key].append((sequence, value))
+        else:
+            self._pending[key] = [pattern, (sequence, value)]
+
+    def _raw_entry(self, key):
+        """
+        Internal method to get the [pattern, response, ...] list for *key*
+        as stored, with responses from the snapshot left as *bytes*.
+        """
+        return _snapshot_entry(self._map, self._index, self._pending, key)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._loaded:
+                return self._loaded[key]
+            entry = self._raw_entry(key)
+            if entry is None:
+                return None
+            entry = [value.decode('utf-8') if isinstance(value, bytes) and
+                     not isinstance(value, _CompressedResponse) else value
+                     for value in entry]
+            self._loaded[key] = entry
+            return entry
+
+    def _append(self, key, pattern, value):
+        """
+        Internal method to journal and apply one record.
+        """
+        self._sequence += 1
+        if isinstance(value, _CompressedResponse):
+            record = [self._sequence, key, pattern,
+                      base64.b64encode(value).decode('ascii'), 1]
+        else:
+            record = [self._sequence, key, pattern, value]
+        line = json.dumps(record).encode('utf-8') + b'\n'
+        self._journal.write(line)
+        self._journal.flush()
+        self._journal_size += len(line)
+        self._apply(self._sequence, key, pattern, value)
+        if (self.compact_threshold is not None and
+                self._journal_size > self.compact_threshold and
+                self._compaction is None):
+            self.compact(wait=False)
+
+    def add(self, key, value, pattern):
+        value = _compress_response(value)
+        with self._lock:
+            self._append(key, pattern, value)
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._index or key in self._pending:
+                self._append(key, None, None)
+
+    def keys(self):
+        with self._lock:
+            return list(set(self._index) | set(self._pending))
+
+    def items(self):
+        return [(key, self.get(key)) for key in self.keys()]
+
+    def save(self):
+        """
+        Make every recorded response durable. Only the journal, which holds
+        just the responses recorded since the last compaction, is synced.
+        """
+        with self._lock:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def compact(self, wait=True):
+        """
+        Fold the journal into a fresh snapshot. The snapshot is written to a
+        temporary file and renamed into place, then the journal is trimmed
+        to the records that arrived while the snapshot was being written.
+
+        :param bool wait: compact now, or on a background thread
+        :returns: the background thread, if *wait* is False
+        """
+        if not wait:
+            with self._lock:
+                if self._compaction is None:
+                    self._compaction = threading.Thread(target=self.compact)
+                    self._compaction.daemon = True
+                    self._compaction.start()
+                return self._compaction
+        with self._compaction_lock:
+            try:
+                self._compact()
+            finally:
+                with self._lock:
+                    if self._compaction is threading.current_thread():
+                        self._compaction = None
+
+    def _compact(self):
+        """
+        Internal method to write the snapshot from a consistent view of the
+        store, without holding the lock while the file is written.
+        """
+        with self._lock:
+            self._journal.flush()
+            sequence = self._sequence
+            journal_offset = self._journal.tell()
+            snapshot = self._map
+            index = dict(self._index)
+            pending = dict((key, list(records)) for key, records in
+                           _iteritems(self._pending))
+        entries = ((key, _snapshot_entry(snapshot, index, pending, key))
+                   for key in set(index) | set(pending))
+        _write_snapshot(self.filename, entries, sequence)
+        with self._lock:
+            self._trim_journal(journal_offset)
+            self._open_snapshot()
+            removed = dict((key, seq) for key, seq in
+                           _iteritems(self._removed) if seq > sequence)
+            for key in removed:
+                self._index.pop(key, None)
+            self._removed = removed
+            for key, pending in list(_iteritems(self._pending)):
+                newer = [record for record in pending[1:]
+                         if record[0] > sequence]
+                if newer:
+                    self._pending[key] = [pending[0]] + newer
+                else:
+                    del self._pending[key]
+
+    def _trim_journal(self, offset):
+        """
+        Internal method to drop the first *offset* bytes of the journal,
+        which the new snapshot already includes.
+        """
+        self._journal.close()
+        with open(self.journal_filename, 'rb') as f:
+            f.seek(offset)
+            remainder = f.read()
+        temporary = self.journal_filename + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(remainder)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace_file(temporary, self.journal_filename)
+        self._journal = open(self.journal_filename, 'ab')
+        self._journal_size = len(remainder)
+
+    def close(self):
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._index or key in self._pending
+
+    def __len__(self):
+        return len(self.keys())
+
+
+def _snapshot_entry(snapshot, index, pending, key):
+    """
+    Internal method to assemble the [pattern, response, ...] list for *key*
+    from a memory-mapped snapshot, its index, and the journal records not
+    yet compacted into it. Responses are left compressed, or as *bytes* for
+    snapshots written before responses were compressed.
+
+    :returns: the entry, or None if *key* is not cached
+    """
+    location = index.get(key)
+    records = pending.get(key)
+    if location is None and records is None:
+        return None
+    if location is None:
+        entry = [records[0]]
+    else:
+        pattern, spans = location
+        entry = [pattern]
+        for span in spans:
+            value = snapshot[span[0]:span[0] + span[1]]
+            entry.append(_CompressedResponse(value) if span[2:] else value)
+    if records is not None:
+        entry.extend(value for sequence, value in records[1:])
+    return entry
+
+
+def _write_snapshot(filename, entries, sequence=0):
+    """
+    Internal method to write *entries* ((url, [pattern, response, ...])
+    pairs) as a cache snapshot. The snapshot is written to a temporary file
+    that then replaces *filename*, so readers never see a partial file.
+
+    :param str filename: the location of the snapshot
+    :param entries: the cache entries to write; responses may be *str*,
+                    UTF-8 *bytes* or already compressed
+    :param int sequence: the last journal record the snapshot includes
+    :returns: the number of urls written
+    """
+    index = {}
+    temporary = filename + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(b'\0' * _SNAPSHOT_HEADER.size)
+        offset = _SNAPSHOT_HEADER.size
+        for key, entry in entries:
+            spans = []
+            for value in entry[1:]:
+                value = _compress_response(value)
+                f.write(value)
+                spans.append((offset, len(value), 1))
+                offset += len(value)
+            index[key] = (entry[0], spans)
+        blob = json.dumps({'sequence': sequence,
+                           'entries': index}).encode('utf-8')
+        f.write(blob)
+        f.seek(0)
+        f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, offset, len(blob)))
+        f.flush()
+        os.fsync(f.fileno())
+    _replace_file(temporary, filename)
+    return len(index)
+
+
+def _replace_snapshot(filename, entries):
+    """
+    Internal method to write *entries* as a brand new cache snapshot,
+    discarding any journal left next to the old one.
+
+    :returns: the number of urls written
+    """
+    count = _write_snapshot(filename, entries)
+    if os.path.exists(filename + '.journal'):
+        os.remove(filename + '.journal')
+    return count
+
+
+def _load_json_cache(filename):
+    """
+    Internal method to read the entries of a JSON cache file exactly as they
+    were recorded. Anything that rewrites a cache reads it this way, so the
+    text of its responses is kept as is.
+
+    :param str filename: the JSON cache file to read
+    :returns: a *dict* of url -> entry
+    """
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)['data']
+    except (OSError, IOError) as e:
+        raise GovTrackException(
+            "The cache file '{}' was not found.".format(filename))
+
+
+def compile_cache_snapshot(json_filename, snapshot_filename):
+    """
+    Compile a JSON cache file into a cache snapshot, which
+    :ref:`disconnect` can open without reading the whole cache.
+
+    :param str json_filename: the JSON cache file to read
+    :param str snapshot_filename: the snapshot file to write
+    :returns: the number of urls compiled
+    """
+    data = _load_json_cache(json_filename)
+    return _replace_snapshot(snapshot_filename,
+                             _iteritems(_rekeyed(_iteritems(data))))
+
+
+def _open_cache_store(filename):
+    """
+    Internal method to open the cache store kept in *filename*: a JSON file
+    is read into memory, a ".snapshot" file is memory-mapped, a ".shared"
+    file is opened as a :ref:`SharedCacheStore`, and anything else is opened
+    as a SQLite store.
+
+    :param str filename: the location of the cache
+    :returns: the cache store
+    """
+    if filename.endswith('.json'):
+        return _MemoryCacheStore(_rekeyed(_iteritems(
+            _load_json_cache(filename))))
+    if not os.path.exists(filename):
+        raise GovTrackException(
+            "The cache file '{}' was not found.".format(filename))
+    if filename.endswith('.snapshot'):
+        return SnapshotCacheStore(filename)
+    if filename.endswith(_SHARED_SUFFIX):
+        return SharedCacheStore(filename)
+    return SqliteCacheStore(filename)
+
+
+def import_cache_json(json_filename, store_filename):
+    """
+    Copy every entry of a JSON cache file into a SQLite cache store, so that
+    it can be opened lazily with :ref:`disconnect`.
+
+    :param str json_filename: the JSON cache file to read
+    :param str store_filename: the SQLite cache store to write
+    :returns: the number of urls imported
+    """
+    data = _load_json_cache(json_filename)
+    store = SqliteCacheStore(store_filename)
+    try:
+        with store._lock:
+            for key, entry in _iteritems(_rekeyed(_iteritems(data))):
+                store._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)",
+                                  (key, entry[0]))
+                store._db.execute("DELETE FROM responses WHERE key = ?",
+                                  (key,))
+                store._db.executemany(
+                    "INSERT INTO responses VALUES (?, ?, ?)",
+                    [(key, position, sqlite3.Binary(_compress_response(value)))
+                     for position, value in enumerate(entry[1:])])
+    finally:
+        store.close()
+    return len(data)
+
+
+def migrate_cache(filename):
+    """
+    Move the responses of a cache recorded by an older version of this
+    library, which kept them under their full urls, under request keys.
+    Urls that asked for the same thing are merged into one key, so a query
+    replays whichever spelling of it was recorded.
+
+    :param str filename: the cache to migrate (.json, .snapshot, .shared, or
+                         a SQLite store)
+    :returns: a *tuple* of the number of entries before and after
+    """
+    if filename.endswith('.json'):
+        data = _load_json_cache(filename)
+        merged = _rekeyed(_iteritems(data))
+        _write_json_cache(filename, _iteritems(merged))
+        _remove_index(filename)
+        return len(data), len(merged)
+    store = _open_cache_store(filename)
+    try:
+        entries = list(store.items())
+        merged = _rekeyed(entries)
+        moved = set()
+        for key, entry in entries:
+            if _cache_key(key) != key:
+                store.remove(key)
+                moved.add(_cache_key(key))
+        for key in moved:
+            store.remove(key)
+            for value in merged[key][1:]:
+                store.add(key, value, merged[key][0])
+        store.save()
+        return len(entries), len(merged)
+    finally:
+        store.close()
+        _remove_index(filename)
+
+
+def _remove_index(filename):
+    """
+    Internal method to remove the offline bill index kept next to a cache,
+    once the cache has been rewritten under new keys.
+    """
+    if os.path.exists(filename + _INDEX_SUFFIX):
+        os.remove(filename + _INDEX_SUFFIX)
+
+
+def _write_json_cache(filename, entries):
+    """
+    Internal method to write cache entries to a JSON cache file, replacing
+    it atomically.
+
+    :param str filename: the JSON cache file
+    :param entries: the (key, entry) pairs to write
+    :returns: void
+    """
+    data = dict((key, [entry[0]] + [_decompress_response(value)
+                                    for value in entry[1:]])
+                for key, entry in entries)
+    temporary = filename + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({"data": data, "metadata": ""}, f)
+    _replace_file(temporary, filename)
+
+
+def _expand_response(value):
+    """
+    Internal method to decompress a recorded response, as :ref:`_lookup`
+    returns it. Its text is converted to `str` once it is decoded, exactly
+    as the text of a fresh response is (see :ref:`_converted_page`).
+    """
+    if isinstance(value, _CompressedResponse):
+        with _timed('convert'):
+            return _decompress_response(value)
+    return value
+
+
+# Exceptions
+
+class GovTrackException(Exception):
+    pass
+
+
+class GovTrackRateLimitException(GovTrackException):
+    """
+    Raised when the server still throttles a request after every retry.
+    *retry_after* is how many seconds it asked clients to wait, if it said.
+    """
+
+    def __init__(self, message, retry_after=None):
+        GovTrackException.__init__(self, message)
+        self.retry_after = retry_after
+
+
+# Domain Objects
+
+def _json_reader(paths):
+    """
+    Internal method to make a function reading several fields from a JSON
+    object at once. Nested fields are separated by a double underscore, as
+    in GovTrack's `fields` parameter. The top-level fields are read by one
+    `operator.itemgetter`, and only nested fields are walked further.
+
+    :param paths: two or more fields, e.g. ["state", "person__name"]
+    :returns: a function of a JSON object returning the fields' values, in
+              order
+    """
+    paths = [path.split('__') for path in paths]
+    read_top = operator.itemgetter(*[names[0] for names in paths])
+    nested = [(position, names[1:])
+              for position, names in enumerate(paths) if len(names) > 1]
+    if not nested:
+        return read_top
+
+    def read(json_data):
+        values = list(read_top(json_data))
+        for position, names in nested:
+            value = values[position]
+            for name in names:
+                value = value[name]
+            values[position] = value
+        return values
+    return read
+
+
+class Bill(object):
+
+    """
+    A Bill contains
+    """
+
+    __slots__ = ('is_alive', 'is_current', 'title', 'number', 'description',
+                 'congress_session', 'introduced_date')
+
+    # Attribute -> the GovTrack field it is read from
+    _FIELDS = OrderedDict([('is_alive', 'is_alive'),
+                           ('is_current', 'is_current'),
+                           ('title', 'title'),
+                           ('number', 'number'),
+                           ('description', 'current_status_description'),
+                           ('congress_session', 'congress'),
+                           ('introduced_date', 'introduced_date')])
+    # Reads the fields above, in the order __init__ takes them
+    _read = staticmethod(_json_reader(_FIELDS.values()))
+
+    def __init__(self, is_alive=None, is_current=None, title=None, number=None,
+                 description=None, congress_session=None, introduced_date=None):
+
+        """
+        Creates a new bill
+
+        :param is_alive: Denotes if the bill is alive
+        :type is_alive: str
+        :param is_current: Denotes if the bill is current
+        :type is_current: str
+        :param title: The title for the bill
+        :type title: str
+        :param number: The bill number
+        :type number: str
+        :param description: The description for the bill
+        :type description: str
+        :param congress_session: The congress session during which the bill was introduced
+        :type congress_session: str
+        :param introduced_date: The introduced date for the bill
+        :type introduced_date: str
+
+        :returns: Bill
+        """
+
+        self.is_alive = is_alive
+        self.is_current = is_current
+        self.title = title
+        self.number = number
+        self.description = description
+        self.congress_session = congress_session
+        self.introduced_date = introduced_date
+
+    def __unicode__(self):
+        string = """ <Bill {0} Number: {1}> """
+        return string.format(self.title, self.number)
+
+    def __repr__(self):
+        string = self.__unicode__()
+
+        if not PYTHON_3:
+            return string.encode('utf-8')
+
+        return string
+
+    def __str__(self):
+        string = self.__unicode__()
+
+        if not PYTHON_3:
+            return string.encode('utf-8')
+
+        return string
+
+    def _to_dict(self):
+        return dict(is_alive=self.is_alive,
+                    is_current=self.is_current,
+                    title=self.title,
+                    number=self.number,
+                    description=self.description,
+                    congress_session=self.congress_session,
+                    introduced_date=self.introduced_date)
+
+    @staticmethod
+    def _from_json(json_data):
+        """
+        Creates a Bill from json data.
+
+        :param json_data: The raw json data to parse
+        :type json_data: dict
+        :returns: PublicOfficial
+        """
+
+        try:
+            return Bill(*Bill._read(json_data))
+
+        except KeyError:
+            raise GovTrackException("The given information was incomplete.")
+
+
+class PublicOfficial(object):
+    """
+    A PublicOfficial contains
+    """
+
+    __slots__ = ('website', 'start_date', 'end_date', 'state', 'title', 'name',
+                 'leadership_title', 'district')
+
+    # Attribute -> the GovTrack field it is read from
+    _FIELDS = OrderedDict([('website', 'website'),
+                           ('start_date', 'startdate'),
+                           ('end_date', 'enddate'),
+                           ('state', 'state'),
+                           ('title', 'title_long'),
+                           ('name', 'person__name'),
+                           ('leadership_title', 'leadership_title'),
+                           ('district', 'district')])
+    # Reads the fields above, in the order __init__ takes them
+    _read = staticmethod(_json_reader(_FIELDS.values()))
+
+    def __init__(self, website=None, start_date=None, end_date=None, state=None,
+                 title=None, name=None, leadership_title=None, district=None):
+
+        """
+        Creates a new PublicOfficial
+
+        :param website: The Public Official's website
+        :type website: str
+        :param start_date: The Public Official's start date
+        :type start_date: str
+        :param end_date: The Public Official's end date
+        :type end_date: str
+        :param state: The Public Official's representing state
+        :type state: str
+        :param title: The Public Official's title
+        :type title: str
+        :param name: The Public Official's name
+        :type name: str
+        :param leadership_title: The Public Official's leadership title (Majority Whip, Minority Whip, etc.)
+        :type leadership_title: str
+        :param district: The Public Official's representing district
+        :type district: float
+
+        :returns: PublicOfficial
+        """
+        self.website = website
+        self.start_date = start_date
+        self.end_date = end_date
+        self.state = state
+        self.title = title
+        self.name = name
+        self.leadership_title = leadership_title
+        self.district = district
+
+    def __unicode__(self):
+        string = """ <{0} Name: {1}> """
+        return string.format(self.title, self.name)
+
+    def __repr__(self):
+        string = self.__unicode__()
+
+        if not PYTHON_3:
+            return string.encode('utf-8')
+
+        return string
+
+    def __str__(self):
+        string = self.__unicode__()
+
+        if not PYTHON_3:
+            return string.encode('utf-8')
+
+        return string
+
+    def _to_dict(self):
+        return dict(website=self.website,
+                    start_date=self.start_date,
+                    end_date=self.end_date,
+                    state=self.state,
+                    title=self.title,
+                    name=self.name,
+                    leadership_title=self.leadership_title,
+                    district=self.district)
+
+    @staticmethod
+    def _from_json(json_data):
+        """
+        Creates a PublicOfficial from json data.
+
+        :param json_data: The raw json data to parse
+        :type json_data: dict
+        :returns: PublicOfficial
+        """
+
+        try:
+            (website, start_date, end_date, state, title, name,
+             leadership_title, district) = PublicOfficial._read(json_data)
+            return PublicOfficial(
+                website, start_date, end_date, state, title, name,
+                "" if leadership_title is None else leadership_title,
+                "" if district is None else district)
+
+        except KeyError:
+            raise GovTrackException("The given information was incomplete.")
+
+
+# Service Methods
+
+_RETURN_OBJECTS = False
+_PROJECT_FIELDS = True
+# Endpoint -> the domain object its responses are read into
+_PROJECTIONS = {'role': PublicOfficial, 'bill': Bill}
+# Role fields a roster is partitioned by
+_ROSTER_FIELDS = ('role_type', 'party')
+# Bill fields a sync orders and resumes by
+_SYNC_FIELDS = ('id', 'current_status_date')
+# Endpoint -> the fields its responses carry besides its domain object's
+_EXTRA_FIELDS = {'role': _ROSTER_FIELDS, 'bill': _SYNC_FIELDS}
+_CHAMBERS = ('senator', 'representative')
+
+
+def use_objects():
+    """
+    Make the service methods return :ref:`PublicOfficial` and :ref:`Bill`
+    objects instead of dicts. The objects carry the same fields as the dicts
+    but are much smaller, and skip building a dict for every record.
+
+    :returns: void
+    """
+    global _RETURN_OBJECTS
+    _RETURN_OBJECTS = True
+
+
+def use_dicts():
+    """
+    Make the service methods return dicts again (the default).
+
+    :returns: void
+    """
+    global _RETURN_OBJECTS
+    _RETURN_OBJECTS = False
+
+
+def set_field_projection(enabled=True):
+    """
+    Choose whether requests ask the server for only the fields the domain
+    objects read (GovTrack's `fields` parameter), which shrinks responses a
+    lot. Enabled by default; the results are the same either way.
+
+    :param bool enabled: whether to send the projection
+    :returns: void
+    """
+    global _PROJECT_FIELDS
+    _PROJECT_FIELDS = enabled
+
+
+def _with_fields(query, element):
+    """
+    Internal method to add the `fields` projection for an endpoint to a url.
+    The projection is derived from the `_FIELDS` map of the domain object
+    the endpoint's responses are read into, plus its `_EXTRA_FIELDS`, which
+    batched queries, the roster and delta sync read. Every reader of an
+    endpoint asks for the same projection, so a response recorded for one
+    of them replays for all of them.
+
+    :param str query: the url to query
+    :param str element: the endpoint the url is for
+    :returns: the *str* url to request
+    """
+    record_type = _PROJECTIONS.get(element)
+    if not _PROJECT_FIELDS or record_type is None:
+        return query
+    fields = ','.join(list(record_type._FIELDS.values()) +
+                      list(_EXTRA_FIELDS.get(element, ())))
+    return query + '&fields=' + quote_plus(fields, ',')
+
+
+def _to_result(record):
+    """
+    Internal method to turn a domain object into what the service methods
+    return: the object itself after :ref:`use_objects`, its dict otherwise.
+    """
+    return record if _RETURN_OBJECTS else record._to_dict()
+
+
+def _build_query(params, element):
+    """
+    Internal method to form the url for a query.
+
+    :param dict params: the parameters to pass to the server
+    :param str element: the endpoint to query
+    :returns: the *str* url
+    """
+    baseurl = _BASE_URL + element
+    ordered_dict = OrderedDict(sorted(
+        (key, _normalize_value(key, value)) for key, value in _iteritems(params)))
+    return _urlencode(baseurl, ordered_dict)
+
+
+def _strip_comments(body):
+    """
+    Internal method to remove the "// " comment markers from a response
+    body. The body is only copied when a marker is actually present.
+
+    :param body: the *bytes* or *str* response body
+    :returns: the body without comment markers
+    """
+    marker = b"// " if isinstance(body, bytes) else "// "
+    if marker in body:
+        return body.replace(marker, body[:0])
+    return body
+
+
+def _decode_response(body):
+    """
+    Internal method to parse a response body straight from its bytes.
+
+    Whitespace between JSON tokens is skipped by the parser itself, and raw
+    control characters inside strings are tolerated, so the body needs no
+    cleanup pass beforehand.
+
+    :param body: the *bytes* or *str* response body
+    :returns: the JSON response object
+    """
+    with _timed('decode'):
+        body = _strip_comments(body)
+    try:
+        with _timed('parse'):
+            return json.loads(body, strict=False)
+    except ValueError:
+        raise GovTrackException("Internal Error")
+
+
+def _has_text_to_convert(body):
+    """
+    Internal method to tell whether the page decoded from *body* may hold
+    text that :ref:`_recursively_convert_unicode_to_str` changes. On
+    Python 3 a body of plain ASCII without escapes cannot, which is most
+    pages, so they skip the conversion.
+
+    :param body: the *bytes* or *str* response body
+    :returns: *bool*
+    """
+    if not PYTHON_3:
+        return True
+    escape = b"\\u" if isinstance(body, bytes) else "\\u"
+    return not body.isascii() or escape in body
+
+
+def _converted_page(body, page):
+    """
+    Internal method to convert the text of the page decoded from *body*
+    into the `str` that results carry, so a query gives the same text
+    whichever path its records are built by.
+
+    :param body: the response body the page was decoded from
+    :param page: the decoded JSON response object
+    :returns: the converted page
+    """
+    if _has_text_to_convert(body):
+        with _timed('convert'):
+            return _recursively_convert_unicode_to_str(page)
+    return page
+
+
+def _converted_objects(body, objects):
+    """
+    Internal method to convert the text of the objects that
+    :ref:`_iter_objects` decodes from *body* one at a time, as
+    :ref:`_converted_page` converts a whole page.
+
+    :param body: the response body the objects are decoded from
+    :param objects: an iterable of the decoded objects
+    :returns: an iterable of the converted objects
+    """
+    if _has_text_to_convert(body):
+        return (_recursively_convert_unicode_to_str(json_dict)
+                for json_dict in objects)
+    return objects
+
+
+_JSON_DECODER = json.JSONDecoder(strict=False)
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _iter_objects(body, fields):
+    """
+    Internal generator that decodes a response body one element of its
+    "objects" array at a time, so that the decoded array is never held in
+    memory as a whole. Every other top-level field is decoded into *fields*
+    as it is reached, which for GovTrack's responses means "meta" is known
+    before the first object is yielded.
+
+    :param body: the *bytes* or *str* response body
+    :param dict fields: receives the top-level fields other than "objects"
+    :returns: a generator of the decoded objects
+    """
+    if PYTHON_3 and isinstance(body, bytes):
+        body = body.decode('utf-8')
+    text = _strip_comments(body)
+    skip = _JSON_WHITESPACE.match
+    decode = _JSON_DECODER.raw_decode
+    try:
+        index = skip(text, 0).end()
+        if text[index:index + 1] != '{':
+            raise ValueError("Expected a JSON object")
+        index = skip(text, index + 1).end()
+        if text[index:index + 1] == '}':
+            return
+        while True:
+            key, index = decode(text, index)
+            index = skip(text, index).end()
+            if text[index:index + 1] != ':':
+                raise ValueError("Expected ':'")
+            index = skip(text, index + 1).end()
+            if key == 'objects' and text[index:index + 1] == '[':
+                index = skip(text, index + 1).end()
+                if text[index:index + 1] == ']':
+                    index += 1
+                else:
+                    while True:
+                        value, index = decode(text, index)
+                        yield value
+                        index = skip(text, index).end()
+                        delimiter = text[index:index + 1]
+                        index = skip(text, index + 1).end()
+                        if delimiter == ']':
+                            break
+                        if delimiter != ',':
+                            raise ValueError("Expected ',' or ']'")
+            else:
+                fields[key], index = decode(text, index)
+            index = skip(text, index).end()
+            delimiter = text[index:index + 1]
+            index = skip(text, index + 1).end()
+            if delimiter == '}':
+                return
+            if delimiter != ',':
+                raise ValueError("Expected ',' or '}'")
+    except ValueError:
+        raise GovTrackException("Internal Error")
+
+
+# Offline Search
+
+_INDEX_SUFFIX = '.index'
+_INDEX_VERSION = 1
+_SEARCH_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _tokenize(text):
+    """
+    Internal method to split text into lowercase search terms.
+
+    :param str text: the text
+    :returns: the *list* of terms
+    """
+    return _SEARCH_TOKEN.findall(text.lower()) if text else []
+
+
+class _BillIndex(object):
+    """
+    An inverted index over the titles and descriptions of every recorded
+    bill, so keyword searches can be answered offline. Results are ranked
+    with BM25.
+
+    The index remembers how many responses of each cache key it has seen,
+    so it only has to read responses recorded since it was last saved.
+    """
+
+    _TEXT_FIELDS = ('title', 'current_status_description')
+    _K1 = 1.2
+    _B = 0.75
+
+    def __init__(self):
+        # Bill id -> the fields Bill reads from its JSON object
+        self.documents = {}
+        # Term -> {bill id: occurrences}
+        self.postings = {}
+        # Bill id -> number of terms
+        self.lengths = {}
+        # Cache key -> number of its responses indexed
+        self.responses = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def load(filename):
+        """
+        :returns: the index saved in *filename*, or an empty one if there
+                  is none (or it cannot be read)
+        """
+        index = _BillIndex()
+        try:
+            with open(filename, 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+            if data.get('version') != _INDEX_VERSION:
+                return index
+            index.documents = _recursively_convert_unicode_to_str(
+                data['documents'])
+            index.postings = data['postings']
+            index.lengths = data['lengths']
+            index.responses = data['responses']
+        except (IOError, OSError, ValueError, KeyError, AttributeError):
+            return _BillIndex()
+        index._total_length = sum(index.lengths.values())
+        return index
+
+    def save(self, filename):
+        """
+        Write the index to *filename*, replacing it atomically.
+
+        :returns: void
+        """
+        with self._lock:
+            data = json.dumps({'version': _INDEX_VERSION,
+                               'documents': self.documents,
+                               'postings': self.postings,
+                               'lengths': self.lengths,
+                               'responses': self.responses})
+        temporary = filename + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data.encode('utf-8'))
+        _replace_file(temporary, filename)
+
+    def sync(self, store):
+        """
+        Index the bill responses in *store* that have not been seen yet.
+
+        :returns: whether anything was indexed
+        """
+        changed = False
+        for key in store.keys():
+            if _key_endpoint(key) != 'bill':
+                continue
+            responses = store.get(key)[1:]
+            with self._lock:
+                seen = self.responses.get(key, 0)
+                if seen > len(responses):
+                    # The key was recorded over; index it afresh
+                    seen = 0
+                self.responses[key] = seen
+            for response in responses[seen:]:
+                self.add_response(key, _decompress_response(response))
+                changed = True
+        return changed
+
+    def add_response(self, key, response):
+        """
+        Index the bills in one recorded response for *key*.
+
+        :returns: void
+        """
+        try:
+            objects = _decode_response(response).get('objects') or []
+        except (GovTrackException, AttributeError):
+            objects = []
+        with self._lock:
+            self.responses[key] = self.responses.get(key, 0) + 1
+            for json_data in objects:
+                if isinstance(json_data, dict) and 'title' in json_data:
+                    self._add(json_data)
+
+    def _add(self, json_data):
+        if 'id' in json_data:
+            bill_id = str(json_data['id'])
+        else:
+            bill_id = '{}:{}'.format(json_data.get('congress'),
+                                     json_data['title'])
+        if bill_id in self.documents:
+            self._remove(bill_id)
+        terms = []
+        for field in self._TEXT_FIELDS:
+            terms.extend(_tokenize(json_data.get(field)))
+        self.documents[bill_id] = _recursively_convert_unicode_to_str(dict(
+            (path, json_data.get(path)) for path in Bill._FIELDS.values()))
+        self.lengths[bill_id] = len(terms)
+        self._total_length += len(terms)
+        for term in terms:
+            postings = self.postings.setdefault(term, {})
+            postings[bill_id] = postings.get(bill_id, 0) + 1
+
+    def _remove(self, bill_id):
+        document = self.documents.pop(bill_id)
+        self._total_length -= self.lengths.pop(bill_id)
+        for field in self._TEXT_FIELDS:
+            for term in set(_tokenize(document.get(field))):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(bill_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def search(self, query, limit=None):
+        """
+        Find the bills whose title or description contains every term of
+        *query*, best match first.
+
+        :param str query: the keywords
+        :param int limit: the most bills to return, or None for all
+        :returns: the *list* of bill JSON objects
+        """
+        terms = list(OrderedDict.fromkeys(_tokenize(query)))
+        with self._lock:
+            if not terms or not self.documents:
+                return []
+            postings = [self.postings.get(term, {}) for term in terms]
+            postings.sort(key=len)
+            if not postings[0]:
+                return []
+            matches = [bill_id for bill_id in postings[0]
+                       if all(bill_id in other for other in postings[1:])]
+            count = len(self.documents)
+            average_length = float(self._total_length) / count or 1.0
+            norms = dict((bill_id, self._K1 * (
+                1 - self._B + self._B * self.lengths[bill_id] / average_length))
+                for bill_id in matches)
+            scores = dict.fromkeys(matches, 0.0)
+            for term_postings in postings:
+                frequency = len(term_postings)
+                idf = math.log(1 + (count - frequency + 0.5) /
+                               (frequency + 0.5))
+                for bill_id in matches:
+                    occurrences = term_postings[bill_id]
+                    scores[bill_id] += idf * occurrences * (self._K1 + 1) / \
+                        (occurrences + norms[bill_id])
+            matches.sort(key=lambda bill_id: (-scores[bill_id],
+                                              self.documents[bill_id]['title']))
+            if limit is not None:
+                matches = matches[:limit]
+            return [dict(self.documents[bill_id]) for bill_id in matches]
+
+
+# Paginated Service Methods
+
+class _BackgroundCall(threading.Thread):
+    """
+    Runs a function on a daemon thread and hands back its result (or
+    re-raises its exception) when :ref:`result` is called.
+    """
+
+    def __init__(self, function, *args):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._function = function
+        self._args = args
+        self._result = None
+        self._error = None
+        self.start()
+
+    def run(self):
+        try:
+            self._result = self._function(*self._args)
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        self.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _page_query(params, element, offset, limit):
+    """
+    Internal method to form the url for one page of results.
+
+    :param dict params: the parameters to pass to the server
+    :param str element: the endpoint to query
+    :param int offset: the index of the first object on the page
+    :param int limit: the most objects on the page
+    :returns: the *str* url
+    """
+    page_params = dict(params)
+    page_params['offset'] = str(offset)
+    page_params['limit'] = str(limit)
+    return _build_query(page_params, element)
+
+
+def _total_count(fields):
+    """
+    Internal method to get the number of objects a paginated query matches.
+
+    :param dict fields: the decoded fields of a page, besides its objects
+    :returns: the page's *meta.total_count*
+    """
+    try:
+        return fields['meta']['total_count']
+    except (KeyError, TypeError):
+        raise GovTrackException("The given information was incomplete.")
+
+
+def _role_params(party, role_type, current):
+    """
+    Internal method to form the parameters of a role query.
+
+    :returns: the *dict* of parameters
+    """
+    q = {}
+    if party is not None:
+        q['party'] = party
+    if role_type is not None:
+        q['role_type'] = role_type
+    if current:
+        q['current'] = "True"
+    return q
+
+
+# Parallel Parsing
+
+_PARSE_WORKERS = 0
+_PARSE_POOL = None
+_PARSE_LOCK = threading.Lock()
+
+
+def set_parse_workers(workers):
+    """
+    Parse the pages of :ref:`iter_roles` and :ref:`iter_bills` on a pool of
+    *workers* processes, so decoding and building the results of a large
+    crawl uses more than one core. Results are still returned in their
+    original order. Off (0) by default; worth it only for crawls of many
+    pages.
+
+    The pool is started right away. Forking a process that already runs
+    threads, such as those of the connection pool, is unsafe, so on Python 3
+    the workers are spawned instead; on Python 2, which can only fork, call
+    this before making any requests.
+
+    :param int workers: how many worker processes to parse with, or 0 to
+                        parse in this process
+    :returns: void
+    """
+    global _PARSE_WORKERS, _PARSE_POOL
+    if workers < 0:
+        raise GovTrackException("Please enter a valid number of workers")
+    pool = _start_parse_pool(workers) if workers else None
+    with _PARSE_LOCK:
+        old_pool, _PARSE_POOL = _PARSE_POOL, pool
+        _PARSE_WORKERS = workers
+    if old_pool is not None:
+        # Pages already handed to the old pool are still parsed
+        old_pool.close()
+
+
+def _start_parse_pool(workers):
+    """
+    Internal method to start a pool of *workers* parse workers.
+
+    :returns: the *multiprocessing.Pool*
+    """
+    if PYTHON_3:
+        return multiprocessing.get_context('spawn').Pool(workers)
+    return multiprocessing.Pool(workers)
+
+
+def _parse_page(body, element):
+    """
+    Internal method, run on a parse worker, to parse one page of results
+    into the attribute values of its domain objects. A tuple of values is
+    much cheaper to send back to the parent process than the object or its
+    dict.
+
+    :param body: the *bytes* or *str* response body
+    :param str element: the endpoint the page is from
+    :returns: the page's *meta.total_count* and the *list* of value tuples
+    """
+    record_type = _PROJECTIONS[element]
+    names = list(record_type._FIELDS)
+    fields = {}
+    rows = [tuple(getattr(record, name) for name in names)
+            for record in (record_type._from_json(json_dict)
+                           for json_dict in _converted_objects(
+                               body, _iter_objects(body, fields)))]
+    return _total_count(fields), rows
+
+
+def _from_values(record_type, values):
+    """
+    Internal method to turn the values sent back by a parse worker into what
+    the service methods return (see :ref:`_to_result`).
+    """
+    if _RETURN_OBJECTS:
+        return record_type(*values)
+    return dict(zip(record_type._FIELDS, values))
+
+
+# Columnar Tables
+
+class _DictionaryColumn(object):
+    """
+    A column of repetitive values (states, titles, ...) that stores each
+    distinct value once, plus one small integer code per row.
+    """
+
+    __slots__ = ('codes', 'values', '_codes_by_value')
+
+    def __init__(self, values=None, codes_by_value=None):
+        self.codes = array('i')
+        self.values = [] if values is None else values
+        self._codes_by_value = {} if codes_by_value is None else codes_by_value
+
+    def append(self, value):
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = self._codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def code(self, value):
+        """
+        :returns: the code for *value*, or -1 if no row holds it
+        """
+        return self._codes_by_value.get(value, -1)
+
+    def take(self, indices):
+        column = _DictionaryColumn(self.values, self._codes_by_value)
+        codes = self.codes
+        column.codes = array('i', [codes[i] for i in indices])
+        return column
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class _IntColumn(object):
+    """
+    A column of integers packed into an array, where a missing value is
+    stored as -1 and read back as *missing*.
+    """
+
+    __slots__ = ('data', 'missing')
+
+    def __init__(self, missing=None):
+        self.data = array('i')
+        self.missing = missing
+
+    def append(self, value):
+        self.data.append(-1 if value is None else int(value))
+
+    def take(self, indices):
+        column = _IntColumn(self.missing)
+        data = self.data
+        column.data = array('i', [data[i] for i in indices])
+        return column
+
+    def __getitem__(self, index):
+        value = self.data[index]
+        return self.missing if value == -1 else value
+
+    def __iter__(self):
+        missing = self.missing
+        return (missing if value == -1 else value for value in self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _BoolColumn(object):
+    """
+    A column of booleans packed one byte per row.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self):
+        self.data = array('b')
+
+    def append(self, value):
+        self.data.append(1 if value else 0)
+
+    def take(self, indices):
+        column = _BoolColumn()
+        data = self.data
+        column.data = array('b', [data[i] for i in indices])
+        return column
+
+    def __getitem__(self, index):
+        return bool(self.data[index])
+
+    def __iter__(self):
+        return (bool(value) for value in self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def _take(column, indices):
+    if isinstance(column, list):
+        return [column[i] for i in indices]
+    return column.take(indices)
+
+
+class ResultTable(object):
+    """
+    A result set stored column by column (a struct of arrays) instead of as
+    a list of dicts.
+
+    Low-cardinality columns are dictionary-encoded, integer columns are
+    packed into arrays, and :ref:`filter`, :ref:`group_by` and
+    :ref:`count_by` work on the encoded columns directly. :ref:`rows` gives
+    back exactly the dicts the matching service method returns.
+    """
+
+    def __init__(self, columns):
+        """
+        Creates a new ResultTable
+
+        :param columns: The columns, in order, by field name
+        :type columns: OrderedDict
+
+        :returns: ResultTable
+        """
+        self._columns = columns
+
+    @property
+    def columns(self):
+        """
+        The field names of the columns, in order
+        """
+        return list(self._columns.keys())
+
+    def __len__(self):
+        for column in self._columns.values():
+            return len(column)
+        return 0
+
+    def __repr__(self):
+        return "<ResultTable {0} rows: {1}>".format(len(self),
+                                                   ", ".join(self.columns))
+
+    def column(self, name):
+        """
+        :param str name: the field to read
+        :returns: a *list* with the field's value for every row
+        """
+        return list(self._column(name))
+
+    def _column(self, name):
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise GovTrackException("There is no column '{}'.".format(name))
+
+    def categories(self, name):
+        """
+        :param str name: a dictionary-encoded field
+        :returns: the distinct values of the field; a row's code (see
+                  :ref:`to_numpy`) is an index into this list
+        """
+        column = self._column(name)
+        if not isinstance(column, _DictionaryColumn):
+            raise GovTrackException(
+                "The column '{}' is not dictionary-encoded.".format(name))
+        return list(column.values)
+
+    def row(self, index):
+        """
+        :param int index: the row to read
+        :returns: the row as a *dict*
+        """
+        return dict((name, column[index])
+                    for name, column in _iteritems(self._columns))
+
+    def rows(self):
+        """
+        :returns: every row as a *dict*, in order
+        """
+        names = self.columns
+        return [dict(zip(names, values))
+                for values in zip(*self._columns.values())]
+
+    def take(self, indices):
+        """
+        :param list indices: the rows to keep, in the order to keep them
+        :returns: a new :ref:`ResultTable` with only those rows
+        """
+        return ResultTable(OrderedDict(
+            (name, _take(column, indices))
+            for name, column in _iteritems(self._columns)))
+
+    def _matches(self, name, accepted):
+        """
+        Internal method to find the rows whose *name* field holds one of the
+        *accepted* values. Dictionary-encoded columns compare codes.
+        """
+        column = self._column(name)
+        if isinstance(column, _DictionaryColumn):
+            codes = set(column.code(value) for value in accepted)
+            return set(i for i, code in enumerate(column.codes)
+                       if code in codes)
+        return set(i for i, value in enumerate(column) if value in accepted)
+
+    def filter(self, **conditions):
+        """
+        Keep the rows whose fields hold the given values; a list, tuple or
+        set of values matches any of them.
+
+        >>> table.filter(state="CA", leadership_title="")
+
+        :returns: a new :ref:`ResultTable` with the matching rows
+        """
+        selected = None
+        for name, accepted in _iteritems(conditions):
+            if not isinstance(accepted, (list, tuple, set, frozenset)):
+                accepted = (accepted,)
+            matches = self._matches(name, accepted)
+            selected = matches if selected is None else selected & matches
+        if selected is None:
+            return self
+        return self.take(sorted(selected))
+
+    def _group_indices(self, name):
+        column = self._column(name)
+        groups = OrderedDict()
+        if isinstance(column, _DictionaryColumn):
+            by_code = [[] for _ in column.values]
+            for i, code in enumerate(column.codes):
+                by_code[code].append(i)
+            for value, indices in zip(column.values, by_code):
+                if indices:
+                    groups[value] = indices
+        else:
+            for i, value in enumerate(column):
+                groups.setdefault(value, []).append(i)
+        return groups
+
+    def group_by(self, name):
+        """
+        :param str name: the field to group on
+        :returns: an *OrderedDict* from each distinct value to a
+                  :ref:`ResultTable` of its rows
+        """
+        return OrderedDict((value, self.take(indices)) for value, indices in
+                           _iteritems(self._group_indices(name)))
+
+    def count_by(self, name):
+        """
+        :param str name: the field to count on
+        :returns: an *OrderedDict* from each distinct value to its number of
+                  rows
+        """
+        column = self._column(name)
+        if isinstance(column, _DictionaryColumn):
+            counts = [0] * len(column.values)
+            for code in column.codes:
+                counts[code] += 1
+            return OrderedDict((value, count) for value, count in
+                               zip(column.values, counts) if count)
+        return OrderedDict((value, len(indices)) for value, indices in
+                           _iteritems(self._group_indices(name)))
+
+    def to_numpy(self):
+        """
+        Convert the table into NumPy arrays (NumPy must be installed).
+
+        Dictionary-encoded columns become integer code arrays (see
+        :ref:`categories`), integer columns become integer arrays with -1 for
+        missing values, boolean columns become boolean arrays and the rest
+        become object arrays.
+
+        :returns: a *dict* from field name to array
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise GovTrackException("NumPy is required for to_numpy().")
+        arrays = {}
+        for name, column in _iteritems(self._columns):
+            if isinstance(column, _DictionaryColumn):
+                arrays[name] = numpy.array(column.codes, dtype=numpy.intc)
+            elif isinstance(column, _IntColumn):
+                arrays[name] = numpy.array(column.data, dtype=numpy.intc)
+            elif isinstance(column, _BoolColumn):
+                arrays[name] = numpy.array(column.data, dtype=numpy.bool_)
+            else:
+                arrays[name] = numpy.array(column, dtype=object)
+        return arrays
+
+
+def _official_table(json_objects):
+    """
+    Internal method to build a :ref:`ResultTable` of public officials
+    straight from their JSON objects, with the same fields as
+    :ref:`PublicOfficial`.
+    """
+    columns = OrderedDict([('website', []), ('start_date', []),
+                           ('end_date', []), ('state', _DictionaryColumn()),
+                           ('title', _DictionaryColumn()), ('name', []),
+                           ('leadership_title', _DictionaryColumn()),
+                           ('district', _IntColumn(missing=""))])
+    website, start_date, end_date, state, title, name, leadership_title, \
+        district = columns.values()
+    try:
+        for json_data in json_objects:
+            website.append(json_data['website'])
+            start_date.append(json_data['startdate'])
+            end_date.append(json_data['enddate'])
+            state.append(json_data['state'])
+            title.append(json_data['title_long'])
+            name.append(json_data['person']['name'])
+            leadership_title.append(json_data['leadership_title'] or "")
+            district.append(json_data['district'])
+    except KeyError:
+        raise GovTrackException("The given information was incomplete.")
+    return ResultTable(columns)
+
+
+def _bill_table(json_objects):
+    """
+    Internal method to build a :ref:`ResultTable` of bills straight from
+    their JSON objects, with the same fields as :ref:`Bill`.
+    """
+    columns = OrderedDict([('is_alive', _BoolColumn()),
+                           ('is_current', _BoolColumn()), ('title', []),
+                           ('number', _IntColumn()), ('description', []),
+                           ('congress_session', _DictionaryColumn()),
+                           ('introduced_date', [])])
+    is_alive, is_current, title, number, description, congress_session, \
+        introduced_date = columns.values()
+    try:
+        for json_data in json_objects:
+            is_alive.append(json_data['is_alive'])
+            is_current.append(json_data['is_current'])
+            title.append(json_data['title'])
+            number.append(json_data['number'])
+            description.append(json_data['current_status_description'])
+            congress_session.append(json_data['congress'])
+            introduced_date.append(json_data['introduced_date'])
+    except KeyError:
+        raise GovTrackException("The given information was incomplete.")
+    return ResultTable(columns)
+
+
+# Roster
+
+def _district_key(district):
+    """
+    Internal method to normalize a district, so 5 and "5" find the same
+    officials.
+    """
+    return str(district)
+
+
+class Roster(object):
+    """
+    An immutable snapshot of every current role, with hash indexes on the
+    fields officials are looked up by, so :ref:`find` answers without
+    network access or a scan. A snapshot is never modified: refreshing the
+    roster builds a new one (see :ref:`refresh_roster`).
+    """
+
+    # The fields the snapshot is indexed by
+    INDEXED = ('state', 'district', 'party', 'title', 'leadership_title')
+
+    __slots__ = ('officials', 'built_at', '_rows', '_indexes')
+
+    def __init__(self, json_roles):
+        """
+        Creates a new Roster
+
+        :param json_roles: the JSON role objects, with their party
+        :returns: Roster
+        """
+        officials = []
+        rows = []
+        indexes = dict((name, {}) for name in Roster.INDEXED)
+        for json_dict in json_roles:
+            official = PublicOfficial._from_json(json_dict)
+            try:
+                party = json_dict['party']
+            except KeyError:
+                raise GovTrackException(
+                    "The given information was incomplete.")
+            row = (official.state, _district_key(official.district), party,
+                   official.title, official.leadership_title)
+            for name, value in zip(Roster.INDEXED, row):
+                indexes[name].setdefault(value, []).append(len(officials))
+            officials.append(official)
+            rows.append(row)
+        self.officials = tuple(officials)
+        self.built_at = time.time()
+        self._rows = tuple(rows)
+        self._indexes = indexes
+
+    def __len__(self):
+        return len(self.officials)
+
+    def find(self, state=None, district=None, party=None, title=None,
+             leadership_title=None):
+        """
+        Find the officials matching every given field. The smallest index
+        bucket among the fields is filtered by the others, so a lookup costs
+        the size of that bucket rather than of the roster.
+
+        :param str state: the state's abbreviation (e.g. "CO")
+        :param district: the district number
+        :param str party: the party (e.g. "Democrat")
+        :param str title: the title (e.g. "Senator")
+        :param str leadership_title: the leadership title (e.g. "Majority
+                                     Whip")
+        :return: a list of public officials, in roster order
+        """
+        if district is not None:
+            district = _district_key(district)
+        wanted = [(position, value) for position, value in
+                  enumerate((state, district, party, title, leadership_title))
+                  if value is not None]
+        if not wanted:
+            positions = range(len(self.officials))
+        else:
+            buckets = [self._indexes[Roster.INDEXED[position]].get(value, ())
+                       for position, value in wanted]
+            positions = min(buckets, key=len)
+        rows = self._rows
+        return [_to_result(self.officials[i]) for i in positions
+                if all(rows[i][position] == value
+                       for position, value in wanted)]
+
+
+# Asynchronous Service Methods
+
+_ASYNC_CONCURRENCY = 10
+_ASYNC_EXECUTOR = None
+_ASYNC_LOCK = threading.Lock()
+
+
+def set_async_concurrency(limit):
+    """
+    Set how many asynchronous lookups may be in flight at once. Lookups
+    beyond the limit wait their turn, so any number of them can be fanned
+    out from one event loop.
+
+    :param int limit: the most concurrent lookups
+    :returns: void
+    """
+    global _ASYNC_CONCURRENCY, _ASYNC_EXECUTOR
+    if limit < 1:
+        raise GovTrackException("The concurrency limit must be at least 1")
+    with _ASYNC_LOCK:
+        old_executor, _ASYNC_EXECUTOR = _ASYNC_EXECUTOR, None
+        _ASYNC_CONCURRENCY = limit
+    if old_executor is not None:
+        old_executor.shutdown(wait=False)
+
+
+def _async_executor():
+    """
+    Internal method to get the bounded worker pool that asynchronous lookups
+    run on, starting it the first time it is needed.
+
+    :returns: the *ThreadPoolExecutor*
+    """
+    global _ASYNC_EXECUTOR
+    if not PYTHON_3:
+        raise GovTrackException("The asynchronous API requires Python 3")
+    with _ASYNC_LOCK:
+        if _ASYNC_EXECUTOR is None:
+            _ASYNC_EXECUTOR = ThreadPoolExecutor(
+                max_workers=_ASYNC_CONCURRENCY)
+        return _ASYNC_EXECUTOR
+
+
+class _AsyncFlights(object):
+    """
+    Coalesces identical asynchronous lookups: tasks asking for a key whose
+    lookup is already queued or running wait on the same worker future
+    rather than each occupying a worker. Each of them is handed its own
+    copy of the result, as the synchronous calls build one per caller.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, executor, function, *args):
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return _copied(future)
+            future = self._futures[key] = executor.submit(function, *args)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def stats(self):
+        with self._lock:
+            return {'coalesced': self.coalesced,
+                    'in_flight': len(self._futures)}
+
+
+def _copied(future):
+    """
+    Internal method to get a future for a copy of *future*'s result, so
+    that callers sharing a lookup cannot change each other's results.
+    """
+    copied = Future()
+
+    def copy_result(done):
+        if done.cancelled():
+            copied.cancel()
+        elif done.exception() is not None:
+            copied.set_exception(done.exception())
+        else:
+            try:
+                copied.set_result(copy.deepcopy(done.result()))
+            except Exception as e:
+                copied.set_exception(e)
+    future.add_done_callback(copy_result)
+    return copied
+
+
+# Cache Warming
+
+_WARM_WORKERS = 4
+_WARM_SAVE_EVERY = 20
+_CHECKPOINT_SUFFIX = '.warm'
+
+
+def _warm_tasks(congresses=(), keywords=()):
+    """
+    Internal method to list the queries a warm-up crawls.
+
+    :returns: a *list* of (endpoint, params) pairs
+    """
+    tasks = [("role", {'role_type': "senator", 'current': "True"}),
+             ("role", {'role_type': "representative", 'current': "True"})]
+    for congress in congresses:
+        tasks.append(("bill", {'congress': str(congress)}))
+    for keyword in keywords:
+        tasks.append(("bill", {'q': keyword}))
+    return tasks
+
+
+def _open_warm_store(filename):
+    """
+    Internal method to open (or create) the cache store a warm-up writes
+    into. A JSON cache is read as it was recorded, since it is written back
+    whole.
+    """
+    if filename.endswith('.json'):
+        if os.path.exists(filename):
+            return _MemoryCacheStore(_rekeyed(_iteritems(
+                _load_json_cache(filename))))
+        return _MemoryCacheStore()
+    if filename.endswith('.snapshot'):
+        return SnapshotCacheStore(filename)
+    if filename.endswith(_SHARED_SUFFIX):
+        return SharedCacheStore(filename)
+    return SqliteCacheStore(filename)
+
+
+class _Checkpoint(object):
+    """
+    The pages a warm-up has stored so far, kept next to the cache as one
+    JSON line per page: its url and the total count of its query. Lines are
+    only written once the pages they name are safely in the cache.
+
+    A JSON cache is only written once, when the warm-up ends, so for it the
+    lines carry the pages themselves too: the checkpoint is then the
+    journal that an interrupted warm-up recovers its pages from.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        # Url -> total count of the query it is a page of
+        self.totals = {}
+        # Url -> the page, for the lines that carry one
+        self.bodies = {}
+        self._pending = []
+        if os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                        url, total = record[:2]
+                    except (ValueError, TypeError):
+                        break
+                    self.totals[url] = total
+                    if len(record) > 2:
+                        self.bodies[url] = record[2]
+
+    def add(self, url, total, body=None):
+        self._pending.append((url, total) if body is None else
+                             (url, total, body))
+
+    def flush(self):
+        """
+        Record every page added since the last flush.
+        """
+        if not self._pending:
+            return
+        with open(self.filename, 'ab') as f:
+            for record in self._pending:
+                f.write(json.dumps(record).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        for record in self._pending:
+            self.totals[record[0]] = record[1]
+        del self._pending[:]
+
+    def remove(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+def _save_warm_store(filename, store):
+    """
+    Internal method to save the cache store a warm-up or a sync writes into.
+    """
+    if filename.endswith('.json'):
+        _write_json_cache(filename, store.items())
+    else:
+        store.save()
+
+
+# Delta Sync
+
+_SYNC_SUFFIX = '.sync'
+
+
+def _bill_url(bill_id):
+    """
+    Internal method to form the url a synced bill is stored under: the
+    bill's own GovTrack url.
+    """
+    return urljoin(_BASE_URL, 'bill/{}'.format(bill_id))
+
+
+def _load_sync_marks(filename):
+    """
+    Internal method to read the high-water marks kept next to a synced
+    cache.
+
+    :returns: a *dict* of query url -> current status date
+    """
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except ValueError:
+        raise GovTrackException(
+            "The sync state '{}' is corrupt.".format(filename))
+
+
+def _save_sync_marks(filename, marks):
+    """
+    Internal method to replace the high-water marks kept next to a synced
+    cache atomically.
+    """
+    temporary = filename + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(marks, f)
+    _replace_file(temporary, filename)
+
+
+def _synced_bill(store, key):
+    """
+    Internal method to read the copy of a bill that an earlier sync stored
+    under *key*.
+
+    :returns: the bill's JSON object, or None if it was never stored
+    """
+    entry = store.get(key)
+    if not entry or len(entry) < 2:
+        return None
+    return json.loads(_expand_response(entry[-1]))['objects'][0]
+
+
+# Client
+
+class GovTrackClient(object):
+    """
+    A client for GovTrack with its own connection pool, response cache,
+    local cache store, replay cursors, bill index and roster, so several
+    can be used side by side, and a single client can be shared by many
+    threads.
+
+    Process-wide settings and workers are shared by every client: the rate
+    limiter (:ref:`configure_rate_limit`), instrumentation
+    (:ref:`enable_metrics`), the result type (:ref:`use_objects` and
+    :ref:`use_dicts`), field projection (:ref:`set_field_projection`), the
+    parse worker pool (:ref:`set_parse_workers`) and the worker pool behind
+    the asynchronous methods (:ref:`set_async_concurrency`).
+
+    The module-level functions (:ref:`get_senators`, :ref:`connect`, ...)
+    are the methods of a default client.
+    """
+
+    def __init__(self, pool_size=4, idle_timeout=30.0, timeout=10.0):
+        """
+        Creates a new client, connected to the online data source.
+
+        :param pool_size: The most idle connections kept open for each host
+        :type pool_size: int
+        :param idle_timeout: Seconds before an idle connection is evicted
+        :type idle_timeout: float
+        :param timeout: The socket timeout, in seconds
+        :type timeout: float
+
+        :returns: GovTrackClient
+        """
+        self.pool = _ConnectionPool(pool_size, idle_timeout, timeout)
+        self.response_cache = _ResponseCache()
+        self.cache = _MemoryCacheStore()
+        self.connected = True
+        self.editable = False
+        self.pattern = "repeat"
+        # Url -> the position of the last response replayed for it
+        self._cursors = {}
+        # Only held to move a cursor, never while reading the store
+        self._cursor_lock = threading.Lock()
+        self._record_lock = threading.Lock()
+        self._single_flight = _SingleFlight()
+        self._async_flights = _AsyncFlights()
+        self._index = None
+        self._index_filename = None
+        self._index_lock = threading.Lock()
+        self._roster = None
+        # Only held while a roster is built, never by readers
+        self._roster_lock = threading.Lock()
+        self.shared = None
+        self.shared_max_age = 60.0
+
+    def close(self):
+        """
+        Close the client's connections and its cache stores.
+
+        :returns: void
+        """
+        self.pool.close()
+        self.cache.close()
+        self.share_responses(None)
+
+    # Connections
+
+    def configure_connections(self, pool_size=4, idle_timeout=30.0,
+                              timeout=10.0):
+        """
+        Replace the connection pool used to talk to the online data source.
+        Connections held by the previous pool are closed.
+
+        :param int pool_size: the most idle connections kept open per host
+        :param float idle_timeout: seconds before an idle connection is evicted
+        :param float timeout: the socket timeout, in seconds
+        :returns: void
+        """
+        old_pool, self.pool = self.pool, _ConnectionPool(pool_size,
+                                                         idle_timeout, timeout)
+        old_pool.close()
+
+    def close_connections(self):
+        """
+        Close every persistent connection held by the connection pool.
+
+        :returns: void
+        """
+        self.pool.close()
+
+    def configure_response_cache(self, ttls=None, default_ttl=60.0,
+                                 max_entries=256, max_bytes=32 * 1024 * 1024,
+                                 enabled=True):
+        """
+        Replace the in-memory cache of live responses used while connected.
+
+        :param dict ttls: seconds a response stays fresh, per endpoint
+                          ("role", "bill", ...)
+        :param float default_ttl: seconds a response stays fresh for any other
+                                  endpoint
+        :param int max_entries: the most responses kept
+        :param int max_bytes: the most response bytes kept
+        :param bool enabled: whether live responses are cached at all
+        :returns: void
+        """
+        self.response_cache = _ResponseCache(ttls, default_ttl, max_entries,
+                                             max_bytes, enabled)
+
+    def clear_response_cache(self):
+        """
+        Forget every cached live response.
+
+        :returns: void
+        """
+        self.response_cache.clear()
+
+    def share_responses(self, filename, max_age=60.0):
+        """
+        Share live responses with every other process on this host that
+        shares the same file, e.g. the workers of a web server. A response
+        another process fetched less than *max_age* seconds ago is used
+        instead of asking the server, and every response fetched is made
+        available to the others.
+
+        :param str filename: the :ref:`SharedCacheStore` to share through,
+                             or None to stop sharing
+        :param float max_age: seconds a shared response is used for
+        :returns: void
+        """
+        old_shared = self.shared
+        self.shared = SharedCacheStore(filename) if filename else None
+        self.shared_max_age = max_age
+        if old_shared is not None:
+            old_shared.close()
+
+    def get_coalescing_stats(self):
+        """
+        Report how many requests were coalesced with an identical request
+        that was already in flight.
+
+        :returns: a *dict* with the number of "calls" made, how many of them
+                  were "coalesced" instead of reaching the server, and how
+                  many requests are "in_flight" right now
+        """
+        stats = self._single_flight.stats()
+        async_stats = self._async_flights.stats()
+        stats['calls'] += async_stats['coalesced']
+        stats['coalesced'] += async_stats['coalesced']
+        return stats
+
+    def _get(self, url):
+        """
+        Internal method to convert a URL into it's response (a *str*).
+
+        :param str url: the url to request a response from
+        :returns: the *str* response
+        """
+        body = self._get_raw(url)
+        if PYTHON_3:
+            with _timed('decode'):
+                return body.decode('utf-8')
+        else:
+            return body
+
+    def _get_raw(self, url):
+        """
+        Internal method to convert a URL into it's undecoded response body.
+
+        The request is sent over a persistent connection borrowed from the
+        client's connection pool (see :ref:`configure_connections`), paced
+        and retried by the rate limiter (see :ref:`configure_rate_limit`).
+        Responses are kept in the response cache (see
+        :ref:`configure_response_cache`): a fresh copy is returned without
+        touching the network, and an expired one is revalidated with a
+        conditional request. While sharing responses (see
+        :ref:`share_responses`), a copy another process fetched recently is
+        used before going to the server.
+
+        :param str url: the url to request a response from
+        :returns: the *bytes* response
+        """
+        key = _cache_key(url)
+        response_cache = self.response_cache
+        entry = response_cache.get(key)
+        if entry is not None and entry.is_fresh():
+            _count('response_cache_hits')
+            return entry.body
+
+        shared = self.shared
+        if shared is not None:
+            body = shared.get_fresh(key, self.shared_max_age)
+            if body is not None:
+                _count('shared_cache_hits')
+                response_cache.put(key, body, None, None)
+                return body
+
+        headers = dict(HEADER)
+        if entry is not None:
+            headers.update(entry.validators())
+        status, response_headers, body = _LIMITER.request(self.pool, url,
+                                                          headers)
+        if status == 304 and entry is not None:
+            _count('response_cache_revalidations')
+            response_cache.revalidated(key, entry)
+            return entry.body
+
+        _count('response_cache_misses')
+
+        response_cache.put(key, body, response_headers.get('ETag'),
+                           response_headers.get('Last-Modified'))
+        if shared is not None:
+            shared.put(key, body)
+        return body
+
+    # Cache
+
+    def set_cache_store(self, store):
+        """
+        Replace the cache store that responses are recorded into and replayed
+        from. The previous store is closed, and the replay position of every
+        url starts over.
+
+        :param store: a :ref:`SqliteCacheStore`, a :ref:`SnapshotCacheStore`,
+                      or any object with the same methods
+        :returns: void
+        """
+        with self._record_lock:
+            with self._cursor_lock:
+                old_store, self.cache = self.cache, store
+                self._cursors.clear()
+            with self._index_lock:
+                self._index = None
+                self._index_filename = None
+            self._roster = None
+        if old_store is not store:
+            old_store.close()
+
+    def _start_editing(self, pattern="repeat"):
+        """
+        Start adding seen entries to the cache. So, every time that you make a request,
+        it will be saved to the cache. You must :ref:`_save_cache` to save the
+        newly edited cache to disk, though!
+        """
+        self.pattern = pattern
+        self.editable = True
+
+    def _stop_editing(self):
+        """
+        Stop adding seen entries to the cache.
+        """
+        self.editable = False
+
+    def _add_to_cache(self, key, value):
+        """
+        Internal method to add a new key-value to the local cache.
+        :param str key: The new url to add to the cache
+        :param str value: The HTTP response for this key.
+        :returns: void
+        """
+        compressed = _compress_response(value)
+        with self._record_lock:
+            cache = self.cache
+            if key not in cache:
+                with self._cursor_lock:
+                    self._cursors[key] = 0
+            cache.add(key, compressed, self.pattern)
+            index = self._index
+            if index is not None and _key_endpoint(key) == 'bill':
+                index.add_response(key, value)
+
+    def _clear_key(self, key):
+        """
+        Internal method to remove a key from the local cache.
+        :param str key: The url to remove from the cache
+        """
+        self.cache.remove(key)
+
+    def _save_cache(self, filename="cache.json"):
+        """
+        Internal method to save the cache in memory to a file, so that it can be used later.
+
+        A JSON *filename* receives a full dump of the cache, a ".snapshot"
+        *filename* a cache snapshot, and anything else is written as a
+        SQLite cache store (a store already kept in *filename* is simply
+        saved). The offline bill index is saved next to it.
+
+        Only SQLite stores and snapshots keep their responses compressed on
+        disk; a JSON dump holds every response as plain text, and the JSON
+        cache loaded back from it holds them as plain text in memory too.
+
+        Likewise only a :ref:`SnapshotCacheStore` journals each response as
+        it is recorded, so that saving costs no more than the responses
+        recorded since the last save. Saving to a JSON file (the default)
+        rewrites the whole file, atomically, every time; record into a
+        snapshot for long sessions.
+
+        :param str filename: the location to store this at.
+        """
+        index = self._bill_index()
+        if index.responses:
+            index.save(filename + _INDEX_SUFFIX)
+        cache = self.cache
+        if getattr(cache, 'filename', None) == filename:
+            cache.save()
+        elif filename.endswith('.json'):
+            _write_json_cache(filename, cache.items())
+        elif filename.endswith('.snapshot'):
+            _replace_snapshot(filename, cache.items())
+        else:
+            store = SqliteCacheStore(filename)
+            try:
+                for key, entry in cache.items():
+                    store.remove(key)
+                    for value in entry[1:]:
+                        store.add(key, value, entry[0])
+            finally:
+                store.close()
+
+    def _lookup(self, key):
+        """
+        Internal method that looks up a key in the local cache.
+
+        The cursor of *key* is moved under a lock held for just that, so
+        concurrent lookups each replay a different response.
+
+        :param key: Get the value based on the key from the cache.
+        :type key: string
+        :returns: void
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            _count('replay_misses')
+            return ""
+        _count('replay_hits')
+        with self._cursor_lock:
+            counter = self._cursors.get(key, 0)
+            if counter >= len(entry[1:]):
+                if entry[0] == "empty":
+                    return ""
+                elif entry[0] == "repeat" and entry[1:]:
+                    value = entry[-1]
+                elif entry[0] == "repeat":
+                    return ""
+                else:
+                    counter = 1
+                    self._cursors[key] = counter
+                    value = entry[counter]
+            else:
+                counter += 1
+                self._cursors[key] = counter
+                value = entry[counter]
+        return _expand_response(value)
+
+    def connect(self):
+        """
+        Connect to the online data source in order to get up-to-date information.
+
+        :returns: void
+        """
+        self.connected = True
+
+    def disconnect(self, filename="../src/cache.json"):
+        """
+        Connect to the local cache, so no internet connection is required.
+
+        A JSON cache file is loaded into memory as plain text. A ".snapshot"
+        file is opened as a :ref:`SnapshotCacheStore` and any other file as a
+        :ref:`SqliteCacheStore`; both read entries lazily as they are looked
+        up, and keep them compressed. The offline bill index kept next to the file, if any, is used
+        for keyword searches that were never recorded.
+
+        :returns: void
+        """
+        self.set_cache_store(_open_cache_store(filename))
+        self._index_filename = filename + _INDEX_SUFFIX
+        self.connected = False
+
+    # Service Methods
+
+    def _fetch_govtrack_info(self, params, element):
+        """
+        Internal method to form and query the server
+
+        While connected, concurrent calls for the same url are coalesced into
+        a single request, and every caller gets its own copy of the JSON
+        response object.
+
+        :param dict params: the parameters to pass to the server
+        :returns: the JSON response object
+        """
+        query = _build_query(params, element)
+        with _measured(query):
+            if self.connected:
+                return self._single_flight.do(_cache_key(query),
+                                              self._fetch_query,
+                                              query, element)
+            return self._fetch_query(query, element)
+
+    def _fetch_query(self, query, element=None):
+        """
+        Internal method to query the server (or the local cache) with a url.
+        The text of the response is converted by :ref:`_converted_page`.
+
+        :param str query: the url to query
+        :param str element: the endpoint the url is for
+        :returns: the JSON response object
+        """
+        body = self._fetch_body(query, element)
+        return _converted_page(body, _decode_response(body))
+
+    def _fetch_body(self, query, element=None):
+        """
+        Internal method to get the response body for a url, from the server
+        while connected and from the local cache otherwise.
+
+        The server is sent the endpoint's `fields` projection, but responses
+        are recorded under the request key of the plain url, so caches
+        recorded either way replay.
+
+        :param str query: the url to query
+        :param str element: the endpoint the url is for
+        :returns: the response body (*bytes* from the server, *str* from the
+                  cache)
+        """
+        connected = self.connected
+        try:
+            if connected:
+                body = self._get_raw(_with_fields(query, element))
+            else:
+                body = self._lookup(_cache_key(query))
+        except _HTTPError as e:
+            if e.code in _THROTTLE_CODES:
+                raise GovTrackRateLimitException(
+                    "The server is throttling requests, try again later",
+                    _retry_after(e.hdrs))
+            raise GovTrackException("Make sure you entered a valid query")
+
+        if not body:
+            raise GovTrackException("There were no results")
+
+        if connected and self.editable:
+            self._add_to_cache(_cache_key(query),
+                               body.decode('utf-8') if PYTHON_3 else body)
+        return body
+
+    def get_senators(self, query):
+        """
+        Forms and poses the query to get information from the database
+        :param query: the values to retrieve
+        :return: the JSON response
+        """
+
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        q = {'role_type': "senator",
+             'current': "True",
+             'party': query}
+
+        with _measured(None):
+            json_res = self._fetch_govtrack_info(q, "role")
+            json_list = json_res['objects']
+
+            senators = []
+            with _timed('build'):
+                for json_dict in json_list:
+                    senator = PublicOfficial._from_json(json_dict)
+                    senators.append(_to_result(senator))
+
+        return senators
+
+    def get_representatives(self, query):
+        """
+        Forms and poses the query to get information from the database
+        :param query: the values to retrieve
+        :return: the JSON response
+        """
+
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        q = {'role_type': "representative",
+             'current': "True",
+             'party': query}
+
+        with _measured(None):
+            json_res = self._fetch_govtrack_info(q, "role")
+            json_list = json_res['objects']
+
+            reps = []
+            with _timed('build'):
+                for json_dict in json_list:
+                    rep = PublicOfficial._from_json(json_dict)
+                    reps.append(_to_result(rep))
+
+        return reps
+
+    def get_bills_by_keyword(self, query):
+        """
+        Forms and poses the query to get information from the database
+        :param query: the values to retrieve
+        :return: list of bills
+        """
+
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        with _measured(None):
+            json_list = self._bill_objects(query)
+
+            bills = []
+            with _timed('build'):
+                for json_dict in json_list:
+                    bill = Bill._from_json(json_dict)
+                    bills.append(_to_result(bill))
+
+        return bills
+
+    # Offline Search
+
+    def _bill_index(self):
+        """
+        Internal method to get the offline bill index for the current cache,
+        loading it from next to the cache file and bringing it up to date
+        with the cache the first time it is needed.
+
+        :returns: the :ref:`_BillIndex`
+        """
+        with self._index_lock:
+            if self._index is None:
+                filename = self._index_filename
+                if filename is not None:
+                    index = _BillIndex.load(filename)
+                else:
+                    index = _BillIndex()
+                if index.sync(self.cache) and filename is not None:
+                    try:
+                        index.save(filename)
+                    except (IOError, OSError):
+                        pass
+                self._index = index
+            return self._index
+
+    def _bill_objects(self, query):
+        """
+        Internal method to get the bill JSON objects for a keyword search.
+
+        Offline, a search that was never recorded is answered from the bill
+        index instead of failing.
+
+        :param str query: the keywords
+        :returns: the *list* of bill JSON objects
+        """
+        params = {'q': query}
+        if not self.connected and \
+                _cache_key(_build_query(params, "bill")) not in self.cache:
+            objects = self._bill_index().search(query)
+            if not objects:
+                raise GovTrackException("There were no results")
+            return objects
+        return self._fetch_govtrack_info(params, "bill")['objects']
+
+    def search_bills(self, query, limit=None):
+        """
+        Search every bill in the local cache by keyword, without a
+        connection. Bills whose title or description contain all of the
+        keywords are returned, best match first.
+
+        :param str query: the keywords
+        :param int limit: the most bills to return, or None for all
+        :return: list of bills
+        """
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        return [_to_result(Bill._from_json(json_dict))
+                for json_dict in self._bill_index().search(query, limit)]
+
+    # Paginated Service Methods
+
+    def _fetch_page(self, params, element, offset, limit):
+        """
+        Internal method to fetch one page of results.
+
+        :param dict params: the parameters to pass to the server
+        :param str element: the endpoint to query
+        :param int offset: the index of the first object on the page
+        :param int limit: the most objects on the page
+        :returns: the undecoded response body
+        """
+        query = _page_query(params, element, offset, limit)
+        with _measured(query):
+            return self._fetch_body(query, element)
+
+    def _iter_pages(self, params, element, page_size=_PAGE_SIZE,
+                    prefetch=True):
+        """
+        Internal generator that follows the server's offset/limit pagination
+        until *meta.total_count* objects have been seen, yielding the objects
+        of each page as they are decoded.
+
+        With *prefetch*, the next page is requested in the background as
+        soon as the current one starts being consumed, so at most two pages
+        are held at a time.
+        """
+        offset = 0
+        body = self._fetch_page(params, element, offset, page_size)
+        while True:
+            fields = {}
+            objects = _converted_objects(body, _iter_objects(body, fields))
+            del body
+            upcoming = None
+            count = 0
+            for json_dict in objects:
+                if not count and prefetch and 'meta' in fields and \
+                        offset + page_size < _total_count(fields):
+                    upcoming = _BackgroundCall(self._fetch_page, params,
+                                               element, offset + page_size,
+                                               page_size)
+                count += 1
+                yield json_dict
+            offset += count
+            if not count or offset >= _total_count(fields):
+                return
+            if upcoming is not None and count == page_size:
+                body = upcoming.result()
+            else:
+                body = self._fetch_page(params, element, offset, page_size)
+
+    def iter_roles(self, party=None, role_type=None, current=True,
+                   page_size=_PAGE_SIZE, prefetch=True):
+        """
+        Lazily iterate over every matching role, following pagination
+        instead of stopping at the first page.
+
+        :param str party: only roles for this party (e.g. "Democrat")
+        :param str role_type: only roles of this type ("senator" or
+                              "representative")
+        :param bool current: only roles that are currently held
+        :param int page_size: how many roles to request per page
+        :param bool prefetch: fetch the next page while this one is consumed
+        :return: a generator of public official dicts (or objects)
+        """
+        return self._iter_records(_role_params(party, role_type, current),
+                                  "role", page_size, prefetch)
+
+    def iter_bills(self, query, page_size=_PAGE_SIZE, prefetch=True):
+        """
+        Lazily iterate over every bill matching a keyword, following
+        pagination instead of stopping at the first page.
+
+        :param str query: the keyword to search for
+        :param int page_size: how many bills to request per page
+        :param bool prefetch: fetch the next page while this one is consumed
+        :return: a generator of bill dicts (or objects)
+        """
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        return self._iter_records({'q': query}, "bill", page_size, prefetch)
+
+    def _iter_records(self, params, element, page_size, prefetch):
+        """
+        Internal generator of the results of every object across all pages.
+
+        With parse workers (see :ref:`set_parse_workers`), pages keep being
+        fetched while up to two pages per worker are parsed, and the results
+        are yielded page by page in order. Without *prefetch*, each page is
+        fetched and parsed only once the previous one has been consumed.
+        """
+        record_type = _PROJECTIONS[element]
+        with _PARSE_LOCK:
+            pool, workers = _PARSE_POOL, _PARSE_WORKERS
+        if pool is None:
+            for json_dict in self._iter_pages(params, element, page_size,
+                                              prefetch):
+                yield _to_result(record_type._from_json(json_dict))
+            return
+
+        window = 2 * workers if prefetch else 1
+
+        def parse(offset):
+            body = self._fetch_page(params, element, offset, page_size)
+            return pool.apply_async(_parse_page, (body, element))
+
+        total, rows = parse(0).get()
+        pending = deque()
+        offsets = iter(range(page_size, total, page_size))
+        while True:
+            for values in rows:
+                yield _from_values(record_type, values)
+            for offset in offsets:
+                pending.append(parse(offset))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            total, rows = pending.popleft().get()
+
+    # Batched Service Methods
+
+    def get_officials_by_party(self, parties, role_types=_CHAMBERS,
+                               page_size=_PAGE_SIZE):
+        """
+        Batched version of :ref:`get_senators` and
+        :ref:`get_representatives`: the current roster is fetched once,
+        across as many pages as it takes, and partitioned by chamber and
+        party locally, instead of making one request per chamber and party.
+
+        Unlike those methods, which return the first page of results the
+        server sends, every official of a party is returned, however many
+        pages they span.
+
+        :param parties: the parties to retrieve (e.g. ["Democrat",
+                        "Republican"])
+        :param role_types: the chambers to retrieve ("senator",
+                           "representative")
+        :param int page_size: how many roles to request per page
+        :return: a *dict* of chamber -> a *dict* of party -> list of public
+                 officials, in the order the chambers and parties were given
+        """
+        if isinstance(parties, str) or \
+                not all(isinstance(party, str) for party in parties):
+            raise GovTrackException("Please enter a valid query")
+        role_types = tuple(role_types)
+        if not role_types or \
+                not all(role_type in _CHAMBERS for role_type in role_types):
+            raise GovTrackException("Please enter a valid query")
+
+        # A single chamber is still filtered by the server
+        role_type = role_types[0] if len(role_types) == 1 else None
+        partitions = OrderedDict(
+            (chamber, OrderedDict((party, []) for party in parties))
+            for chamber in role_types)
+        # The given spellings of each party, by the spelling the server uses
+        spellings = {}
+        for party in parties:
+            spellings.setdefault(_normalize_value('party', party),
+                                 []).append(party)
+        roster = self._iter_pages(_role_params(None, role_type, True), "role",
+                                  page_size)
+        try:
+            for json_dict in roster:
+                officials = partitions.get(json_dict['role_type'])
+                matches = spellings.get(
+                    _normalize_value('party', json_dict['party']))
+                if officials is not None and matches:
+                    official = _to_result(PublicOfficial._from_json(json_dict))
+                    for party in matches:
+                        officials[party].append(official)
+        except KeyError:
+            raise GovTrackException("The given information was incomplete.")
+        return partitions
+
+    def get_senators_by_party(self, parties, page_size=_PAGE_SIZE):
+        """
+        Batched version of :ref:`get_senators`, for several parties at once.
+
+        :param parties: the parties to retrieve
+        :param int page_size: how many roles to request per page
+        :return: a *dict* of party -> list of senators
+        """
+        return self.get_officials_by_party(parties, ("senator",),
+                                           page_size)["senator"]
+
+    def get_representatives_by_party(self, parties, page_size=_PAGE_SIZE):
+        """
+        Batched version of :ref:`get_representatives`, for several parties
+        at once.
+
+        :param parties: the parties to retrieve
+        :param int page_size: how many roles to request per page
+        :return: a *dict* of party -> list of representatives
+        """
+        return self.get_officials_by_party(parties, ("representative",),
+                                           page_size)["representative"]
+
+    # Roster
+
+    def get_roster(self):
+        """
+        Get the current :ref:`Roster` snapshot, fetching it the first time.
+
+        :return: the :ref:`Roster`
+        """
+        roster = self._roster
+        if roster is None:
+            with self._roster_lock:
+                roster = self._roster
+                if roster is None:
+                    roster = self._build_roster(_PAGE_SIZE)
+        return roster
+
+    def refresh_roster(self, page_size=_PAGE_SIZE):
+        """
+        Fetch every current role into a new :ref:`Roster` and swap it in.
+        Lookups keep answering from the previous snapshot until the new one
+        is complete, and never wait for it.
+
+        :param int page_size: how many roles to request per page
+        :return: the new :ref:`Roster`
+        """
+        with self._roster_lock:
+            return self._build_roster(page_size)
+
+    def _build_roster(self, page_size):
+        """
+        Internal method to fetch and publish a new roster; the caller holds
+        the roster lock.
+        """
+        roster = Roster(self._iter_pages(_role_params(None, None, True),
+                                         "role", page_size))
+        self._roster = roster
+        return roster
+
+    def find_officials(self, state=None, district=None, party=None,
+                       title=None, leadership_title=None):
+        """
+        Find the current officials matching every given field, from the
+        roster snapshot (see :ref:`Roster.find`). Only the first lookup
+        touches the network.
+
+        :param str state: the state's abbreviation (e.g. "CO")
+        :param district: the district number
+        :param str party: the party (e.g. "Democrat")
+        :param str title: the title (e.g. "Senator")
+        :param str leadership_title: the leadership title
+        :return: a list of public officials
+        """
+        return self.get_roster().find(state, district, party, title,
+                                      leadership_title)
+
+    # Columnar Tables
+
+    def get_senators_table(self, query):
+        """
+        Columnar version of :ref:`get_senators`.
+
+        :param query: the values to retrieve
+        :return: a :ref:`ResultTable` of senators
+        """
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        q = {'role_type': "senator",
+             'current': "True",
+             'party': query}
+
+        return _official_table(self._fetch_govtrack_info(q, "role")['objects'])
+
+    def get_representatives_table(self, query):
+        """
+        Columnar version of :ref:`get_representatives`.
+
+        :param query: the values to retrieve
+        :return: a :ref:`ResultTable` of representatives
+        """
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        q = {'role_type': "representative",
+             'current': "True",
+             'party': query}
+
+        return _official_table(self._fetch_govtrack_info(q, "role")['objects'])
+
+    def get_bills_by_keyword_table(self, query):
+        """
+        Columnar version of :ref:`get_bills_by_keyword`.
+
+        :param query: the values to retrieve
+        :return: a :ref:`ResultTable` of bills
+        """
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        return _bill_table(self._bill_objects(query))
+
+    def get_roles_table(self, party=None, role_type=None, current=True,
+                        page_size=_PAGE_SIZE):
+        """
+        Columnar version of :ref:`iter_roles`: every matching role, across
+        all pages, in one :ref:`ResultTable`.
+
+        :param str party: only roles for this party (e.g. "Democrat")
+        :param str role_type: only roles of this type ("senator" or
+                              "representative")
+        :param bool current: only roles that are currently held
+        :param int page_size: how many roles to request per page
+        :return: a :ref:`ResultTable` of public officials
+        """
+        return _official_table(self._iter_pages(
+            _role_params(party, role_type, current), "role", page_size))
+
+    def get_bills_table(self, query, page_size=_PAGE_SIZE):
+        """
+        Columnar version of :ref:`iter_bills`: every bill matching a
+        keyword, across all pages, in one :ref:`ResultTable`.
+
+        :param str query: the keyword to search for
+        :param int page_size: how many bills to request per page
+        :return: a :ref:`ResultTable` of bills
+        """
+        if not isinstance(query, str):
+            raise GovTrackException("Please enter a valid query")
+
+        return _bill_table(self._iter_pages({'q': query}, "bill", page_size))
+
+    # Asynchronous Service Methods
+
+    def _run_async(self, key, function, *args):
+        """
+        Internal method to run a blocking service method on the bounded
+        worker pool, returning an awaitable for its result.
+
+        The awaited value is exactly what the synchronous call returns, since
+        the same fetching, caching and parsing code runs underneath. While
+        connected, lookups sharing *key* that overlap in time share one
+        worker call and its result.
+        """
+        executor = _async_executor()
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if self.connected and key is not None:
+            future = self._async_flights.submit(key, executor, function,
+                                                *args)
+        else:
+            future = executor.submit(function, *args)
+        return asyncio.wrap_future(future)
+
+    def _fetch_govtrack_info_async(self, params, element):
+        """
+        Internal method to form and query the server without blocking the
+        event loop.
+
+        :param dict params: the parameters to pass to the server
+        :returns: an awaitable for the JSON response object
+        """
+        return self._run_async(('fetch', _build_query(params, element)),
+                               self._fetch_govtrack_info, params, element)
+
+    def get_senators_async(self, query):
+        """
+        Awaitable version of :ref:`get_senators`.
+
+        :param query: the values to retrieve
+        :return: an awaitable for the list of senators
+        """
+        return self._run_async(('senators', query), self.get_senators, query)
+
+    def get_representatives_async(self, query):
+        """
+        Awaitable version of :ref:`get_representatives`.
+
+        :param query: the values to retrieve
+        :return: an awaitable for the list of representatives
+        """
+        return self._run_async(('representatives', query),
+                               self.get_representatives, query)
+
+    def get_bills_by_keyword_async(self, query):
+        """
+        Awaitable version of :ref:`get_bills_by_keyword`.
+
+        :param query: the values to retrieve
+        :return: an awaitable for the list of bills
+        """
+        return self._run_async(('bills', query), self.get_bills_by_keyword,
+                               query)
+
+    # Cache Warming
+
+    def warm_cache(self, filename, congresses=(), keywords=(),
+                   workers=_WARM_WORKERS, page_size=_PAGE_SIZE):
+        """
+        Crawl every current senator and representative, and the bills of the
+        given congresses and keyword searches, into the cache in *filename*.
+        Pages are fetched by *workers* concurrent requests.
+
+        Each page is stored under the url that :ref:`iter_roles`,
+        :ref:`iter_bills` and the table methods request it by (with the same
+        *page_size*), so the warmed cache answers them offline. Progress is
+        checkpointed in *filename* + ".warm": a warm-up that was interrupted
+        skips the pages it already stored when it is run again, and the
+        checkpoint is removed once a warm-up completes. A ".json" cache is
+        written once, when the warm-up ends; until then its pages are
+        journaled in the checkpoint.
+
+        :param str filename: the cache to fill; a ".json" file, a ".snapshot"
+                             file, or a SQLite store
+        :param congresses: the congresses whose bills to crawl (e.g. [113])
+        :param keywords: the keyword searches whose bills to crawl
+        :param int workers: how many pages to fetch at once
+        :param int page_size: how many objects to request per page
+        :returns: the number of pages fetched
+        """
+        if workers < 1 or page_size < 1:
+            raise GovTrackException("Please enter a valid number of workers")
+
+        store = _open_warm_store(filename)
+        checkpoint = _Checkpoint(filename + _CHECKPOINT_SUFFIX)
+        journaled = filename.endswith('.json')
+        for url, body in _iteritems(checkpoint.bodies):
+            # Pages journaled by an interrupted warm-up
+            store.remove(_cache_key(url))
+            store.add(_cache_key(url), body, "repeat")
+        checkpoint.bodies.clear()
+        jobs = queue.Queue()
+        lock = threading.Lock()
+        errors = []
+        fetched = [0]
+
+        def persist():
+            if not journaled:
+                _save_warm_store(filename, store)
+            checkpoint.flush()
+
+        def schedule(element, params, total):
+            for offset in range(page_size, total, page_size):
+                jobs.put((element, params, offset))
+
+        def work():
+            while True:
+                job = jobs.get()
+                try:
+                    if job is None:
+                        return
+                    if errors:
+                        continue
+                    element, params, offset = job
+                    url = _page_query(params, element, offset, page_size)
+                    if url in checkpoint.totals:
+                        continue
+                    body = self._get_raw(_with_fields(url, element))
+                    total = _total_count(_decode_response(body))
+                    if offset == 0:
+                        schedule(element, params, total)
+                    body = body.decode('utf-8') if PYTHON_3 else body
+                    with lock:
+                        store.remove(_cache_key(url))
+                        store.add(_cache_key(url), body, "repeat")
+                        checkpoint.add(url, total, body if journaled else None)
+                        fetched[0] += 1
+                        if fetched[0] % _WARM_SAVE_EVERY == 0:
+                            persist()
+                except Exception as e:
+                    # Stop the warm-up, but keep taking jobs so that it can
+                    # finish
+                    errors.append(e)
+                finally:
+                    jobs.task_done()
+
+        for element, params in _warm_tasks(congresses, keywords):
+            first = _page_query(params, element, 0, page_size)
+            if first in checkpoint.totals:
+                schedule(element, params, checkpoint.totals[first])
+            else:
+                jobs.put((element, params, 0))
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            jobs.join()
+            for thread in threads:
+                jobs.put(None)
+            for thread in threads:
+                thread.join()
+        finally:
+            with lock:
+                persist()
+                if journaled:
+                    _save_warm_store(filename, store)
+                store.close()
+            # The offline bill index is rebuilt from the refreshed cache
+            if os.path.exists(filename + _INDEX_SUFFIX):
+                os.remove(filename + _INDEX_SUFFIX)
+
+        if errors:
+            raise GovTrackException(
+                "Warming the cache stopped early ({}); run it again to "
+                "resume".format(errors[0]))
+        checkpoint.remove()
+        return fetched[0]
+
+    # Delta Sync
+
+    def sync_bills(self, filename, keyword=None, congress=None,
+                   page_size=_PAGE_SIZE):
+        """
+        Bring the bills of a keyword search or a congress in the cache in
+        *filename* up to date, fetching only the bills whose status changed
+        since the last sync.
+
+        Bills are requested oldest status date first, starting from the
+        high-water mark (the newest status date synced) that is kept in
+        *filename* + ".sync", so a refresh costs as many pages as there are
+        changed bills. Status dates only have day precision, so the bills
+        dated on the mark are fetched again, and count as changed if they
+        differ from the stored copy. Each bill is stored under its own url,
+        replacing the copy from an earlier sync. The first sync of a query
+        fetches every bill.
+
+        :param str filename: the cache to sync into; a ".json" file, a
+                             ".snapshot" file, or a SQLite store
+        :param str keyword: only bills matching this keyword search
+        :param int congress: only bills of this congress
+        :param int page_size: how many bills to request per page
+        :return: the list of changed bills, oldest status date first
+        """
+        if keyword is not None and not isinstance(keyword, str):
+            raise GovTrackException("Please enter a valid query")
+        if page_size < 1:
+            raise GovTrackException("Please enter a valid page size")
+
+        params = {}
+        if keyword is not None:
+            params['q'] = keyword
+        if congress is not None:
+            params['congress'] = str(congress)
+        marks_filename = filename + _SYNC_SUFFIX
+        marks = _load_sync_marks(marks_filename)
+        mark_key = _build_query(params, "bill")
+        mark = marks.get(mark_key)
+        if isinstance(mark, list):
+            # Marks were [date, id] pairs before they were just the date
+            mark = mark[0]
+        newest = mark
+
+        query = dict(params)
+        query['order_by'] = "current_status_date"
+        if mark is not None:
+            query['current_status_date__gte'] = mark
+
+        store = _open_warm_store(filename)
+        changed = []
+        try:
+            offset = 0
+            while True:
+                body = self._fetch_page(query, "bill", offset, page_size)
+                fields = {}
+                count = 0
+                for json_dict in _iter_objects(body, fields):
+                    count += 1
+                    try:
+                        date = json_dict['current_status_date']
+                        key = _cache_key(_bill_url(json_dict['id']))
+                    except KeyError:
+                        raise GovTrackException(
+                            "The given information was incomplete.")
+                    if mark is not None and date <= mark and \
+                            _synced_bill(store, key) == json_dict:
+                        continue
+                    bill = Bill._from_json(
+                        _recursively_convert_unicode_to_str(json_dict))
+                    store.remove(key)
+                    store.add(key, json.dumps({"meta": {"total_count": 1},
+                                               "objects": [json_dict]}),
+                              "repeat")
+                    changed.append(_to_result(bill))
+                    if newest is None or date > newest:
+                        newest = date
+                offset += count
+                if not count or offset >= _total_count(fields):
+                    break
+            if changed:
+                _save_warm_store(filename, store)
+                marks[mark_key] = newest
+                _save_sync_marks(marks_filename, marks)
+        finally:
+            store.close()
+        if changed and os.path.exists(filename + _INDEX_SUFFIX):
+            # The offline bill index is rebuilt from the synced cache
+            os.remove(filename + _INDEX_SUFFIX)
+        return changed
+
+
+_DEFAULT_CLIENT = GovTrackClient()
+
+# The module-level API is the default client's
+configure_connections = _DEFAULT_CLIENT.configure_connections
+close_connections = _DEFAULT_CLIENT.close_connections
+configure_response_cache = _DEFAULT_CLIENT.configure_response_cache
+clear_response_cache = _DEFAULT_CLIENT.clear_response_cache
+share_responses = _DEFAULT_CLIENT.share_responses
+get_coalescing_stats = _DEFAULT_CLIENT.get_coalescing_stats
+set_cache_store = _DEFAULT_CLIENT.set_cache_store
+connect = _DEFAULT_CLIENT.connect
+disconnect = _DEFAULT_CLIENT.disconnect
+get_senators = _DEFAULT_CLIENT.get_senators
+get_representatives = _DEFAULT_CLIENT.get_representatives
+get_bills_by_keyword = _DEFAULT_CLIENT.get_bills_by_keyword
+get_officials_by_party = _DEFAULT_CLIENT.get_officials_by_party
+get_senators_by_party = _DEFAULT_CLIENT.get_senators_by_party
+get_representatives_by_party = _DEFAULT_CLIENT.get_representatives_by_party
+get_roster = _DEFAULT_CLIENT.get_roster
+refresh_roster = _DEFAULT_CLIENT.refresh_roster
+find_officials = _DEFAULT_CLIENT.find_officials
+search_bills = _DEFAULT_CLIENT.search_bills
+iter_roles = _DEFAULT_CLIENT.iter_roles
+iter_bills = _DEFAULT_CLIENT.iter_bills
+get_senators_table = _DEFAULT_CLIENT.get_senators_table
+get_representatives_table = _DEFAULT_CLIENT.get_representatives_table
+get_bills_by_keyword_table = _DEFAULT_CLIENT.get_bills_by_keyword_table
+get_roles_table = _DEFAULT_CLIENT.get_roles_table
+get_bills_table = _DEFAULT_CLIENT.get_bills_table
+get_senators_async = _DEFAULT_CLIENT.get_senators_async
+get_representatives_async = _DEFAULT_CLIENT.get_representatives_async
+get_bills_by_keyword_async = _DEFAULT_CLIENT.get_bills_by_keyword_async
+warm_cache = _DEFAULT_CLIENT.warm_cache
+sync_bills = _DEFAULT_CLIENT.sync_bills
+_get = _DEFAULT_CLIENT._get
+_get_raw = _DEFAULT_CLIENT._get_raw
+_start_editing = _DEFAULT_CLIENT._start_editing
+_stop_editing = _DEFAULT_CLIENT._stop_editing
+_add_to_cache = _DEFAULT_CLIENT._add_to_cache
+_clear_key = _DEFAULT_CLIENT._clear_key
+_save_cache = _DEFAULT_CLIENT._save_cache
+_lookup = _DEFAULT_CLIENT._lookup
+_fetch_govtrack_info = _DEFAULT_CLIENT._fetch_govtrack_info
+_fetch_query = _DEFAULT_CLIENT._fetch_query
+_fetch_govtrack_info_async = _DEFAULT_CLIENT._fetch_govtrack_info_async
+
+
+# Command Line
+
+def main(argv=None):
+    """
+    The command line interface, run as `python -m govtrack`.
+
+    `warm CACHE [--congress N]... [--keyword WORDS]... [--workers N]`
+    fills a cache store with :ref:`warm_cache`.
+
+    `sync CACHE [--congress N] [--keyword WORDS]` fetches the bills changed
+    since the last sync into a cache store with :ref:`sync_bills`.
+
+    `migrate CACHE` moves a cache recorded by an older version of this
+    library under request keys with :ref:`migrate_cache`.
+
+    :param argv: the arguments, or None for the process's own
+    :returns: the *int* exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="govtrack", description="Tools for the GovTrack library.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    warm = commands.add_parser(
+        "warm", help="crawl current members of congress and bills into a "
+                     "cache store")
+    warm.add_argument("cache", help="the cache to fill (.json, .snapshot, or "
+                                    "a SQLite store)")
+    warm.add_argument("--congress", type=int, action="append", default=[],
+                      help="crawl the bills of this congress (repeatable)")
+    warm.add_argument("--keyword", action="append", default=[],
+                      help="crawl the bills of this keyword search "
+                           "(repeatable)")
+    warm.add_argument("--workers", type=int, default=_WARM_WORKERS,
+                      help="how many pages to fetch at once")
+    warm.add_argument("--page-size", type=int, default=_PAGE_SIZE,
+                      help="how many objects to request per page")
+    sync = commands.add_parser(
+        "sync", help="fetch the bills changed since the last sync into a "
+                     "cache store")
+    sync.add_argument("cache", help="the cache to sync (.json, .snapshot, or "
+                                    "a SQLite store)")
+    sync.add_argument("--congress", type=int,
+                      help="sync the bills of this congress")
+    sync.add_argument("--keyword", help="sync the bills of this keyword "
+                                        "search")
+    sync.add_argument("--page-size", type=int, default=_PAGE_SIZE,
+                      help="how many bills to request per page")
+    migrate = commands.add_parser(
+        "migrate", help="move the responses of an older cache under request "
+                        "keys")
+    migrate.add_argument("cache", help="the cache to migrate (.json, "
+                                       ".snapshot, or a SQLite store)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "migrate":
+            before, after = migrate_cache(args.cache)
+        elif args.command == "sync":
+            bills = sync_bills(args.cache, args.keyword, args.congress,
+                               args.page_size)
+        else:
+            pages = warm_cache(args.cache, args.congress, args.keyword,
+                               args.workers, args.page_size)
+    except GovTrackException as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.command == "migrate":
+        print("Moved {} entries under {} request keys in {}".format(
+            before, after, args.cache))
+    elif args.command == "sync":
+        print("Synced {} changed bills into {}".format(len(bills),
+                                                       args.cache))
+    else:
+        print("Stored {} pages in {}".format(pages, args.cache))
+    return 0
 
-    bills = []
-    for json_dict in json_list:
-        bill = Bill._from_json(json_dict)
-        bills.append(bill._to_dict())
 
-    return bills
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,417 @@
 import unittest
 
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
 import sys
+import tempfile
+import threading
+import gzip
+import io
+import time
+import zlib
 
 sys.path.append("../src")
 
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlsplit
+
 try:
     import govtrack
 except ImportError:
     from python.src import govtrack
 
 
+def make_role(index, party="Democrat", role_type="senator"):
+    return {"current": True, "description": "Role {}".format(index),
+            "district": None if role_type == "senator" else index % 50,
+            "enddate": "2015-01-03", "id": index, "leadership_title": None,
+            "party": party,
+            "person": {"id": 400000 + index,
+                       "name": "Member {} [{}]".format(index, party[0])},
+            "role_type": role_type, "startdate": "2009-01-06",
+            "state": ["CO", "NM", "CA", "IL"][index % 4], "title": "Sen.",
+            "title_long": "Senator" if role_type == "senator"
+            else "Representative",
+            "website": "http://member{}.senate.gov".format(index)}
+
+
+def make_bill(index, keyword="healthcare"):
+    return {"congress": 93 + index % 20,
+            "current_status_description": "Introduced {}".format(index),
+            "id": 200000 + index, "introduced_date": "1973-04-10",
+            "is_alive": False, "is_current": False, "number": index,
+            "title": "H.R. {}: {} Act".format(index, keyword.title())}
+
+
+def projected(objects, params):
+    """
+    *objects* with only the fields named by the request's `fields`
+    parameter, if it has one, as GovTrack serves them. Fields an object
+    lacks are left out.
+    """
+    if "fields" not in params:
+        return objects
+    fields = params["fields"][0].split(",")
+    result = []
+    for obj in objects:
+        projection = {}
+        for field in fields:
+            if "__" in field:
+                outer, inner = field.split("__")
+                projection.setdefault(outer, {})[inner] = obj[outer][inner]
+            elif field in obj:
+                projection[field] = obj[field]
+        result.append(projection)
+    return result
+
+
+def paginated(objects):
+    """
+    A stand-in route that serves *objects* with GovTrack's offset/limit
+    pagination and field projection.
+    """
+    def route(handler):
+        params = parse_qs(urlsplit(handler.path).query)
+        offset = int(params.get("offset", ["0"])[0])
+        limit = int(params.get("limit", ["100"])[0])
+        return json.dumps({"meta": {"limit": limit, "offset": offset,
+                                    "total_count": len(objects)},
+                           "objects": projected(objects[offset:offset + limit],
+                                                params)})
+    return route
+
+
+def expanded(entry):
+    """
+    A cache entry with its compressed responses decompressed.
+    """
+    return [entry[0]] + [govtrack._decompress_response(value)
+                         for value in entry[1:]]
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    """
+    A local HTTP/1.1 server that stands in for www.govtrack.us. *routes* maps
+    a request path, with or without its query string, to a response body or
+    to a callable producing one; any other path answers 404. A route may
+    also produce a (status, headers) pair to answer with an empty error. Every request
+    and every accepted connection is counted. With *compress*, bodies are
+    gzipped for clients that accept it.
+    """
+    daemon_threads = True
+
+    def __init__(self, routes=None, compress=False):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StandInHandler)
+        self.routes = routes or {}
+        self.compress = compress
+        self.accept_encodings = []
+        self.requests = []
+        self.connections = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       args=(0.01,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}".format(self.server_address[1])
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            self.server.accept_encodings.append(
+                self.headers.get("Accept-Encoding"))
+        route = self.server.routes.get(self.path)
+        if route is None:
+            route = self.server.routes.get(urlsplit(self.path).path)
+        if callable(route):
+            route = route(self)
+        if route is None:
+            route = (404, {})
+        if isinstance(route, tuple):
+            status, headers = route
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = route.encode("utf-8")
+        etag = '"{}"'.format(zlib.crc32(body) & 0xffffffff)
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if (self.server.compress and
+                "gzip" in self.headers.get("Accept-Encoding", "")):
+            buffer = io.BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
+                f.write(body)
+            body = buffer.getvalue()
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServerTestCase(unittest.TestCase):
+    """
+    A test case served by a StandInServer: call *serve* from setUp. When
+    the test ends the server is stopped, the base url and the response cache
+    are restored, and the library is put back on the recorded cache.
+    """
+
+    def serve(self, routes, compress=False, point=True, connect=True):
+        """
+        Start a StandInServer for *routes*. With *point*, the library's base
+        url is pointed at it, and with *connect* the library goes online.
+        """
+        self.server = StandInServer(routes, compress)
+        self.base_url = govtrack._BASE_URL
+        self.addCleanup(self.stop_serving)
+        govtrack.clear_response_cache()
+        if point or connect:
+            govtrack._BASE_URL = self.server.url + "/api/v2/"
+        if connect:
+            govtrack.connect()
+
+    def stop_serving(self):
+        govtrack.clear_response_cache()
+        govtrack._BASE_URL = self.base_url
+        self.server.stop()
+        govtrack.disconnect("../src/govtrack_cache.json")
+
+
+class TestResultObjects(unittest.TestCase):
+    def setUp(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+
+    def tearDown(self):
+        govtrack.use_dicts()
+
+    def test_objects_carry_the_same_fields(self):
+        expected = govtrack.get_senators("Democrat")
+        govtrack.use_objects()
+        senators = govtrack.get_senators("Democrat")
+        self.assertTrue(all(isinstance(senator, govtrack.PublicOfficial)
+                            for senator in senators))
+        self.assertEqual(expected, [senator._to_dict() for senator in senators])
+
+        bills = govtrack.get_bills_by_keyword("healthcare")
+        self.assertTrue(all(isinstance(bill, govtrack.Bill) for bill in bills))
+
+    def test_objects_are_compact(self):
+        bill = govtrack.Bill(title="A bill")
+        self.assertFalse(hasattr(bill, "__dict__"))
+        self.assertRaises(AttributeError, setattr, bill, "extra", 1)
+
+
+class TestFieldProjection(StandInServerTestCase):
+    def setUp(self):
+        roles = [make_role(i) for i in range(3)]
+        bills = [make_bill(i) for i in range(3)]
+
+        def served(objects):
+            def route(handler):
+                params = parse_qs(urlsplit(handler.path).query)
+                return json.dumps({"objects": projected(objects, params)})
+            return route
+
+        self.serve({"/api/v2/role": served(roles),
+                    "/api/v2/bill": served(bills)})
+
+    def tearDown(self):
+        govtrack.set_field_projection(True)
+
+    def test_projection_is_derived_from_the_domain_objects(self):
+        govtrack.get_senators("Democrat")
+        govtrack.get_bills_by_keyword("healthcare")
+        role_fields = parse_qs(urlsplit(self.server.requests[0]).query)
+        bill_fields = parse_qs(urlsplit(self.server.requests[1]).query)
+        self.assertEqual(list(govtrack.PublicOfficial._FIELDS.values()) +
+                         list(govtrack._ROSTER_FIELDS),
+                         role_fields["fields"][0].split(","))
+        self.assertIn("person__name", role_fields["fields"][0])
+        self.assertEqual(list(govtrack.Bill._FIELDS.values()) +
+                         list(govtrack._SYNC_FIELDS),
+                         bill_fields["fields"][0].split(","))
+
+    def test_projection_does_not_change_results(self):
+        projected = (govtrack.get_senators("Democrat"),
+                     govtrack.get_bills_by_keyword("healthcare"),
+                     govtrack.get_senators_table("Democrat").rows())
+        govtrack.set_field_projection(False)
+        govtrack.clear_response_cache()
+        self.assertEqual(projected,
+                         (govtrack.get_senators("Democrat"),
+                          govtrack.get_bills_by_keyword("healthcare"),
+                          govtrack.get_senators_table("Democrat").rows()))
+        self.assertNotIn("fields=", self.server.requests[-1])
+
+
+class TestResultTables(unittest.TestCase):
+    def setUp(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+
+    def test_tables_match_dicts(self):
+        self.assertEqual(govtrack.get_senators("Democrat"),
+                         govtrack.get_senators_table("Democrat").rows())
+        self.assertEqual(govtrack.get_representatives("Democrat"),
+                         govtrack.get_representatives_table("Democrat").rows())
+        bills = govtrack.get_bills_by_keyword("healthcare")
+        table = govtrack.get_bills_by_keyword_table("healthcare")
+        self.assertEqual(bills, table.rows())
+        self.assertEqual(bills[3], table.row(3))
+        self.assertEqual([bill["title"] for bill in bills],
+                         table.column("title"))
+
+    def test_filter_group_and_count(self):
+        reps = govtrack.get_representatives("Democrat")
+        table = govtrack.get_representatives_table("Democrat")
+
+        california = table.filter(state="CA")
+        self.assertEqual([rep for rep in reps if rep["state"] == "CA"],
+                         california.rows())
+        self.assertEqual(
+            [rep for rep in reps if rep["state"] in ("CA", "NY") and
+             rep["district"] == 1],
+            table.filter(state=["CA", "NY"], district=1).rows())
+        self.assertEqual(0, len(table.filter(state="Nowhere")))
+
+        counts = table.count_by("state")
+        self.assertEqual(len(california), counts["CA"])
+        self.assertEqual(len(reps), sum(counts.values()))
+        groups = table.group_by("state")
+        self.assertEqual(california.rows(), groups["CA"].rows())
+        self.assertEqual(sorted(counts), sorted(table.categories("state")))
+
+    def test_unknown_columns_raise(self):
+        table = govtrack.get_senators_table("Democrat")
+        self.assertRaises(govtrack.GovTrackException, table.column, "party")
+        self.assertRaises(govtrack.GovTrackException, table.categories, "name")
+
+    def test_numpy_output(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+        table = govtrack.get_senators_table("Democrat")
+        arrays = table.to_numpy()
+        states = table.categories("state")
+        self.assertEqual(table.column("state"),
+                         [states[code] for code in arrays["state"]])
+
+
+class TestConnectionPool(StandInServerTestCase):
+    def setUp(self):
+        self.serve({"/ping": '{"pong": true}'}, point=False, connect=False)
+
+    def tearDown(self):
+        govtrack.configure_connections()
+
+    def test_connections_are_reused(self):
+        govtrack.configure_connections(pool_size=2)
+        for i in range(5):
+            self.assertEqual('{"pong": true}', govtrack._get(
+                self.server.url + "/ping?n={}".format(i)))
+        self.assertEqual(5, len(self.server.requests))
+        self.assertEqual(1, self.server.connections)
+
+    def test_requests_go_through_the_environment_proxy(self):
+        pool = govtrack._ConnectionPool()
+        pool.proxies = {"http": "http://user:secret@" +
+                                self.server.url.split("://")[1]}
+        status, headers, body = pool.request("http://govtrack.invalid/ping")
+        pool.close()
+        self.assertEqual(b'{"pong": true}', body)
+        self.assertEqual(["http://govtrack.invalid/ping"],
+                         self.server.requests)
+
+    def test_idle_connections_are_evicted(self):
+        govtrack.configure_connections(idle_timeout=0.05)
+        govtrack._get(self.server.url + "/ping?n=1")
+        time.sleep(0.1)
+        govtrack._get(self.server.url + "/ping?n=2")
+        self.assertEqual(2, self.server.connections)
+
+    def test_concurrent_requests_are_bounded_by_pool_size(self):
+        govtrack.configure_connections(pool_size=2)
+        threads = [threading.Thread(
+            target=govtrack._get,
+            args=(self.server.url + "/ping?n={}".format(i),))
+            for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, len(govtrack._DEFAULT_CLIENT.pool._idle[
+            ("http", "127.0.0.1", self.server.server_address[1])]))
+
+    def test_http_errors_are_raised(self):
+        self.assertRaises(govtrack._HTTPError, govtrack._get,
+                          self.server.url + "/missing")
+
+    def test_compressed_responses_are_decompressed(self):
+        body = json.dumps({"objects": [make_bill(i) for i in range(500)]})
+        server = StandInServer({"/bills": body}, compress=True)
+        try:
+            self.assertEqual(body, govtrack._get(server.url + "/bills"))
+            self.assertIn("gzip", server.accept_encodings[0])
+        finally:
+            server.stop()
+
+    def test_raw_deflate_responses_are_decompressed(self):
+        body = json.dumps({"objects": [make_bill(i) for i in range(500)]})
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        deflated = compressor.compress(body.encode("utf-8")) + compressor.flush()
+
+        class RawDeflateResponse(object):
+            def __init__(self):
+                self.body = io.BytesIO(deflated)
+
+            def getheader(self, name):
+                return "deflate" if name == "Content-Encoding" else None
+
+            def read(self, size=-1):
+                return self.body.read(size)
+
+        self.assertEqual(body.encode("utf-8"),
+                         govtrack._read_body(RawDeflateResponse()))
+
+
 class TestGovTrack(unittest.TestCase):
     # @unittest.skip("demonstrating skipping")
     def test_method_online(self):
@@ -88,3 +490,1344 @@ class TestGovTrack(unittest.TestCase):
             intersection = set(keys).intersection(bill)
             self.assertEqual(7, len(intersection))
 
+
+
+class TestRateLimiting(StandInServerTestCase):
+    def setUp(self):
+        self.throttles = []
+
+        def throttled(handler):
+            if self.throttles:
+                return 429, self.throttles.pop(0)
+            return paginated([make_bill(1)])(handler)
+
+        self.serve({"/api/v2/bill": throttled})
+
+    def tearDown(self):
+        govtrack.configure_rate_limit()
+
+    def test_throttled_requests_are_retried_after_retry_after(self):
+        govtrack.configure_rate_limit(backoff=0.01)
+        self.throttles = [{"Retry-After": "0.2"}, {}]
+        start = time.time()
+        self.assertEqual(1, len(govtrack.get_bills_by_keyword("dental")))
+        self.assertGreaterEqual(time.time() - start, 0.2)
+        self.assertEqual(3, len(self.server.requests))
+        stats = govtrack.get_rate_limit_stats()
+        self.assertEqual((2, 2), (stats["throttled"], stats["retries"]))
+        self.assertLess(stats["concurrency"], 8)
+
+    def test_persistent_throttling_raises(self):
+        govtrack.configure_rate_limit(max_retries=2, backoff=0.01)
+        self.throttles = [{"Retry-After": "0"}] * 5
+        with self.assertRaises(govtrack.GovTrackRateLimitException) as raised:
+            govtrack.get_bills_by_keyword("dental")
+        self.assertEqual(0.0, raised.exception.retry_after)
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_long_retry_after_is_not_waited_for(self):
+        govtrack.configure_rate_limit(max_backoff=1.0)
+        self.throttles = [{"Retry-After": "120"}]
+        with self.assertRaises(govtrack.GovTrackRateLimitException) as raised:
+            govtrack.get_bills_by_keyword("dental")
+        self.assertEqual(120.0, raised.exception.retry_after)
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_long_retry_after_does_not_pause_other_requests(self):
+        govtrack.configure_rate_limit(max_backoff=0.2)
+        self.throttles = [{"Retry-After": "3600"}]
+        self.assertRaises(govtrack.GovTrackRateLimitException,
+                          govtrack.get_bills_by_keyword, "dental")
+        start = time.time()
+        self.assertEqual(1, len(govtrack.get_bills_by_keyword("healthcare")))
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_requests_are_paced(self):
+        govtrack.configure_rate_limit(rate=20, burst=1)
+        start = time.time()
+        for i in range(6):
+            govtrack.get_bills_by_keyword("dental {}".format(i))
+        self.assertGreaterEqual(time.time() - start, 0.24)
+
+    def test_concurrency_adapts(self):
+        limiter = govtrack._RateLimiter(initial_concurrency=4,
+                                        max_concurrency=8)
+        for _ in range(40):
+            limiter.release(limiter.acquire())
+        self.assertEqual(8, limiter.stats()["concurrency"])
+
+        # Requests throttled together only halve the limit once
+        tickets = [limiter.acquire() for _ in range(4)]
+        for ticket in tickets:
+            limiter.release(ticket, throttled=True)
+        self.assertEqual(4, limiter.stats()["concurrency"])
+        limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(2, limiter.stats()["concurrency"])
+
+    def test_retry_after_dates(self):
+        self.assertEqual(None, govtrack._retry_after({}))
+        self.assertEqual(3.0, govtrack._retry_after({"Retry-After": "3"}))
+        self.assertEqual(0.0, govtrack._retry_after(
+            {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+
+
+class TestMetrics(StandInServerTestCase):
+    # Python 2 converts the text of every response to str
+    converted = set() if govtrack.PYTHON_3 else set(["convert"])
+
+    def setUp(self):
+        self.records = []
+        self.body = json.dumps({"meta": {"total_count": 300},
+                                "objects": [make_bill(i) for i in range(300)]})
+        self.serve({"/api/v2/bill": self.body}, compress=True, point=False,
+                   connect=False)
+
+    def tearDown(self):
+        govtrack.disable_metrics()
+        govtrack.configure_response_cache()
+
+    def test_metrics_are_opt_in(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+        govtrack.get_senators("Democrat")
+        self.assertEqual({}, govtrack.get_metrics()["counters"])
+
+    def test_offline_phases_and_records(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+        govtrack.enable_metrics(self.records.append)
+        govtrack.get_senators("Democrat")
+
+        self.assertEqual(1, len(self.records))
+        record = self.records[0]
+        self.assertIn("role_type=senator", record["url"])
+        self.assertEqual(set(["decode", "parse", "build"]) | self.converted,
+                         set(record["phases"]))
+        self.assertEqual({"replay_hits": 1}, record["counters"])
+        self.assertGreaterEqual(record["seconds"],
+                                sum(record["phases"].values()))
+        self.assertEqual(1, govtrack.get_metrics()["phases"]["build"]["count"])
+
+    def test_online_phases_and_counters(self):
+        govtrack._BASE_URL = self.server.url + "/api/v2/"
+        govtrack.connect()
+        govtrack.enable_metrics(self.records.append)
+        govtrack.get_bills_by_keyword("dental")
+        govtrack.get_bills_by_keyword("dental")
+
+        self.assertEqual(set(["connect", "ttfb", "download", "decode",
+                              "parse", "build"]) | self.converted,
+                         set(self.records[0]["phases"]))
+        counters = govtrack.get_metrics()["counters"]
+        self.assertEqual(1, counters["http_requests"])
+        self.assertEqual(1, counters["response_cache_misses"])
+        self.assertEqual(1, counters["response_cache_hits"])
+        self.assertLess(0, counters["bytes_received"])
+        self.assertLess(counters["bytes_received"], len(self.body))
+        self.assertEqual({"response_cache_hits": 1},
+                         self.records[1]["counters"])
+
+        exported = govtrack.export_metrics_prometheus()
+        self.assertIn("# TYPE govtrack_response_cache_hits_total counter\n"
+                      "govtrack_response_cache_hits_total 1\n", exported)
+        self.assertIn('govtrack_phase_seconds_count{phase="ttfb"} 1\n',
+                      exported)
+
+    def test_evictions_are_counted(self):
+        govtrack._BASE_URL = self.server.url + "/api/v2/"
+        govtrack.connect()
+        govtrack.configure_response_cache(max_entries=1)
+        govtrack.enable_metrics()
+        govtrack.get_bills_by_keyword("dental")
+        govtrack.get_bills_by_keyword("vision")
+        self.assertEqual(
+            1, govtrack.get_metrics()["counters"]["response_cache_evictions"])
+
+    def test_errors_are_recorded(self):
+        govtrack._BASE_URL = self.server.url + "/missing/"
+        govtrack.connect()
+        govtrack.enable_metrics(self.records.append)
+        self.assertRaises(govtrack.GovTrackException,
+                          govtrack.get_bills_by_keyword, "dental")
+        self.assertIn("GovTrackException", self.records[0]["error"])
+
+
+class TestResponseCache(StandInServerTestCase):
+    def setUp(self):
+        self.serve({"/ping": '{"pong": true}'}, point=False, connect=False)
+        self.url = self.server.url + "/ping"
+
+    def tearDown(self):
+        govtrack.configure_response_cache()
+
+    def test_fresh_responses_skip_the_network(self):
+        govtrack.configure_response_cache(default_ttl=60)
+        for _ in range(3):
+            self.assertEqual('{"pong": true}', govtrack._get(self.url))
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_expired_responses_are_revalidated(self):
+        govtrack.configure_response_cache(default_ttl=0)
+        self.assertEqual('{"pong": true}', govtrack._get(self.url))
+        self.assertEqual('{"pong": true}', govtrack._get(self.url))
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual(1, self.server.not_modified)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        govtrack.configure_response_cache(max_entries=2)
+        for i in range(3):
+            govtrack._get(self.url + "?n={}".format(i))
+        govtrack._get(self.url + "?n=0")
+        self.assertEqual(4, len(self.server.requests))
+        self.assertEqual(2, len(govtrack._DEFAULT_CLIENT.response_cache))
+
+    def test_expired_responses_without_validators_are_dropped(self):
+        cache = govtrack._ResponseCache(default_ttl=0)
+        cache.put("http://example.com/a", b"stale")
+        cache.put("http://example.com/b", b"stale", etag='"1"')
+        self.assertIsNone(cache.get("http://example.com/a"))
+        self.assertEqual(b"stale", cache.get("http://example.com/b").body)
+        self.assertEqual((1, 5), (len(cache), cache.size))
+
+    def test_ttls_are_per_endpoint(self):
+        cache = govtrack._ResponseCache({"role": 10}, default_ttl=1)
+        self.assertEqual(10, cache.ttl(govtrack._BASE_URL + "role?current=True"))
+        self.assertEqual(1, cache.ttl(govtrack._BASE_URL + "bill?q=tax"))
+
+
+class TestDecoding(unittest.TestCase):
+    def test_incremental_decoding_matches_json(self):
+        bodies = [
+            '{ "meta": {"total_count": 2},\n  "objects": [ {"objects": [1]} ,\n'
+            '  {"title": "a  b\\n c"} ] }',
+            '{"objects": [], "meta": {"total_count": 0}}',
+            '{"objects": [{"id": 1}], "meta": {"total_count": 1}}',
+            '{}',
+        ]
+        for body in bodies:
+            fields = {}
+            objects = list(govtrack._iter_objects(body.encode("utf-8"), fields))
+            expected = json.loads(body)
+            self.assertEqual(expected.pop("objects", []), objects)
+            self.assertEqual(expected, fields)
+
+    def test_comment_markers_are_stripped(self):
+        body = b'// {"objects": [], "meta": {"link": "http:// x"}}'
+        self.assertEqual({"objects": [], "meta": {"link": "http:x"}},
+                         govtrack._decode_response(body))
+
+    def test_malformed_bodies_raise(self):
+        for body in (b'{"objects": [1 2]}', b'{"objects": [1'):
+            self.assertRaises(govtrack.GovTrackException, list,
+                              govtrack._iter_objects(body, {}))
+            self.assertRaises(govtrack.GovTrackException,
+                              govtrack._decode_response, body)
+        self.assertRaises(govtrack.GovTrackException, list,
+                          govtrack._iter_objects(b'[1]', {}))
+
+
+class TestPagination(StandInServerTestCase):
+    def setUp(self):
+        self.roles = [make_role(i) for i in range(250)]
+        self.bills = [make_bill(i) for i in range(120)]
+        self.serve({"/api/v2/role": paginated(self.roles),
+                    "/api/v2/bill": paginated(self.bills)})
+
+    def test_iter_roles_follows_pagination(self):
+        roles = list(govtrack.iter_roles("Democrat", "senator",
+                                         page_size=100))
+        self.assertEqual(250, len(roles))
+        self.assertEqual(3, len(self.server.requests))
+        self.assertEqual([govtrack.PublicOfficial._from_json(r)._to_dict()
+                          for r in self.roles], roles)
+
+    def test_iter_bills_without_prefetch(self):
+        bills = list(govtrack.iter_bills("healthcare", page_size=50,
+                                         prefetch=False))
+        self.assertEqual([govtrack.Bill._from_json(b)._to_dict()
+                          for b in self.bills], bills)
+
+    def test_every_result_carries_the_same_text(self):
+        self.roles[1]["person"]["name"] = u"Sen. \u201cTom\u201d Harkin"
+        senators = govtrack.get_senators("Democrat")
+        self.assertEqual("Sen. ?Tom? Harkin", senators[1]["name"])
+        self.assertEqual(senators, list(govtrack.iter_roles(
+            "Democrat", "senator"))[:100])
+        self.assertEqual(senators, govtrack.get_roles_table(
+            "Democrat", "senator").rows()[:100])
+        govtrack.use_objects()
+        try:
+            self.assertEqual(senators, [official._to_dict() for official in
+                                        govtrack.iter_roles("Democrat",
+                                                            "senator")][:100])
+        finally:
+            govtrack.use_dicts()
+
+    def test_pages_without_meta_raise(self):
+        self.server.routes["/api/v2/bill"] = json.dumps(
+            {"objects": [make_bill(1)]})
+        self.assertRaises(govtrack.GovTrackException, list,
+                          govtrack.iter_bills("healthcare"))
+
+    def test_roles_table_follows_pagination(self):
+        table = govtrack.get_roles_table("Democrat", "senator", page_size=100)
+        self.assertEqual(list(govtrack.iter_roles("Democrat", "senator")),
+                         table.rows())
+
+    def test_iter_roles_is_lazy(self):
+        roles = govtrack.iter_roles(page_size=100, prefetch=False)
+        next(roles)
+        self.assertEqual(1, len(self.server.requests))
+        roles.close()
+
+    def test_parse_workers_keep_results_and_order(self):
+        sequential = (list(govtrack.iter_roles(page_size=30)),
+                      list(govtrack.iter_bills("healthcare", page_size=7)))
+        govtrack.set_parse_workers(2)
+        try:
+            self.assertEqual(sequential,
+                             (list(govtrack.iter_roles(page_size=30)),
+                              list(govtrack.iter_bills("healthcare",
+                                                       page_size=7))))
+            govtrack.use_objects()
+            bills = list(govtrack.iter_bills("healthcare", page_size=50))
+        finally:
+            govtrack.use_dicts()
+            govtrack.set_parse_workers(0)
+        self.assertIsInstance(bills[0], govtrack.Bill)
+        self.assertEqual(sequential[1], [bill._to_dict() for bill in bills])
+
+    def test_parse_workers_honour_prefetch(self):
+        govtrack.set_parse_workers(2)
+        try:
+            roles = govtrack.iter_roles(page_size=100, prefetch=False)
+            for _ in range(100):
+                next(roles)
+            self.assertEqual(1, len(self.server.requests))
+            next(roles)
+            self.assertEqual(2, len(self.server.requests))
+            roles.close()
+        finally:
+            govtrack.set_parse_workers(0)
+
+
+def filtered(objects):
+    """
+    A stand-in route that serves the *objects* matching the request's
+    role_type and party filters, paginated.
+    """
+    def route(handler):
+        params = parse_qs(urlsplit(handler.path).query)
+        matching = [obj for obj in objects
+                    if all(obj[name] == params[name][0]
+                           for name in ("role_type", "party")
+                           if name in params)]
+        return paginated(matching)(handler)
+    return route
+
+
+class TestBatchedRoles(StandInServerTestCase):
+    def setUp(self):
+        parties = ["Democrat", "Republican", "Independent"]
+        self.roles = [make_role(i, parties[i % 7 % 3],
+                                ["senator", "representative"][i % 2])
+                      for i in range(230)]
+        self.serve({"/api/v2/role": filtered(self.roles)})
+
+    def test_batch_matches_per_party_calls(self):
+        parties = ["Democrat", "Republican", "Independent"]
+        batched = govtrack.get_officials_by_party(parties)
+        self.assertEqual(3, len(self.server.requests))
+        self.assertTrue(all("role_type=" not in request
+                            for request in self.server.requests))
+        self.assertEqual(["senator", "representative"], list(batched))
+        self.assertEqual(parties, list(batched["senator"]))
+        for party in parties:
+            self.assertEqual(govtrack.get_senators(party),
+                             batched["senator"][party])
+            self.assertEqual(govtrack.get_representatives(party),
+                             batched["representative"][party])
+
+    def test_single_chamber_is_filtered_by_the_server(self):
+        senators = govtrack.get_senators_by_party(["Independent", "Democrat"])
+        self.assertEqual(2, len(self.server.requests))
+        self.assertIn("role_type=senator", self.server.requests[0])
+        fields = parse_qs(urlsplit(self.server.requests[0]).query)["fields"]
+        self.assertTrue(fields[0].endswith(",role_type,party"))
+        self.assertEqual(["Independent", "Democrat"], list(senators))
+        self.assertEqual(govtrack.get_senators("Independent"),
+                         senators["Independent"])
+        self.assertEqual({"Green": []},
+                         govtrack.get_representatives_by_party(["Green"]))
+
+    def test_parties_spanning_several_pages_are_complete(self):
+        senators = govtrack.get_senators_by_party(["Democrat"], page_size=10)
+        expected = [govtrack.PublicOfficial._from_json(role)._to_dict()
+                    for role in self.roles
+                    if role["role_type"] == "senator" and
+                    role["party"] == "Democrat"]
+        self.assertGreater(len(expected), 10)
+        self.assertEqual(expected, senators["Democrat"])
+
+    def test_party_spellings_match_per_party_calls(self):
+        senators = govtrack.get_senators_by_party(["democrat", "REPUBLICAN "])
+        self.assertEqual(["democrat", "REPUBLICAN "], list(senators))
+        self.assertTrue(senators["democrat"])
+        self.assertEqual(govtrack.get_senators("democrat"),
+                         senators["democrat"])
+        self.assertEqual(govtrack.get_senators("Republican"),
+                         senators["REPUBLICAN "])
+
+    def test_invalid_batches_raise(self):
+        self.assertRaises(govtrack.GovTrackException,
+                          govtrack.get_officials_by_party, "Democrat")
+        self.assertRaises(govtrack.GovTrackException,
+                          govtrack.get_officials_by_party, ["Democrat"],
+                          ["president"])
+
+
+class TestRoster(StandInServerTestCase):
+    def setUp(self):
+        parties = ["Democrat", "Republican", "Independent"]
+        self.roles = [make_role(i, parties[i % 7 % 3],
+                                ["senator", "representative"][i % 2])
+                      for i in range(230)]
+        self.roles[3]["leadership_title"] = "Majority Whip"
+        self.release = threading.Event()
+        self.release.set()
+
+        def roles(handler):
+            self.release.wait()
+            return filtered(self.roles)(handler)
+
+        self.serve({"/api/v2/role": roles}, connect=False)
+        self.client = govtrack.GovTrackClient()
+
+    def tearDown(self):
+        self.release.set()
+        self.client.close()
+
+    def scan(self, **criteria):
+        officials = []
+        for role in self.roles:
+            official = govtrack.PublicOfficial._from_json(role)._to_dict()
+            official["party"] = role["party"]
+            if all(official[name] == value
+                   for name, value in criteria.items()):
+                del official["party"]
+                officials.append(official)
+        return officials
+
+    def test_lookups_match_a_scan(self):
+        self.assertEqual(self.scan(state="CO", party="Democrat"),
+                         self.client.find_officials(state="CO",
+                                                    party="Democrat"))
+        self.assertEqual(self.scan(state="IL", district=7),
+                         self.client.find_officials(state="IL", district="7"))
+        self.assertEqual(self.scan(title="Senator", party="Independent"),
+                         self.client.find_officials(title="Senator",
+                                                    party="Independent"))
+        self.assertEqual(1, len(self.client.find_officials(
+            leadership_title="Majority Whip")))
+        self.assertEqual([], self.client.find_officials(state="ZZ"))
+        self.assertEqual(230, len(self.client.find_officials()))
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_roster_is_built_offline_from_recorded_roles(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = os.path.join(directory, "cache.json")
+        self.client._start_editing()
+        self.assertEqual(230, len(list(self.client.iter_roles())))
+        self.client._save_cache(cache)
+
+        offline = govtrack.GovTrackClient()
+        self.addCleanup(offline.close)
+        offline.disconnect(cache)
+        self.assertEqual(self.scan(state="CO", party="Democrat"),
+                         offline.find_officials(state="CO", party="Democrat"))
+        self.assertEqual(230, len(offline.get_roster()))
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_refresh_swaps_the_snapshot_without_blocking_readers(self):
+        before = self.client.find_officials(party="Independent")
+        self.roles.append(make_role(500, "Independent"))
+        self.client.clear_response_cache()
+        self.release.clear()
+        refresh = threading.Thread(target=self.client.refresh_roster)
+        refresh.start()
+        while len(self.server.requests) < 4:
+            time.sleep(0.01)
+        self.assertEqual(before,
+                         self.client.find_officials(party="Independent"))
+        self.release.set()
+        refresh.join()
+        after = self.client.find_officials(party="Independent")
+        self.assertEqual(len(before) + 1, len(after))
+        self.assertEqual(231, len(self.client.get_roster()))
+
+
+def record_shared(filename, worker, count):
+    """
+    Record *count* responses into a shared cache store, from another process.
+    """
+    store = govtrack.SharedCacheStore(filename)
+    for i in range(count):
+        store.add("http://example.com/{}/{}".format(worker, i),
+                  "response {}".format(i), "repeat")
+    store.add("http://example.com/all", str(worker), "repeat")
+    store.close()
+
+
+class TestSharedCache(StandInServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "cache.shared")
+        self.body = json.dumps({"meta": {"total_count": 1},
+                                "objects": [make_bill(1)]})
+        self.serve({"/api/v2/bill": self.body}, connect=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_processes_write_concurrently(self):
+        store = govtrack.SharedCacheStore(self.filename)
+        workers = [multiprocessing.Process(target=record_shared,
+                                           args=(self.filename, worker, 50))
+                   for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([0] * 4, [worker.exitcode for worker in workers])
+
+        self.assertEqual(4 * 50 + 1, len(store))
+        self.assertEqual(["response 7"],
+                         expanded(store.get("http://example.com/3/7"))[1:])
+        self.assertEqual(["0", "1", "2", "3"],
+                         sorted(expanded(store.get(
+                             "http://example.com/all"))[1:]))
+        store.close()
+
+    def test_short_lived_threads_leave_no_connections(self):
+        store = govtrack.SharedCacheStore(self.filename, pool_size=2)
+
+        def record(i):
+            store.add("http://example.com/{}".format(i), str(i), "repeat")
+            store.get("http://example.com/{}".format(i))
+
+        for _ in range(3):
+            threads = [threading.Thread(target=record, args=(i,))
+                       for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertLessEqual(len(store._idle), 2)
+        self.assertEqual(20, len(store))
+        store.close()
+        self.assertEqual([], store._idle)
+
+    def test_writes_are_visible_at_once(self):
+        reader = govtrack.SharedCacheStore(self.filename)
+        writer = govtrack.SharedCacheStore(self.filename)
+        self.assertIsNone(reader.get("http://example.com/a"))
+        writer.add("http://example.com/a", "first", "repeat")
+        self.assertEqual(["repeat", "first"],
+                         expanded(reader.get("http://example.com/a")))
+        writer.put("http://example.com/a", "second")
+        self.assertEqual(b"second",
+                         reader.get_fresh("http://example.com/a", 60))
+        self.assertIsNone(reader.get_fresh("http://example.com/a", -1))
+        writer.remove("http://example.com/a")
+        self.assertNotIn("http://example.com/a", reader)
+        reader.close()
+        writer.close()
+
+        recorder = govtrack.SharedCacheStore(self.filename)
+        recorder.add("http://example.com/b", "replayed", "repeat")
+        govtrack.disconnect(self.filename)
+        self.assertEqual("replayed", govtrack._lookup("http://example.com/b"))
+        recorder.close()
+
+    def test_live_responses_are_shared(self):
+        first = govtrack.GovTrackClient()
+        second = govtrack.GovTrackClient()
+        try:
+            first.share_responses(self.filename)
+            second.share_responses(self.filename)
+            self.assertEqual(first.get_bills_by_keyword("dental"),
+                             second.get_bills_by_keyword("dental"))
+            self.assertEqual(1, len(self.server.requests))
+
+            second.clear_response_cache()
+            second.share_responses(self.filename, max_age=0)
+            second.get_bills_by_keyword("dental")
+            self.assertEqual(2, len(self.server.requests))
+        finally:
+            first.close()
+            second.close()
+
+
+class TestCacheStores(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = os.path.join(self.directory, "cache.sqlite")
+
+    def tearDown(self):
+        govtrack.set_cache_store(govtrack._MemoryCacheStore())
+        govtrack.connect()
+        shutil.rmtree(self.directory)
+
+    def test_sqlite_store_matches_json_cache(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+        expected = (govtrack.get_senators("Democrat"),
+                    govtrack.get_representatives("Democrat"),
+                    govtrack.get_bills_by_keyword("healthcare"))
+
+        self.assertEqual(3, govtrack.import_cache_json(
+            "../src/govtrack_cache.json", self.store))
+        govtrack.disconnect(self.store)
+        self.assertEqual(expected,
+                         (govtrack.get_senators("Democrat"),
+                          govtrack.get_representatives("Democrat"),
+                          govtrack.get_bills_by_keyword("healthcare")))
+
+    def test_sqlite_store_loads_entries_lazily(self):
+        govtrack.import_cache_json("../src/govtrack_cache.json", self.store)
+        govtrack.disconnect(self.store)
+        self.assertEqual(0, len(govtrack._DEFAULT_CLIENT.cache._loaded))
+        govtrack.get_senators("Democrat")
+        self.assertEqual(1, len(govtrack._DEFAULT_CLIENT.cache._loaded))
+        self.assertEqual(3, len(govtrack._DEFAULT_CLIENT.cache))
+
+    def test_snapshot_store_matches_json_cache(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+        expected = (govtrack.get_senators("Democrat"),
+                    govtrack.get_bills_by_keyword("healthcare"))
+
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        self.assertEqual(3, govtrack.compile_cache_snapshot(
+            "../src/govtrack_cache.json", snapshot))
+        govtrack.disconnect(snapshot)
+        self.assertEqual(0, len(govtrack._DEFAULT_CLIENT.cache._loaded))
+        self.assertEqual(expected,
+                         (govtrack.get_senators("Democrat"),
+                          govtrack.get_bills_by_keyword("healthcare")))
+        self.assertEqual(2, len(govtrack._DEFAULT_CLIENT.cache._loaded))
+
+    def test_snapshot_store_saves_added_entries(self):
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        govtrack.compile_cache_snapshot("../src/govtrack_cache.json", snapshot)
+        store = govtrack.SnapshotCacheStore(snapshot)
+        store.add("http://example.com/a", '{"objects": []}', "repeat")
+        store.save()
+        store.close()
+
+        store = govtrack.SnapshotCacheStore(snapshot)
+        self.assertEqual(4, len(store))
+        self.assertEqual(["repeat", '{"objects": []}'],
+                         expanded(store.get("http://example.com/a")))
+        store.close()
+
+    def test_snapshot_journal_survives_a_crash(self):
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        store = govtrack.SnapshotCacheStore(snapshot)
+        for i in range(3):
+            store.add("http://example.com/a", str(i), "repeat")
+        store.save()
+        # No close() or compact(): the process died after recording
+
+        store = govtrack.SnapshotCacheStore(snapshot)
+        self.assertEqual(["repeat", "0", "1", "2"],
+                         expanded(store.get("http://example.com/a")))
+        store.close()
+
+    def test_snapshot_compaction(self):
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        govtrack.compile_cache_snapshot("../src/govtrack_cache.json", snapshot)
+        store = govtrack.SnapshotCacheStore(snapshot)
+        store.remove(store.keys()[0])
+        store.add("http://example.com/a", "first", "repeat")
+        store.compact()
+        self.assertEqual(0, os.path.getsize(store.journal_filename))
+        store.add("http://example.com/a", "second", "repeat")
+        store.close()
+
+        store = govtrack.SnapshotCacheStore(snapshot)
+        self.assertEqual(3, len(store))
+        self.assertEqual(["repeat", "first", "second"],
+                         expanded(store.get("http://example.com/a")))
+        store.close()
+
+    def test_interrupted_compaction_replays_nothing_twice(self):
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        store = govtrack.SnapshotCacheStore(snapshot)
+        store.add("http://example.com/a", "first", "repeat")
+        store.save()
+        with open(store.journal_filename, "rb") as f:
+            journal = f.read()
+        store.compact()
+        store.close()
+        # Crash after the new snapshot was renamed into place, but before
+        # the journal was trimmed
+        with open(store.journal_filename, "wb") as f:
+            f.write(journal)
+
+        store = govtrack.SnapshotCacheStore(snapshot)
+        self.assertEqual(["repeat", "first"],
+                         expanded(store.get("http://example.com/a")))
+        store.close()
+
+    def test_snapshot_compacts_in_the_background(self):
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        store = govtrack.SnapshotCacheStore(snapshot, compact_threshold=1000)
+        for i in range(50):
+            store.add("http://example.com/{}".format(i), "x" * 100, "repeat")
+        store.close()
+        self.assertTrue(os.path.exists(snapshot))
+
+        store = govtrack.SnapshotCacheStore(snapshot)
+        self.assertEqual(50, len(store))
+        self.assertEqual(["repeat", "x" * 100],
+                         expanded(store.get("http://example.com/49")))
+        store.close()
+
+    def test_responses_are_stored_compressed(self):
+        body = json.dumps({"objects": [make_bill(i) for i in range(50)]})
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        govtrack.compile_cache_snapshot("../src/govtrack_cache.json", snapshot)
+        for store in (govtrack.SqliteCacheStore(self.store),
+                      govtrack.SnapshotCacheStore(snapshot)):
+            store.add("http://example.com/a", body, "repeat")
+            store.save()
+            response = store.get("http://example.com/a")[1]
+            self.assertIsInstance(response, govtrack._CompressedResponse)
+            self.assertLess(len(response), len(body) // 4)
+            store.close()
+        govtrack.disconnect(self.store)
+        self.assertEqual(body, govtrack._lookup("http://example.com/a"))
+        govtrack.disconnect(snapshot)
+        self.assertEqual(body, govtrack._lookup("http://example.com/a"))
+        store = govtrack._DEFAULT_CLIENT.cache
+        store.compact()
+        self.assertIsInstance(store.get("http://example.com/a")[1],
+                              govtrack._CompressedResponse)
+
+    def test_invalid_snapshot_raises(self):
+        snapshot = os.path.join(self.directory, "cache.snapshot")
+        with open(snapshot, "w") as f:
+            f.write("{}")
+        self.assertRaises(govtrack.GovTrackException, govtrack.disconnect,
+                          snapshot)
+
+    def test_missing_store_raises(self):
+        self.assertRaises(govtrack.GovTrackException, govtrack.disconnect,
+                          self.store)
+
+    def test_recording_into_sqlite_store(self):
+        server = StandInServer({"/api/v2/bill": paginated([make_bill(1)])})
+        base_url = govtrack._BASE_URL
+        govtrack._BASE_URL = server.url + "/api/v2/"
+        try:
+            govtrack.connect()
+            govtrack.set_cache_store(govtrack.SqliteCacheStore(self.store))
+            govtrack._start_editing()
+            bills = govtrack.get_bills_by_keyword("healthcare")
+            govtrack._stop_editing()
+            govtrack._save_cache(self.store)
+            server.stop()
+
+            govtrack.disconnect(self.store)
+            self.assertEqual(bills, govtrack.get_bills_by_keyword("healthcare"))
+        finally:
+            govtrack._BASE_URL = base_url
+
+
+class TestOfflineSearch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = os.path.join(self.directory, "cache.json")
+        shutil.copy("../src/govtrack_cache.json", self.cache)
+
+    def tearDown(self):
+        govtrack.disconnect("../src/govtrack_cache.json")
+        shutil.rmtree(self.directory)
+
+    def test_unrecorded_keywords_are_searched(self):
+        govtrack.disconnect(self.cache)
+        bills = govtrack.get_bills_by_keyword("Medicare")
+        self.assertEqual(2, len(bills))
+        for bill in bills:
+            self.assertIn("medicare", (bill["title"] +
+                                       bill["description"]).lower())
+        self.assertEqual(bills, govtrack.search_bills("medicare"))
+        self.assertEqual(bills[:1], govtrack.search_bills("medicare", 1))
+        self.assertEqual(2, len(govtrack.get_bills_by_keyword_table(
+            "medicare")))
+        self.assertRaises(govtrack.GovTrackException,
+                          govtrack.get_bills_by_keyword, "no such bill")
+
+    def test_recorded_keywords_still_replay(self):
+        govtrack.disconnect(self.cache)
+        self.assertEqual(100, len(govtrack.get_bills_by_keyword("healthcare")))
+        self.assertIsNone(govtrack._DEFAULT_CLIENT._index)
+
+    def test_index_is_saved_next_to_the_cache(self):
+        govtrack.disconnect(self.cache)
+        govtrack.search_bills("medicare")
+        self.assertTrue(os.path.exists(self.cache + ".index"))
+
+        govtrack.disconnect(self.cache)
+        index = govtrack._BillIndex.load(self.cache + ".index")
+        self.assertEqual(100, len(index.documents))
+        self.assertFalse(index.sync(govtrack._DEFAULT_CLIENT.cache))
+
+    def test_ranking(self):
+        index = govtrack._BillIndex()
+        bills = [make_bill(1, "dental care"), make_bill(2, "dental dental"),
+                 make_bill(3, "care")]
+        index.add_response("bill?q=dental", json.dumps({"objects": bills}))
+        self.assertEqual(["H.R. 2: Dental Dental Act",
+                          "H.R. 1: Dental Care Act"],
+                         [bill["title"] for bill in index.search("dental")])
+        self.assertEqual(["H.R. 1: Dental Care Act"],
+                         [bill["title"]
+                          for bill in index.search("care dental")])
+
+        bills[0]["title"] = "H.R. 1: Vision Act"
+        index.add_response("bill?q=dental", json.dumps({"objects": bills}))
+        self.assertEqual(3, len(index.documents))
+        self.assertEqual([], index.search("care dental"))
+
+    def test_recorded_responses_are_indexed(self):
+        server = StandInServer({"/api/v2/bill": paginated(
+            [make_bill(i, "dental") for i in range(3)])})
+        base_url = govtrack._BASE_URL
+        govtrack._BASE_URL = server.url + "/api/v2/"
+        try:
+            govtrack.disconnect(self.cache)
+            govtrack.search_bills("medicare")
+            govtrack.connect()
+            govtrack._start_editing()
+            govtrack.get_bills_by_keyword("dental")
+            govtrack._stop_editing()
+            self.assertEqual(3, len(govtrack.search_bills("dental")))
+            govtrack._save_cache(self.cache)
+        finally:
+            govtrack._BASE_URL = base_url
+            server.stop()
+
+        govtrack.disconnect(self.cache)
+        self.assertEqual(3, len(govtrack.search_bills("dental act")))
+        self.assertEqual(2, len(govtrack.search_bills("medicare")))
+
+
+class TestCacheWarming(StandInServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = os.path.join(self.directory, "warm.sqlite")
+        self.failing = set()
+        roles = {"senator": [make_role(i) for i in range(250)],
+                 "representative": [make_role(i, role_type="representative")
+                                    for i in range(120)]}
+        bills = [make_bill(i, "dental") for i in range(130)]
+
+        def role(handler):
+            params = parse_qs(urlsplit(handler.path).query)
+            if params["offset"][0] in self.failing:
+                return None
+            return paginated(roles[params["role_type"][0]])(handler)
+
+        self.serve({"/api/v2/role": role, "/api/v2/bill": paginated(bills)},
+                   connect=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_warm_crawls_every_page(self):
+        self.assertEqual(3 + 2 + 2 + 2, govtrack.warm_cache(
+            self.store, congresses=[113], keywords=["dental"], workers=3))
+        self.assertFalse(os.path.exists(self.store + ".warm"))
+
+        govtrack.disconnect(self.store)
+        self.assertEqual(250, len(list(govtrack.iter_roles(
+            role_type="senator"))))
+        self.assertEqual(120, len(govtrack.get_roles_table(
+            role_type="representative")))
+        self.assertEqual(130, len(list(govtrack.iter_bills("dental"))))
+        self.assertEqual(130, len(govtrack.search_bills("dental")))
+
+    def test_warmed_cache_answers_batched_queries(self):
+        govtrack.warm_cache(self.store, workers=2)
+
+        govtrack.disconnect(self.store)
+        self.assertEqual(
+            250, len(govtrack.get_senators_by_party(["Democrat"])["Democrat"]))
+        self.assertEqual({"Democrat": 120, "Green": 0}, dict(
+            (party, len(officials)) for party, officials in
+            govtrack.get_representatives_by_party(["Democrat",
+                                                   "Green"]).items()))
+
+    def test_interrupted_warm_resumes(self):
+        self.failing.add("200")
+        self.assertRaises(govtrack.GovTrackException, govtrack.warm_cache,
+                          self.store, workers=2)
+        self.assertTrue(os.path.exists(self.store + ".warm"))
+
+        self.failing.clear()
+        requests = len(self.server.requests)
+        pages = govtrack.warm_cache(self.store, workers=2)
+        # Only the pages missing from the first run were fetched
+        self.assertLess(pages, 5)
+        self.assertEqual(requests + pages, len(self.server.requests))
+        self.assertFalse(os.path.exists(self.store + ".warm"))
+
+        govtrack.disconnect(self.store)
+        self.assertEqual(250, len(list(govtrack.iter_roles(
+            role_type="senator"))))
+
+    def test_interrupted_json_warm_resumes_from_the_journal(self):
+        cache = os.path.join(self.directory, "warm.json")
+        self.failing.add("200")
+        self.assertRaises(govtrack.GovTrackException, govtrack.warm_cache,
+                          cache, workers=2)
+        # As if the process died before writing the JSON cache
+        os.remove(cache)
+
+        self.failing.clear()
+        self.assertLess(govtrack.warm_cache(cache, workers=2), 5)
+        govtrack.disconnect(cache)
+        self.assertEqual(250, len(list(govtrack.iter_roles(
+            role_type="senator"))))
+
+    def test_store_errors_stop_the_warm_up(self):
+        def add(store, key, value, pattern):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        original = govtrack.SqliteCacheStore.add
+        govtrack.SqliteCacheStore.add = add
+        try:
+            self.assertRaises(govtrack.GovTrackException, govtrack.warm_cache,
+                              self.store, workers=2)
+        finally:
+            govtrack.SqliteCacheStore.add = original
+
+    def test_command_line(self):
+        cache = os.path.join(self.directory, "warm.json")
+        self.assertEqual(0, govtrack.main(["warm", cache, "--keyword",
+                                           "dental", "--workers", "2"]))
+        govtrack.disconnect(cache)
+        self.assertEqual(130, len(list(govtrack.iter_bills("dental"))))
+
+    def test_warming_a_json_cache_keeps_its_non_ascii_text(self):
+        cache = os.path.join(self.directory, "warm.json")
+        key = govtrack._cache_key(govtrack._BASE_URL + "bill?q=pena")
+        body = json.dumps({"objects": [dict(make_bill(1),
+                                            title=u"Act of Se\xf1or Pe\xf1a")]},
+                          ensure_ascii=False)
+        with open(cache, "w") as f:
+            json.dump({"data": {key: ["repeat", body]}, "metadata": ""}, f)
+
+        govtrack.warm_cache(cache, keywords=["dental"], workers=2)
+        with open(cache) as f:
+            self.assertEqual(["repeat", body], json.load(f)["data"][key])
+
+
+class TestDeltaSync(StandInServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = os.path.join(self.directory, "mirror.sqlite")
+        self.bills = [make_bill(i, "dental") for i in range(250)]
+        for bill in self.bills:
+            bill["current_status_date"] = "2013-01-{:02d}".format(
+                1 + bill["number"] % 28)
+
+        def bills(handler):
+            params = parse_qs(urlsplit(handler.path).query)
+            since = params.get("current_status_date__gte", [""])[0]
+            changed = sorted((bill for bill in self.bills
+                              if bill["current_status_date"] >= since),
+                             key=lambda bill: bill["current_status_date"])
+            return paginated(changed)(handler)
+
+        self.serve({"/api/v2/bill": bills})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_only_changed_bills_are_fetched(self):
+        self.assertEqual(250, len(govtrack.sync_bills(self.store, "dental")))
+        self.assertEqual(3, len(self.server.requests))
+        self.assertIn("order_by=current_status_date",
+                      self.server.requests[0])
+
+        for bill in self.bills[10:13]:
+            bill["current_status_date"] = "2013-02-01"
+            bill["current_status_description"] = "Passed House"
+        govtrack.clear_response_cache()
+        changed = govtrack.sync_bills(self.store, "dental")
+        self.assertEqual(4, len(self.server.requests))
+        self.assertEqual([govtrack.Bill._from_json(bill)._to_dict()
+                          for bill in self.bills[10:13]], changed)
+
+        govtrack.clear_response_cache()
+        self.assertEqual([], govtrack.sync_bills(self.store, "dental"))
+        self.assertEqual(5, len(self.server.requests))
+
+        govtrack.disconnect(self.store)
+        self.assertEqual(250, len(govtrack._DEFAULT_CLIENT.cache.keys()))
+        replayed = govtrack._fetch_query(govtrack._bill_url(200011))
+        self.assertEqual("Passed House",
+                         replayed["objects"][0]["current_status_description"])
+
+    def test_same_day_change_below_the_mark_is_fetched(self):
+        govtrack.sync_bills(self.store, "dental")
+        bill = self.bills[3]
+        bill["current_status_date"] = "2013-01-28"
+        bill["current_status_description"] = "Passed House"
+        govtrack.clear_response_cache()
+        self.assertEqual([govtrack.Bill._from_json(bill)._to_dict()],
+                         govtrack.sync_bills(self.store, "dental"))
+        govtrack.clear_response_cache()
+        self.assertEqual([], govtrack.sync_bills(self.store, "dental"))
+
+    def test_syncing_a_json_cache_keeps_its_non_ascii_text(self):
+        mirror = os.path.join(self.directory, "mirror.json")
+        key = govtrack._cache_key(govtrack._bill_url(100000))
+        body = json.dumps({"meta": {"total_count": 1},
+                           "objects": [dict(make_bill(1),
+                                            title=u"Act of Se\xf1or Pe\xf1a")]},
+                          ensure_ascii=False)
+        with open(mirror, "w") as f:
+            json.dump({"data": {key: ["repeat", body]}, "metadata": ""}, f)
+
+        self.assertEqual(250, len(govtrack.sync_bills(mirror, "dental")))
+        with open(mirror) as f:
+            data = json.load(f)["data"]
+        self.assertEqual(251, len(data))
+        self.assertEqual(["repeat", body], data[key])
+
+    def test_command_line(self):
+        mirror = os.path.join(self.directory, "mirror.json")
+        self.assertEqual(0, govtrack.main(["sync", mirror, "--keyword",
+                                           "dental"]))
+        with open(mirror + ".sync") as f:
+            marks = json.load(f)
+        self.assertEqual(["2013-01-28"], list(marks.values()))
+
+
+class TestRequestKeys(StandInServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.serve({"/api/v2/role": filtered(
+            [make_role(i, "Democrat", "senator") for i in range(5)])})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_equal_queries_share_a_key(self):
+        key = govtrack._cache_key(
+            "https://www.govtrack.us/api/v2/role?party=Democrat&current=True")
+        endpoint, digest = key.split(":")
+        self.assertEqual(("role", 20), (endpoint, len(digest)))
+        for url in ("https://www.govtrack.us/api/v2/role?current=True"
+                    "&party=Democrat",
+                    "https://WWW.govtrack.us/api/v2/role/?current=true"
+                    "&party=+democrat+"):
+            self.assertEqual(key, govtrack._cache_key(url))
+        self.assertNotEqual(key, govtrack._cache_key(
+            "https://www.govtrack.us/api/v2/role?current=True"
+            "&party=Republican"))
+        self.assertEqual(key, govtrack._cache_key(key))
+
+    def test_spellings_of_a_query_are_fetched_once(self):
+        expected = govtrack.get_senators("Democrat")
+        for party in ("democrat", " DEMOCRAT "):
+            self.assertEqual(expected, govtrack.get_senators(party))
+        self.assertEqual(1, len(self.server.requests))
+        self.assertIn("party=Democrat", self.server.requests[0])
+
+        govtrack._BASE_URL = self.base_url
+        govtrack.disconnect("../src/govtrack_cache.json")
+        self.assertEqual(govtrack.get_senators("Democrat"),
+                         govtrack.get_senators("democrat "))
+
+    def test_replayed_results_match_fresh_ones(self):
+        name = u"Sen. \u201cTom\u201d Harkin"
+        role = dict(make_role(1), person={"id": 1, "name": name})
+        self.server.routes["/api/v2/role"] = json.dumps(
+            {"meta": {"total_count": 1}, "objects": [role]},
+            ensure_ascii=False)
+        govtrack._start_editing()
+        try:
+            fresh = govtrack.get_senators("Democrat")
+        finally:
+            govtrack._stop_editing()
+        self.assertEqual("Sen. ?Tom? Harkin", fresh[0]["name"])
+
+        # Each store is saved from the one before it
+        caches = [os.path.join(self.directory, filename) for filename in
+                  ("cache.json", "cache.sqlite", "cache.snapshot",
+                   "resaved.json")]
+        govtrack._save_cache(caches[0])
+        for cache, resaved in zip(caches, caches[1:]):
+            govtrack.disconnect(cache)
+            self.assertEqual(fresh, govtrack.get_senators("Democrat"))
+            govtrack._save_cache(resaved)
+        with open(caches[-1]) as f:
+            entry = json.load(f)["data"][govtrack._cache_key(
+                govtrack._build_query({"role_type": "senator",
+                                       "current": "True",
+                                       "party": "Democrat"}, "role"))]
+        self.assertEqual(name, json.loads(entry[1])["objects"][0]["person"]
+                         ["name"])
+
+    def test_migrate_cache(self):
+        store = os.path.join(self.directory, "cache.sqlite")
+        cache = govtrack.SqliteCacheStore(store)
+        for url, title in (("bill?q=Dental", "first"),
+                           ("bill?q=dental+", "second")):
+            cache.add(govtrack._BASE_URL + url, json.dumps(
+                {"objects": [dict(make_bill(1), title=title)]}), "repeat")
+        cache.close()
+
+        self.assertEqual((2, 1), govtrack.migrate_cache(store))
+        govtrack.disconnect(store)
+        self.assertEqual(1, len(govtrack._DEFAULT_CLIENT.cache))
+        self.assertEqual(["first", "second"],
+                         [govtrack.get_bills_by_keyword("dental")[0]["title"]
+                          for _ in range(2)])
+
+    def test_migrating_keeps_non_ascii_text(self):
+        cache = os.path.join(self.directory, "cache.json")
+        body = json.dumps({"objects": [dict(make_bill(1),
+                                            title=u"Act of Se\xf1or Pe\xf1a")]},
+                          ensure_ascii=False)
+        with open(cache, "w") as f:
+            json.dump({"data": {govtrack._BASE_URL + "bill?q=Dental":
+                                ["repeat", body]}, "metadata": ""}, f)
+
+        self.assertEqual((1, 1), govtrack.migrate_cache(cache))
+        with open(cache) as f:
+            data = json.load(f)["data"]
+        self.assertEqual([["repeat", body]], list(data.values()))
+
+    def test_command_line(self):
+        cache = os.path.join(self.directory, "cache.json")
+        shutil.copy("../src/govtrack_cache.json", cache)
+        self.assertEqual(0, govtrack.main(["migrate", cache]))
+        with open(cache) as f:
+            keys = list(json.load(f)["data"])
+        self.assertEqual(3, len(keys))
+        self.assertTrue(all("://" not in key for key in keys))
+
+        govtrack._BASE_URL = self.base_url
+        govtrack.disconnect(cache)
+        self.assertEqual(govtrack.get_senators("Democrat"),
+                         govtrack.get_senators("democrat"))
+
+
+class TestCoalescing(StandInServerTestCase):
+    def setUp(self):
+        def slow_bills(handler):
+            time.sleep(0.2)
+            return json.dumps({"meta": {"total_count": 1},
+                               "objects": [make_bill(1)]})
+
+        self.serve({"/api/v2/bill": slow_bills})
+
+    def test_concurrent_identical_queries_share_one_request(self):
+        before = govtrack.get_coalescing_stats()
+        results = []
+
+        def lookup():
+            results.append(govtrack.get_bills_by_keyword("healthcare"))
+
+        threads = [threading.Thread(target=lookup) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        after = govtrack.get_coalescing_stats()
+        self.assertEqual(1, len(self.server.requests))
+        self.assertEqual(20, len(results))
+        self.assertTrue(all(bills == results[0] for bills in results))
+        self.assertEqual(20, after['calls'] - before['calls'])
+        self.assertEqual(19, after['coalesced'] - before['coalesced'])
+        self.assertEqual(0, after['in_flight'])
+
+    def test_coalesced_callers_get_their_own_results(self):
+        results = []
+
+        def lookup():
+            results.append(govtrack._fetch_govtrack_info({'q': "farm"},
+                                                         "bill"))
+
+        threads = [threading.Thread(target=lookup) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(self.server.requests))
+        self.assertEqual(5, len(set(id(result) for result in results)))
+        self.assertEqual(5, len(set(id(result['objects'][0])
+                                    for result in results)))
+
+    def test_errors_are_shared(self):
+        errors = []
+
+        def lookup():
+            try:
+                govtrack._fetch_govtrack_info({'q': "x"}, "missing")
+            except govtrack.GovTrackException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(5, len(errors))
+
+    @unittest.skipIf(sys.version_info < (3, 4), "asyncio requires Python 3")
+    def test_concurrent_async_queries_share_one_request(self):
+        import asyncio
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            lookups = asyncio.gather(*[
+                govtrack.get_bills_by_keyword_async("dental")
+                for _ in range(10)])
+            results = loop.run_until_complete(lookups)
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+        self.assertEqual(1, len(self.server.requests))
+        self.assertTrue(all(bills == results[0] for bills in results))
+        self.assertTrue(all(bills is not results[0] and
+                            bills[0] is not results[0][0]
+                            for bills in results[1:]))
+
+
+class TestGovTrackClient(StandInServerTestCase):
+    def setUp(self):
+        def slow_bills(handler):
+            time.sleep(0.1)
+            keyword = parse_qs(urlsplit(handler.path).query)["q"][0]
+            bill = make_bill(1)
+            bill["title"] = keyword
+            return json.dumps({"meta": {"total_count": 1},
+                               "objects": [bill]})
+
+        self.serve({"/api/v2/bill": slow_bills}, connect=False)
+        self.client = govtrack.GovTrackClient()
+
+    def tearDown(self):
+        self.client.close()
+
+    def run_threads(self, target, count):
+        threads = [threading.Thread(target=target, args=(i,))
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_replays_each_get_their_own_response(self):
+        url = "http://example.com/sequence"
+        self.client._start_editing("cycle")
+        for i in range(400):
+            self.client._add_to_cache(url, str(i))
+        self.client.connected = False
+        replayed = []
+
+        def replay(thread):
+            for _ in range(50):
+                replayed.append(self.client._lookup(url))
+
+        self.run_threads(replay, 8)
+        self.assertEqual([str(i) for i in range(400)],
+                         sorted(replayed, key=int))
+
+    def test_clients_do_not_share_state(self):
+        recorded = govtrack.GovTrackClient()
+        recorded._start_editing()
+        recorded.get_bills_by_keyword("dental")
+        recorded.connected = False
+        offline, online = [], []
+
+        def lookup(thread):
+            if thread % 2:
+                offline.append(recorded.get_bills_by_keyword("dental"))
+            else:
+                online.append(self.client.get_bills_by_keyword("vision"))
+
+        try:
+            self.run_threads(lookup, 8)
+        finally:
+            recorded.close()
+        self.assertEqual(4, len(offline))
+        self.assertEqual(4, len(online))
+        self.assertTrue(all(bills[0]["title"] == "dental"
+                            for bills in offline))
+        self.assertTrue(all(bills[0]["title"] == "vision"
+                            for bills in online))
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual(1, len(self.client.response_cache))
+        self.assertEqual(["repeat"], [entry[0] for key, entry in
+                                      recorded.cache.items()])
+        self.assertEqual(0, len(self.client.cache.keys()))
+
+    def test_shared_client_requests_overlap(self):
+        titles = []
+
+        def lookup(thread):
+            bills = self.client.get_bills_by_keyword("bill{}".format(thread))
+            titles.append(bills[0]["title"])
+
+        start = time.time()
+        self.run_threads(lookup, 8)
+        elapsed = time.time() - start
+        self.assertEqual(["bill{}".format(i) for i in range(8)],
+                         sorted(titles))
+        self.assertEqual(8, len(self.server.requests))
+        self.assertLess(elapsed, 0.5)
+
+
+@unittest.skipIf(sys.version_info < (3, 4), "asyncio requires Python 3")
+class TestGovTrackAsync(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+
+        govtrack.disconnect("../src/govtrack_cache.json")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        import asyncio
+
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        govtrack.set_async_concurrency(10)
+
+    def test_async_matches_sync(self):
+        import asyncio
+
+        govtrack.set_async_concurrency(2)
+        lookups = asyncio.gather(
+            govtrack.get_senators_async("Democrat"),
+            govtrack.get_representatives_async("Democrat"),
+            govtrack.get_bills_by_keyword_async("healthcare"),
+            govtrack._fetch_govtrack_info_async({'q': "healthcare"}, "bill"))
+
+        senators, reps, bills, raw = self.loop.run_until_complete(lookups)
+        self.assertEqual(govtrack.get_senators("Democrat"), senators)
+        self.assertEqual(govtrack.get_representatives("Democrat"), reps)
+        self.assertEqual(govtrack.get_bills_by_keyword("healthcare"), bills)
+        self.assertEqual(len(bills), len(raw['objects']))
+
+    def test_async_errors_are_raised(self):
+        lookup = govtrack.get_bills_by_keyword_async("no such query")
+        self.assertRaises(govtrack.GovTrackException,
+                          self.loop.run_until_complete, lookup)